@@ -0,0 +1,131 @@
+from functools import cache
+from typing import Iterable
+
+from pacman_app import PacDots, Fruit, Ghosts
+from pacman_app.characters.ghosts.mode import Mode
+from pacman_app.map.direction import Direction
+
+from pacman_ai_neat.vision import sight_line, ordinal_offsets
+
+
+WIDTH = 28
+HEIGHT = 36
+# Columns either side of the PacMaze so characters in the tunnel still have a bit
+PADDING = 8
+STRIDE = WIDTH + 2 * PADDING
+
+
+def tile_bit(tile: tuple[int,int]) -> int:
+    """Return the bit corresponding to the given tile (0 if the tile is off the board)."""
+
+    x, y = tile
+    if x < -PADDING or x >= WIDTH + PADDING or y < 0 or y >= HEIGHT:
+        return 0
+
+    return 1 << (y * STRIDE + x + PADDING)
+
+
+def tiles_mask(tiles: Iterable[tuple[int,int]]) -> int:
+    """Return the bitmask with the bits of all the given tiles set."""
+
+    mask = 0
+    for tile in tiles:
+        mask |= tile_bit(tile)
+    return mask
+
+
+def mask_tiles(mask: int) -> set[tuple[int,int]]:
+    """Return the tiles whose bits are set in the given bitmask."""
+
+    tiles = set()
+    while mask:
+        bit = mask & -mask
+        y, x = divmod(bit.bit_length() - 1, STRIDE)
+        tiles.add((x - PADDING, y))
+        mask ^= bit
+    return tiles
+
+
+@cache
+def sight_line_mask(tile: tuple[int,int], direction: Direction) -> tuple[int, bool]:
+    """Return the bitmask of the tiles seen looking from the given tile in the given direction, and
+    whether the line of sight leaves the PacMaze."""
+
+    tiles, leaves_maze = sight_line(tile, direction)
+    return tiles_mask(tiles), leaves_maze
+
+
+@cache
+def ordinal_mask(tile: tuple[int,int], direction: Direction) -> int:
+    """Return the bitmask of the square of tiles seen from the given tile in the direction 45 degrees
+    clockwise from the given direction."""
+
+    return tiles_mask((tile[0] + d_x, tile[1] + d_y) for d_x, d_y in ordinal_offsets(direction))
+
+
+class Bitboard:
+    """Bitmasks over the PacMaze of everything PacMan can see.
+
+    The PacDot masks are only rebuilt when a dot has been eaten, everything else is rebuilt on
+    each call of update.
+    """
+
+    def __init__(self) -> None:
+        self.pacdots: PacDots | None = None
+        self.remaining: int = -1
+        self.dots: int = 0
+        self.power_dots: int = 0
+        self.all_dots: int = 0
+        self.fruit: int = 0
+        self.active_ghosts: int = 0
+        self.frightened_ghosts: int = 0
+
+    def update(self, pacdots: PacDots, fruit: Fruit, ghosts: Ghosts) -> None:
+        """Bring the masks up to date with the given game objects."""
+
+        if pacdots is not self.pacdots or pacdots.remaining != self.remaining:
+            self.pacdots = pacdots
+            self.remaining = pacdots.remaining
+            self.dots = tiles_mask(pacdots.dots)
+            self.power_dots = tiles_mask(pacdots.power_dots)
+            self.all_dots = self.dots | self.power_dots
+
+        self.fruit = tile_bit(fruit.position.tile_pos) if fruit.available else 0
+
+        self.active_ghosts = 0
+        self.frightened_ghosts = 0
+        for ghost in ghosts:
+            if ghost.inactive:
+                continue
+            if ghost.frightened:
+                self.frightened_ghosts |= tile_bit(ghost.position.tile_pos)
+            elif ghost.mode != Mode.RETURN_TO_HOME:
+                self.active_ghosts |= tile_bit(ghost.position.tile_pos)
+
+    def look_along(self, tile: tuple[int,int], direction: Direction) -> float:
+        """Return the cardinal vision value looking from the given tile in the given direction,
+        assuming PacMan can move that way."""
+
+        mask, leaves_maze = sight_line_mask(tile, direction)
+
+        if mask & self.active_ghosts:
+            return 1
+
+        # If we left the PacMaze then its only been path (only happens in tunnel)
+        if leaves_maze:
+            return 0
+
+        if mask & self.frightened_ghosts:
+            return -1
+        if mask & self.fruit:
+            return -0.6
+        if mask & self.all_dots:
+            return -0.5
+
+        return 0
+
+    def look_in_ordinal(self, tile: tuple[int,int], direction: Direction) -> bool:
+        """Return True if there is an active ghost in the square of tiles seen from the given tile in
+        the direction 45 degrees clockwise from the given direction."""
+
+        return bool(ordinal_mask(tile, direction) & self.active_ghosts)
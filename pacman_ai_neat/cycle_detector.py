@@ -0,0 +1,42 @@
+from typing import Hashable
+
+from pacman_app import PacDots
+
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.state import freeze_attributes
+
+
+class CycleDetector:
+    """Detects when an episode of Phase.ONLY_DOTS returns to a state it has already been in.
+
+    Nothing but PacMan moves and his choices are deterministic, so a repeated state with no PacDots eaten
+    in between means PacMan will go round the same loop until he starves. A state is just PacMan's own
+    attributes (less his transient attributes), as the PacDots left are fixed by the number remaining
+    while none are eaten. The states seen are forgotten whenever a PacDot is eaten since they can't be
+    reached again.
+
+    Only used in Phase.ONLY_DOTS, as in the other phases the Ghosts' counters keep changing (even while
+    they are all inactive) so a state is never repeated.
+    """
+
+    def __init__(self, pacman: Player, pacdots: PacDots) -> None:
+        self.pacman = pacman
+        self.pacdots = pacdots
+        self.shared = {id(pacman): 0}
+        self.remaining = pacdots.remaining
+        self.seen: set[Hashable] = set()
+
+    def repeated(self) -> bool:
+        """Return True if the current state has been seen since a PacDot was last eaten, otherwise record
+        it."""
+
+        if self.pacdots.remaining != self.remaining:
+            self.remaining = self.pacdots.remaining
+            self.seen.clear()
+
+        state = freeze_attributes(self.pacman, self.shared, self.pacman.transient_attributes)
+        if state in self.seen:
+            return True
+
+        self.seen.add(state)
+        return False
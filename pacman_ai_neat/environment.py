@@ -0,0 +1,75 @@
+from pacman_app import PacDots, Fruit, Ghosts, Blinky, Pinky, Inky, Clyde
+
+from pacman_ai_neat.player import Player
+
+
+class Environment:
+    """The game objects PacMan plays against.
+
+    These are kept between episodes and reset at the start of each one rather than being rebuilt.
+    """
+
+    def __init__(self, pacman: Player) -> None:
+
+        # Ghosts set up
+        blinky = Blinky(pacman)
+        pinky = Pinky(pacman)
+        inky = Inky(pacman)
+        clyde = Clyde(pacman)
+        self.ghosts = Ghosts(pacman, blinky, pinky, inky, clyde)
+        self.ghosts.initialise()
+
+        # PacDot set up
+        self.pacdots = PacDots()
+
+        # Fruit set up
+        self.fruit = Fruit()
+
+        # The episode left mid-game in these objects, saved before they are used for anything else
+        self.paused_episode = None
+
+    def chase(self, pacman: Player) -> None:
+        """Ensure that the Ghosts are referencing the given PacMan."""
+
+        for ghost in self.ghosts:
+            ghost.pacman = pacman
+        self.ghosts.pacman = pacman
+
+    def initialise_ghosts(self, pacman: Player) -> None:
+        """Initialise the Ghosts and ensure that they are referencing the given PacMan."""
+
+        self.chase(pacman)
+        self.ghosts.initialise()
+
+    def new_episode(self, pacman: Player) -> None:
+        """Prepare a new episode against the given PacMan."""
+
+        self.initialise_ghosts(pacman)
+        self.pacdots = PacDots()
+        self.fruit.available = False
+
+
+# The Environment kept by this process
+_environment: Environment | None = None
+
+
+def resident_environment(pacman: Player, new_episode: bool = True) -> Environment:
+    """Return this process's Environment, ready for a new episode against the given PacMan (or just
+    chasing him if not new_episode, for a game about to be restored into it).
+
+    An episode paused in the Environment is saved first.
+    """
+
+    global _environment
+    if _environment is None:
+        _environment = Environment(pacman)
+        return _environment
+
+    if _environment.paused_episode is not None:
+        _environment.paused_episode.save()
+    if new_episode:
+        _environment.new_episode(pacman)
+    else:
+        _environment.chase(pacman)
+
+    return _environment
@@ -0,0 +1,134 @@
+import math
+from statistics import fmean, stdev
+from typing import Callable
+
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.rng import random_stream
+from pacman_ai_neat.settings import population_settings, simulation_settings
+from pacman_ai_neat.trajectory import MoveLog
+
+
+# The results of one episode: fitness, score and lifespan
+Episode = tuple[float, int, int]
+
+
+class EpisodeSimulator:
+    """Wraps the simulator function of a phase with Ghosts so that each Genome's fitness is taken over
+    several episodes.
+
+    Episode k of every Genome in a generation is played with the same random stream (common random
+    numbers), so that differences in fitness come from the Genomes rather than from luck, and each
+    generation has new streams so that Genomes can't fit a fixed set of them. The fitness is the mean of
+    the episodes' fitnesses, or the given quantile of them. The score and lifespan are those of the best
+    episode, as is the move_log if episodes are recorded, and the mean score is kept as mean_score.
+    """
+
+    def __init__(
+        self,
+        simulate: Callable[[Player], Player],
+        episodes: int | None = None,
+        quantile: float | None = None,
+    ) -> None:
+        self.simulate = simulate
+        self.episodes = episodes or simulation_settings['episodes']
+        self.quantile = quantile if quantile is not None else simulation_settings['episode_quantile']
+
+    def play(self, pacman: Player, episode: int, move_logs: list[MoveLog | None]) -> Episode:
+        """Play the given episode and return its results, adding PacMan's move_log to the given list."""
+
+        with random_stream('episode', pacman.evaluation, episode):
+            self.simulate(pacman)
+        move_logs.append(pacman.move_log)
+        return pacman.fitness, pacman.score, pacman.lifespan
+
+    def aggregate(self, fitnesses: list[float]) -> float:
+        """Return the fitness over all the given episode fitnesses."""
+
+        if self.quantile is None:
+            return fmean(fitnesses)
+
+        # Interpolate between the closest ranks
+        fitnesses = sorted(fitnesses)
+        position = self.quantile * (len(fitnesses) - 1)
+        lower = math.floor(position)
+        upper = min(lower + 1, len(fitnesses) - 1)
+        return fitnesses[lower] + (position - lower) * (fitnesses[upper] - fitnesses[lower])
+
+    def set_results(self, pacman: Player, episodes: list[Episode], move_logs: list[MoveLog | None]) -> None:
+        """Set PacMan's results to those over all the given episodes, which had the given move_logs."""
+
+        fitnesses, scores, _ = zip(*episodes)
+        best = max(range(len(episodes)), key = lambda episode: episodes[episode][0])
+        _, pacman.score, pacman.lifespan = episodes[best]
+        pacman.move_log = move_logs[best]
+        pacman.fitness = self.aggregate(list(fitnesses))
+        pacman.mean_score = fmean(scores)
+
+    def __call__(self, pacman: Player) -> Player:
+        move_logs = []
+        episodes = [self.play(pacman, episode, move_logs) for episode in range(self.episodes)]
+        self.set_results(pacman, episodes, move_logs)
+        return pacman
+
+
+class AdaptiveEpisodeEvaluator(EpisodeSimulator):
+    """Evaluates a whole generation, giving extra episodes only to the Genomes whose fitness is too
+    uncertain to say which side of the selection cutoff they fall.
+
+    Every Genome plays simulation_settings['episodes'] episodes. Then, one episode at a time, each Genome
+    whose fitness is within a standard error of the cutoff plays another, until none are or they reach
+    max_episodes. The cutoff is the fitness below which population_settings['cull_percentage'] of the
+    generation lies, which approximates the culling done within each Species.
+    """
+
+    def __init__(
+        self,
+        simulate: Callable[[Player], Player],
+        episodes: int | None = None,
+        max_episodes: int | None = None,
+        quantile: float | None = None,
+    ) -> None:
+        super().__init__(simulate, episodes, quantile)
+        self.max_episodes = max_episodes or simulation_settings['max_episodes'] or 4 * self.episodes
+        self.cull_percentage = population_settings['cull_percentage'] or 0.5
+
+    def cutoff(self, fitnesses: list[float]) -> float:
+        """Return the fitness a Genome must beat to survive culling."""
+
+        fitnesses = sorted(fitnesses)
+        return fitnesses[min(int(self.cull_percentage * len(fitnesses)), len(fitnesses) - 1)]
+
+    def uncertain(self, episodes: list[Episode], cutoff: float) -> bool:
+        """Return True if a Genome with the given episodes could be on either side of the cutoff."""
+
+        if len(episodes) >= self.max_episodes:
+            return False
+        if len(episodes) < 2:
+            return True
+
+        fitnesses = [fitness for fitness, _, _ in episodes]
+        standard_error = stdev(fitnesses) / math.sqrt(len(fitnesses))
+        return abs(self.aggregate(fitnesses) - cutoff) <= standard_error
+
+    def evaluate(self, players: list[Player]) -> list[Player]:
+        """Simulate all the given Players, setting their results in place and returning them."""
+
+        move_logs = [[] for _ in players]
+        episodes = [
+            [self.play(pacman, episode, logs) for episode in range(self.episodes)]
+            for pacman, logs in zip(players, move_logs)
+        ]
+
+        while True:
+            cutoff = self.cutoff([self.aggregate([fitness for fitness, _, _ in results]) for results in episodes])
+            uncertain = [i for i, results in enumerate(episodes) if self.uncertain(results, cutoff)]
+            if not uncertain:
+                break
+
+            for i in uncertain:
+                episodes[i].append(self.play(players[i], len(episodes[i]), move_logs[i]))
+
+        for pacman, results, logs in zip(players, episodes, move_logs):
+            self.set_results(pacman, results, logs)
+
+        return players
@@ -0,0 +1,160 @@
+import os
+import warnings
+from multiprocessing import Pool
+from typing import Callable
+
+from neat.genome import Genome
+
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.settings import progress_settings, simulation_settings
+
+
+def result_attributes() -> tuple[str, ...]:
+    """Return the attributes of a simulated Player that are its results, i.e. its fitness, those in the
+    progress and those the other evaluators use (including the MoveLog if trajectories are recorded)."""
+
+    return tuple(dict.fromkeys([
+        'fitness',
+        *(progress_settings['bests'] or []),
+        *(progress_settings['averages'] or []),
+        'lifespan',
+        'skipped_decisions',
+        *(['move_log'] if simulation_settings['record_trajectories'] else []),
+    ]))
+
+
+# The Player, simulate function and result attributes kept by each worker process
+_player: Player | None = None
+_simulate: Callable[[Player], Player] | None = None
+_attributes: tuple[str, ...] = ()
+
+
+def _initialise_worker(simulate: Callable[[Player], Player], attributes: tuple[str, ...]) -> None:
+    """Create the Player this worker will reuse for every Genome it is sent."""
+
+    global _player, _simulate, _attributes
+    _player = Player({})
+    _simulate = simulate
+    _attributes = attributes
+
+
+def _simulate_genome(job: tuple[Genome, int]) -> tuple:
+    """Simulate the given Genome in the given evaluation with this worker's Player and return the
+    results."""
+
+    _player.genome, _player.evaluation = job
+    _simulate(_player)
+    return tuple(getattr(_player, attribute) for attribute in _attributes)
+
+
+class SerialEvaluator:
+    """Runs a simulate function over many Players one after another in this process."""
+
+    def __init__(self, simulate: Callable[[Player], Player]) -> None:
+        self.simulate = simulate
+
+    def evaluate(self, players: list[Player]) -> list[Player]:
+        """Simulate all the given Players, setting their results in place and returning them."""
+
+        for pacman in players:
+            self.simulate(pacman)
+
+        return players
+
+
+class ParallelEvaluator:
+    """Runs a simulate function over many Players in a pool of worker processes.
+
+    Each worker keeps one Player and (through the simulator) one set of game objects for its whole
+    life, so only Genomes are sent to the workers and only the results in attributes (by default
+    result_attributes() when the evaluator is created) are sent back.
+    """
+
+    def __init__(
+        self,
+        simulate: Callable[[Player], Player],
+        processes: int | None = None,
+        attributes: tuple[str, ...] | None = None,
+    ) -> None:
+        self.processes = processes or simulation_settings['processes'] or os.cpu_count()
+        self.attributes = attributes or result_attributes()
+        self.pool = Pool(self.processes, initializer=_initialise_worker, initargs=(simulate, self.attributes))
+
+    def evaluate(self, players: list[Player]) -> list[Player]:
+        """Simulate all the given Players, setting their results in place and returning them."""
+
+        jobs = [(player.genome, player.evaluation) for player in players]
+        chunksize = max(1, len(jobs) // (4 * self.processes))
+        for player, results in zip(players, self.pool.imap(_simulate_genome, jobs, chunksize)):
+            for attribute, value in zip(self.attributes, results):
+                setattr(player, attribute, value)
+
+        return players
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self) -> 'ParallelEvaluator':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class BatchedSimulator:
+    """Lets an evaluator of many Players at once (anything with an evaluate method taking a list of
+    Players) be used as the simulate function that neat.run calls with one Player at a time.
+
+    Each call only queues the Player. The queue is evaluated the first time the fitness of a queued
+    Player is read (or a queued Player is pickled), so each generation is a single evaluation as long as
+    neat hands over the whole generation before reading any fitness. That order is neat's own rather than
+    part of its interface, so a warning is given if a batch comes out smaller than half of generation_size
+    (when given), as generations are then being evaluated in pieces. Every Player is told the number of its evaluation (counting from 0 in this run), and the
+    listeners are called with the Players of each evaluation once their results are set.
+    """
+
+    def __init__(self, evaluator: object, generation_size: int | None = None) -> None:
+        self.evaluator = evaluator
+        self.generation_size = generation_size
+        self.queue: list[Player] = []
+        self.evaluations = 0
+        self.listeners: list[Callable[[list[Player]], None]] = []
+
+    def flush(self) -> None:
+        """Evaluate every queued Player."""
+
+        players, self.queue = self.queue, []
+        for pacman in players:
+            pacman.pending_evaluation = None
+
+        if self.generation_size and len(players) < self.generation_size // 2:
+            warnings.warn(
+                f'Only {len(players)} of a generation of {self.generation_size} Players were queued before a '
+                'fitness was read, so generations are not being evaluated as a whole'
+            )
+            self.generation_size = None
+
+        self.evaluator.evaluate(players)
+        self.evaluations += 1
+        for listener in self.listeners:
+            listener(players)
+
+    def finish(self) -> None:
+        """Evaluate any Players still queued and shut down the evaluator."""
+
+        if self.queue:
+            self.generation_size = None
+            self.flush()
+
+        close = getattr(self.evaluator, 'close', None)
+        if close is not None:
+            close()
+
+    def __call__(self, pacman: Player) -> Player:
+        pacman.evaluation = self.evaluations
+        pacman.pending_evaluation = self
+        self.queue.append(pacman)
+        return pacman
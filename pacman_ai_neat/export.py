@@ -0,0 +1,186 @@
+import os
+import time
+from itertools import batched
+from multiprocessing import Pool
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+import pygame
+
+from neat.genome import Genome
+from neat.settings import settings_handler
+
+from pacman_ai_neat.phase import Phase
+from pacman_ai_neat.playback import Playback
+from pacman_ai_neat.playback_player import PlaybackPlayer
+from pacman_ai_neat.settings import settings, export_settings
+
+try:
+    from PIL import GifImagePlugin, Image
+except ImportError:
+    Image = None
+
+
+# A frame as its RGB pixels and size
+Frame = tuple[bytes, tuple[int, int]]
+
+
+def _encode_png(frame: tuple[bytes, tuple[int, int], str]) -> None:
+    """Save the frame as a PNG at the given path."""
+
+    pixels, size, path = frame
+    pygame.image.save(pygame.image.frombytes(pixels, size, 'RGB'), path)
+
+
+def _web_palette_image(pixels: bytes, size: tuple[int, int]) -> 'Image.Image':
+    """Return the RGB pixels as an image in the web palette, which every GIF frame shares."""
+
+    return Image.frombytes('RGB', size, pixels).convert('P', palette=Image.Palette.WEB, dither=Image.Dither.NONE)
+
+
+def _encode_gif_frame(frame: tuple[bytes, tuple[int, int], int]) -> bytes:
+    """Return the frame as GIF image data in the web palette, shown for the given number of milliseconds."""
+
+    pixels, size, duration = frame
+    return b''.join(GifImagePlugin.getdata(_web_palette_image(pixels, size), duration=duration))
+
+
+def write_gif(file: BinaryIO, size: tuple[int, int], frames: Iterable[bytes]) -> int:
+    """Write an animated GIF of the given size that loops forever, made of the given GIF image data, to the
+    file and return the number of frames."""
+
+    header, _ = GifImagePlugin.getheader(_web_palette_image(bytes(3 * size[0] * size[1]), size), info={'loop': 0})
+    file.writelines(header)
+    count = 0
+    for image_data in frames:
+        file.write(image_data)
+        count += 1
+    file.write(b';')
+
+    return count
+
+
+class ExportPlayback(Playback):
+    """A Playback that shows the seed being played in place of the frame rates."""
+
+    @property
+    def stats(self) -> list[tuple[str, str, tuple[float, float]]]:
+        return [
+            (f'Gen: {self.generation}', 'topleft', (self.tile_size, 0.5 * self.tile_size)),
+            (f'Species: {self.species_no + 1}', 'topleft', (self.tile_size, 1.5 * self.tile_size)),
+            (f'Seed: {self.seed}', 'topright', (29 * self.tile_size, 0.5 * self.tile_size)),
+        ]
+
+
+class Exporter:
+    """Plays one episode of a saved Genome with a given random seed without a window and writes it to an
+    animated GIF or a folder of PNGs.
+
+    Frames are rendered by a Playback on SDL's dummy video driver as fast as they can be simulated, with
+    no clock throttling, and no Genomes are loaded in the background. They are encoded in batches by a
+    pool of worker processes while the next batch is rendered, and each batch is written out as soon as
+    it is encoded, so only two batches of frames are held at once. GIF frames are encoded by Pillow (which
+    must be installed to export a GIF) and all share the web palette, so they can be written after one
+    global header.
+
+    The Genome must be saved at <playback folder>/<phase>/<generation>/<species_no>/<number>.pickle.
+    """
+
+    def __init__(self, genome_path: Path = Path(export_settings['genome']), seed: int = export_settings['seed']) -> None:
+
+        # Render without opening a window
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
+        phase = Phase[genome_path.parents[2].name.upper()]
+        player_args = settings_handler(settings, silent=True)['player_args']
+        self.playback = ExportPlayback(
+            str(genome_path.parents[2]), PlaybackPlayer, player_args, phase, seed=seed, prefetch=False
+        )
+        self.playback.generation = int(genome_path.parents[1].name)
+        self.playback.species_no = int(genome_path.parent.name)
+        self.playback.pacman.genome = Genome.load(genome_path)
+        self.playback.new_episode()
+
+        self.frame_step = export_settings['frame_step']
+        self.max_frames = export_settings['max_frames']
+        width, height = self.playback.screen.get_size()
+        self.size = (round(export_settings['scale'] * width), round(export_settings['scale'] * height))
+        self.processes = export_settings['processes'] or os.cpu_count()
+        self.batch_size = 16 * self.processes
+
+    def frames(self) -> Iterable[Frame]:
+        """Play the episode, yielding every frame_step'th frame and the last one."""
+
+        playback = self.playback
+        screen_size = playback.screen.get_size()
+        while True:
+
+            over = playback.episode_over or playback.frame >= self.max_frames
+            if playback.frame % self.frame_step == 0 or over:
+                playback.update_screen()
+                surface = playback.screen
+                if self.size != screen_size:
+                    surface = pygame.transform.smoothscale(surface, self.size)
+                yield pygame.image.tobytes(surface, 'RGB'), self.size
+
+            if over:
+                return
+            playback.step()
+
+    def encode(self, encoder: Callable, frames: Iterable) -> Iterator:
+        """Encode the frames with the given function in the worker pool, yielding the results in order."""
+
+        with Pool(self.processes) as pool:
+            pending = None
+            for batch in batched(frames, self.batch_size):
+                if pending is not None:
+                    yield from pending.get()
+                pending = pool.map_async(encoder, batch)
+            if pending is not None:
+                yield from pending.get()
+
+    def export_png(self, folder: Path) -> int:
+        """Write every frame to the folder as a numbered PNG and return the number of frames."""
+
+        folder.mkdir(parents=True, exist_ok=True)
+        frames = (
+            (pixels, size, str(folder / f'{i:05d}.png')) for i, (pixels, size) in enumerate(self.frames())
+        )
+        return sum(1 for _ in self.encode(_encode_png, frames))
+
+    def export_gif(self, path: Path) -> int:
+        """Write the frames to an animated GIF at the path as they are encoded and return the number of
+        frames."""
+
+        if Image is None:
+            raise Exception('Exporting a GIF needs Pillow, install it with poetry install --extras gif')
+
+        duration = round(1000 * self.frame_step / self.playback.base_speed)
+        frames = ((pixels, size, duration) for pixels, size in self.frames())
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as file:
+            return write_gif(file, self.size, self.encode(_encode_gif_frame, frames))
+
+    def export(self, output: Path = Path(export_settings['output'])) -> None:
+        """Write the episode to output and print how long it took."""
+
+        start = time.perf_counter()
+        if output.suffix.lower() == '.gif':
+            count = self.export_gif(output)
+        else:
+            count = self.export_png(output)
+        elapsed = time.perf_counter() - start
+
+        print(
+            f'Exported {count} frames ({self.playback.frame} frames played, {self.playback.pacman.score} points) '
+            f'to {output} in {elapsed:.1f}s'
+        )
+
+
+def export() -> None:
+    Exporter().export()
+
+
+if __name__ == '__main__':
+    export()
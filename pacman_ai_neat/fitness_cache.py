@@ -0,0 +1,167 @@
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable
+
+from pacman_ai_neat.phase import Phase
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.policy import PolicyTable, genome_digest
+from pacman_ai_neat.settings import simulation_settings, vision_settings
+
+
+# The most keys looked up in one query
+QUERY_SIZE = 500
+
+
+class FitnessCache:
+    """A record of the results of simulating Genomes, saved to disk.
+
+    Holds at most max_size results, forgetting the least recently used ones first. Nothing is written to
+    disk until commit is called, which CachedEvaluator does once a generation. Safe to share between
+    processes.
+    """
+
+    def __init__(self, path: Path, max_size: int) -> None:
+        self.path = path
+        self.max_size = max_size
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Return this process's connection to the database, creating the table if needed."""
+
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, fitness REAL, score INTEGER, lifespan INTEGER, last_used REAL)'
+            )
+            self._connection.commit()
+        return self._connection
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, tuple[float, int, int]]:
+        """Return the fitness, score and lifespan recorded for each of the given keys that has them.
+
+        The results are marked as used, which is written with the next commit.
+        """
+
+        keys = list(keys)
+        results = {}
+        for start in range(0, len(keys), QUERY_SIZE):
+            batch = keys[start:start + QUERY_SIZE]
+            placeholders = ', '.join('?' * len(batch))
+            rows = self.connection.execute(
+                f'SELECT key, fitness, score, lifespan FROM results WHERE key IN ({placeholders})', batch
+            ).fetchall()
+            results.update((key, (fitness, score, lifespan)) for key, fitness, score, lifespan in rows)
+
+        now = time.time()
+        self.connection.executemany('UPDATE results SET last_used = ? WHERE key = ?', ((now, key) for key in results))
+        return results
+
+    def put_many(self, results: dict[str, tuple[float, int, int]]) -> None:
+        """Record the fitness, score and lifespan for each of the given keys."""
+
+        now = time.time()
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+            ((key, fitness, score, lifespan, now) for key, (fitness, score, lifespan) in results.items()),
+        )
+
+    def commit(self) -> None:
+        """Forget the least recently used results if there are too many and write everything to disk."""
+
+        self.connection.execute(
+            'DELETE FROM results WHERE key IN '
+            '(SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)', (self.max_size,)
+        )
+        self.connection.commit()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
+
+
+class CachedEvaluator:
+    """Wraps the evaluator of a deterministic phase so each distinct Genome is only simulated once.
+
+    Results are keyed by the Genome's content, the phase and the only settings that can change the
+    results: the limits on famine and standing still and how far PacMan sees. Settings that only change
+    how fast a simulation runs share results. Each generation looks up every key in one query, evaluates
+    one Player for each key that isn't recorded (Players with the same key share its results) and records
+    the new results in one commit. Every Player's cache_hits and cache_misses are set to the number of
+    Players of the generation whose results were recalled and simulated.
+    """
+
+    def __init__(self, evaluator: object, phase: Phase, cache: FitnessCache) -> None:
+        self.evaluator = evaluator
+        self.phase = phase
+        self.cache = cache
+        self.context = repr((
+            phase.name,
+            simulation_settings['max_famine_count'],
+            simulation_settings['max_stationary_count'],
+            vision_settings['ray_length'],
+            vision_settings['ordinal_size'],
+        ))
+
+    def genome_key(self, pacman: Player) -> str:
+        """Return a key for the given Player's Genome."""
+
+        return genome_digest(pacman.genome)
+
+    def key(self, pacman: Player) -> str:
+        """Return the key of the given Player's results."""
+
+        return self.genome_key(pacman) + hashlib.sha256(self.context.encode()).hexdigest()
+
+    def evaluate(self, players: list[Player]) -> list[Player]:
+        """Evaluate all the given Players, recalling the results of any that have been seen before, and
+        return them."""
+
+        keys = [self.key(pacman) for pacman in players]
+        recalled = self.cache.get_many(set(keys))
+
+        # Evaluate the first Player with each key that isn't recorded
+        simulated: dict[str, Player] = {}
+        for pacman, key in zip(players, keys):
+            if key not in recalled:
+                simulated.setdefault(key, pacman)
+        self.evaluator.evaluate(list(simulated.values()))
+
+        results = {key: (pacman.fitness, pacman.score, pacman.lifespan) for key, pacman in simulated.items()}
+        self.cache.put_many(results)
+        self.cache.commit()
+
+        hits = len(players) - len(simulated)
+        for pacman, key in zip(players, keys):
+            if simulated.get(key) is not pacman:
+                pacman.fitness, pacman.score, pacman.lifespan = recalled[key] if key in recalled else results[key]
+            pacman.cache_hits = hits
+            pacman.cache_misses = len(simulated)
+
+        return players
+
+    def close(self) -> None:
+        """Shut down the wrapped evaluator if it needs it."""
+
+        close = getattr(self.evaluator, 'close', None)
+        if close is not None:
+            close()
+
+
+class PolicyCachedEvaluator(CachedEvaluator):
+    """A CachedEvaluator that keys results by the Genome's choices over every vision PacMan can have in
+    the phase, rather than by its content.
+
+    Genomes that only differ in ways that never change PacMan's moves then share their results. The
+    PolicyTable compiled for the key is kept by the Player so a simulation costs no more propagations.
+    """
+
+    def genome_key(self, pacman: Player) -> str:
+        if pacman.policy_table is None or not pacman.policy_table.is_for(pacman.genome):
+            pacman.policy_table = PolicyTable(pacman.genome)
+        return pacman.policy_table.fingerprint(self.phase.vision_space)
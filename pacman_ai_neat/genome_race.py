@@ -0,0 +1,210 @@
+import hashlib
+import math
+import os
+import sqlite3
+from collections import OrderedDict
+from multiprocessing import Pool
+from pathlib import Path
+from statistics import NormalDist, fmean, stdev
+
+from neat.genome import Genome
+
+from pacman_ai_neat.policy import genome_digest
+from pacman_ai_neat.settings import race_settings, vision_settings
+from pacman_ai_neat.win_finder import WinFinder
+
+
+# The most WinFinders each worker process keeps
+MAX_WIN_FINDERS = 8
+
+
+# The WinFinders kept by each worker process for the Genomes it has been sent most recently
+_win_finders: OrderedDict[Path, WinFinder] = OrderedDict()
+
+
+def _play_seeds(task: tuple[Path, tuple[int, ...]]) -> tuple[Path, list[tuple[int, int]]]:
+    """Play the given seeds with the given Genome and return the Genome with the PacDots eaten for
+    each seed."""
+
+    genome_path, seeds = task
+    if genome_path in _win_finders:
+        _win_finders.move_to_end(genome_path)
+    else:
+        _win_finders[genome_path] = WinFinder(genome_path)
+        if len(_win_finders) > MAX_WIN_FINDERS:
+            _win_finders.popitem(last=False)
+
+    win_finder = _win_finders[genome_path]
+    return genome_path, [(seed, win_finder.play_seed(seed)) for seed in seeds]
+
+
+class RaceResults:
+    """The number of PacDots eaten in every game played in a GenomeRace, saved to disk."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS games (key TEXT, seed INTEGER, dots_eaten INTEGER, PRIMARY KEY (key, seed))'
+        )
+        self.connection.commit()
+
+    def load(self, key: str) -> dict[int, int]:
+        """Return the PacDots eaten for each seed recorded for the given key."""
+
+        return dict(self.connection.execute('SELECT seed, dots_eaten FROM games WHERE key = ?', (key,)))
+
+    def add(self, key: str, games: list[tuple[int, int]]) -> None:
+        """Record the PacDots eaten for each of the given seeds for the given key."""
+
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO games VALUES (?, ?, ?)', [(key, seed, dots) for seed, dots in games]
+        )
+        self.connection.commit()
+
+
+class Entrant:
+    """A saved Genome in a GenomeRace and the PacDots it has eaten for each seed.
+
+    The estimates only count the seeds below a given number, so that Genomes are compared on the same
+    seeds even if more were loaded for some of them.
+    """
+
+    def __init__(self, path: Path, key: str, dots_eaten: dict[int, int]) -> None:
+        self.path = path
+        self.key = key
+        self.dots_eaten = dots_eaten
+        self.eliminated = False
+
+    def games(self, seeds: int) -> list[int]:
+        """Return the PacDots eaten in each game played with a seed below the given number."""
+
+        return [dots for seed, dots in self.dots_eaten.items() if seed < seeds]
+
+    def win_rate(self, z: float, seeds: int) -> tuple[float, float, float]:
+        """Return the proportion of games won with the lower and upper bounds of its Wilson interval."""
+
+        games = self.games(seeds)
+        n = len(games)
+        if n == 0:
+            return 0, 0, 1
+
+        p = sum(dots == 244 for dots in games) / n
+        denominator = 1 + z**2 / n
+        centre = (p + z**2 / (2 * n)) / denominator
+        half_width = z * math.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / denominator
+        return p, max(0, centre - half_width), min(1, centre + half_width)
+
+    def mean_dots_eaten(self, z: float, seeds: int) -> tuple[float, float, float]:
+        """Return the mean number of PacDots eaten with the lower and upper bounds of its confidence
+        interval."""
+
+        games = self.games(seeds)
+        n = len(games)
+        if n < 2:
+            return (fmean(games) if n else 0), 0, 244
+
+        mean = fmean(games)
+        half_width = z * stdev(games) / math.sqrt(n)
+        return mean, max(0, mean - half_width), min(244, mean + half_width)
+
+    def estimate(self, metric: str, z: float, seeds: int) -> tuple[float, float, float]:
+        """Return the given metric with the lower and upper bounds of its confidence interval."""
+
+        match(metric):
+            case 'dots_eaten':
+                return self.mean_dots_eaten(z, seeds)
+            case 'win_rate':
+                return self.win_rate(z, seeds)
+            case _:
+                raise Exception(f'Invalid metric {metric}')
+
+
+class GenomeRace:
+    """Estimates the win rate and mean PacDots eaten in the full game of every Genome saved under a folder,
+    to choose which is best.
+
+    Every Genome plays the same seeds in rounds, and Genomes are only compared on the seeds of the rounds
+    played so far. After each round any Genome whose confidence interval lies wholly below the leader's
+    is dropped, so poor Genomes stop using up games early. Games are played
+    by WinFinders in a pool of worker processes, and their results are saved by Genome content so running
+    the race again only plays seeds that haven't already been played.
+    """
+
+    def __init__(self, folder: Path = Path(race_settings['folder'])) -> None:
+        self.folder = folder
+        self.metric = race_settings['metric']
+        self.z = NormalDist().inv_cdf((1 + race_settings['confidence']) / 2)
+        self.processes = race_settings['processes'] or os.cpu_count()
+        self.results = RaceResults(Path(race_settings['results']))
+        self.seeds = 0
+
+        # Results are only reused if PacMan sees the same way
+        context = hashlib.sha256(repr(sorted(vision_settings.items())).encode()).hexdigest()
+        self.entrants: list[Entrant] = []
+        for path in sorted(folder.rglob('*.pickle')):
+            key = genome_digest(Genome.load(path)) + context
+            self.entrants.append(Entrant(path, key, self.results.load(key)))
+
+    def play_round(self, seeds: int) -> None:
+        """Play every seed below the given number that hasn't been played by each remaining Genome."""
+
+        chunk_size = max(1, race_settings['seeds_per_round'] // 4)
+        tasks = []
+        for entrant in self.entrants:
+            if entrant.eliminated:
+                continue
+            missing = [seed for seed in range(seeds) if seed not in entrant.dots_eaten]
+            tasks.extend((entrant.path, tuple(missing[i:i + chunk_size])) for i in range(0, len(missing), chunk_size))
+
+        entrants = {entrant.path: entrant for entrant in self.entrants}
+        for path, games in self.pool.imap_unordered(_play_seeds, tasks):
+            entrants[path].dots_eaten.update(games)
+            self.results.add(entrants[path].key, games)
+
+    def eliminate(self) -> None:
+        """Drop every Genome that is clearly worse than the leader."""
+
+        remaining = [entrant for entrant in self.entrants if not entrant.eliminated]
+        estimates = {entrant.path: entrant.estimate(self.metric, self.z, self.seeds) for entrant in remaining}
+        leader = max(remaining, key = lambda entrant: estimates[entrant.path][0])
+        for entrant in remaining:
+            if estimates[entrant.path][2] < estimates[leader.path][1]:
+                entrant.eliminated = True
+
+    def print_table(self) -> None:
+        """Print the estimates of every Genome, best first."""
+
+        print(f'{"genome":<40} | {"games":>6} | {"win rate":>22} | {"dots eaten":>22} |')
+        for entrant in sorted(self.entrants, key = lambda entrant: -entrant.estimate(self.metric, self.z, self.seeds)[0]):
+            win_rate, win_rate_low, win_rate_high = entrant.win_rate(self.z, self.seeds)
+            dots, dots_low, dots_high = entrant.mean_dots_eaten(self.z, self.seeds)
+            print(
+                f'{str(entrant.path):<40} | {len(entrant.games(self.seeds)):>6} | '
+                f'{win_rate:>6.4f} [{win_rate_low:.4f}, {win_rate_high:.4f}] | '
+                f'{dots:>6.1f} [{dots_low:>5.1f}, {dots_high:>5.1f}] | '
+                f'{"dropped" if entrant.eliminated else ""}'
+            )
+        print()
+
+    def run(self) -> None:
+        """Play rounds until one Genome remains or the remaining Genomes have played every seed."""
+
+        if not self.entrants:
+            raise Exception(f'No saved Genomes found in {self.folder}')
+
+        self.seeds = 0
+        with Pool(self.processes) as self.pool:
+            while self.seeds < race_settings['max_seeds']:
+                self.seeds = min(self.seeds + race_settings['seeds_per_round'], race_settings['max_seeds'])
+                self.play_round(self.seeds)
+                self.eliminate()
+                print(f'Round of {self.seeds} seeds:')
+                self.print_table()
+
+                if sum(not entrant.eliminated for entrant in self.entrants) == 1:
+                    break
+
+
+if __name__ == '__main__':
+    GenomeRace().run()
@@ -0,0 +1,270 @@
+from typing import Hashable, Iterable
+
+import numpy as np
+from pacman_app import PacDots
+
+from pacman_ai_neat.network import NetworkBatch
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.policy import DOTS_CARDINAL_VALUES, genome_digest
+from pacman_ai_neat.settings import simulation_settings
+from pacman_ai_neat.snapshot import PacManState
+from pacman_ai_neat.state import freeze_attributes
+from pacman_ai_neat.vision import sight_line
+
+
+# What PacMan sees in a cardinal direction in Phase.ONLY_DOTS, as indices of DOTS_CARDINAL_VALUES
+WALL, CLEAR, DOT = range(3)
+# The place value of each cardinal input in the number of a vision (its inputs as base 3 digits)
+PLACE_VALUES = np.array([3 ** i for i in range(4)])
+# Every vision of Phase.ONLY_DOTS, in order of its number
+DOTS_VISIONS = np.array([
+    [DOTS_CARDINAL_VALUES[number // 3 ** j % 3] for j in range(4)] + [0] * 4 for number in range(3 ** 4)
+], dtype=float)
+# The number of PacDots held in each word of a game's PacDot mask
+WORD_SIZE = 64
+
+
+class MovementTable:
+    """Every state of PacMan's movement reached so far in Phase.ONLY_DOTS, numbered, along with the state
+    each move leads to, the PacDot eaten on arriving in it and what PacMan sees from it.
+
+    States are found by putting a probe Player into them and calling move, so nothing of pacman_app's
+    movement rules is assumed beyond PacMan's moves depending only on his own attributes. The table is
+    filled in as games reach new states, and kept from one generation to the next.
+    """
+
+    def __init__(self) -> None:
+        self.probe = Player({})
+        self.probe.initialise()
+        self.exclude = self.probe.transient_attributes | {'score'}
+
+        # PowerDots are never eaten in Phase.ONLY_DOTS so are seen from the same states every game
+        pacdots = PacDots()
+        self.dot_tiles = frozenset(pacdots.dots)
+        self.dot_index = {tile: i for i, tile in enumerate(sorted(pacdots.dots))}
+        self.power_dots = frozenset(pacdots.power_dots)
+        self.word_count = -(-len(self.dot_index) // WORD_SIZE)
+
+        self.states: list[PacManState] = []
+        self.numbers: dict[Hashable, int] = {}
+        self.tiles: dict[tuple[int,int], int] = {}
+
+        # The arrays are indexed by state, with -1 for anything not worked out yet
+        self.next_state = np.full((0, 4), -1, dtype=np.int32)
+        self.fed_state = np.full(0, -1, dtype=np.int32)
+        self.eats = np.full(0, -1, dtype=np.int32)
+        self.tile = np.zeros(0, dtype=np.int32)
+        self.sight = np.zeros((0, 4), dtype=np.int8)
+        self.sight_mask = np.zeros((0, 4, self.word_count), dtype=np.uint64)
+
+        self.start = self.add()
+
+    @property
+    def full_mask(self) -> np.ndarray:
+        """Return the PacDot mask of a game in which no PacDots have been eaten."""
+
+        return dots_mask(range(len(self.dot_index)), self.word_count)
+
+    def grow(self) -> None:
+        """Double the number of states the arrays can hold."""
+
+        extra = max(1024, len(self.tile))
+        self.next_state = np.concatenate([self.next_state, np.full((extra, 4), -1, dtype=np.int32)])
+        self.fed_state = np.concatenate([self.fed_state, np.full(extra, -1, dtype=np.int32)])
+        self.eats = np.concatenate([self.eats, np.full(extra, -1, dtype=np.int32)])
+        self.tile = np.concatenate([self.tile, np.zeros(extra, dtype=np.int32)])
+        self.sight = np.concatenate([self.sight, np.zeros((extra, 4), dtype=np.int8)])
+        self.sight_mask = np.concatenate([self.sight_mask, np.zeros((extra, 4, self.word_count), dtype=np.uint64)])
+
+    def add(self) -> int:
+        """Return the number of the probe's state, adding the state to the table if it is new."""
+
+        probe = self.probe
+        key = freeze_attributes(probe, {}, self.exclude)
+        if key in self.numbers:
+            return self.numbers[key]
+
+        state = self.numbers[key] = len(self.states)
+        self.states.append(PacManState(probe))
+        if state == len(self.tile):
+            self.grow()
+
+        tile = probe.position.tile_pos
+        self.tile[state] = self.tiles.setdefault(tile, len(self.tiles))
+
+        # Find the PacDot eaten on arriving here (if any) by letting the probe eat from a full set
+        pacdots = PacDots()
+        if pacdots.check_if_eaten(probe):
+            (eaten,) = self.dot_tiles - pacdots.dots
+            self.eats[state] = self.dot_index[eaten]
+
+        # Look as Player.look_in_direction does, but leave the PacDots to be checked against each game
+        for i, direction in enumerate(probe.perspective):
+            if not probe.can_move_in_direction(direction):
+                self.sight[state, i] = WALL
+                continue
+
+            tiles, leaves_maze = sight_line(tile, direction)
+            if leaves_maze:
+                self.sight[state, i] = CLEAR
+                continue
+
+            self.sight[state, i] = DOT if self.power_dots.intersection(tiles) else CLEAR
+            self.sight_mask[state, i] = dots_mask(
+                (self.dot_index[tile] for tile in tiles if tile in self.dot_index), self.word_count
+            )
+
+        return state
+
+    def moved(self, states: np.ndarray, choices: np.ndarray) -> np.ndarray:
+        """Return the states reached by moving in the given directions of PacMan's perspective from the
+        given states."""
+
+        next_states = self.next_state[states, choices]
+        unknown = next_states < 0
+        if unknown.any():
+            for state, choice in set(zip(states[unknown].tolist(), choices[unknown].tolist())):
+                self.states[state].restore(self.probe)
+                self.probe.move(self.probe.perspective[choice])
+                self.next_state[state, choice] = self.add()
+            next_states = self.next_state[states, choices]
+
+        return next_states
+
+    def fed(self, states: np.ndarray) -> np.ndarray:
+        """Return the given states after PacMan has eaten a PacDot in them (and so won't move next frame)."""
+
+        fed_states = self.fed_state[states]
+        unknown = fed_states < 0
+        if unknown.any():
+            for state in set(states[unknown].tolist()):
+                self.states[state].restore(self.probe)
+                self.probe.move_next = False
+                self.fed_state[state] = self.add()
+            fed_states = self.fed_state[states]
+
+        return fed_states
+
+
+def dots_mask(indices: Iterable[int], word_count: int) -> np.ndarray:
+    """Return the PacDot mask with the bits of the PacDots with the given indices set."""
+
+    mask = [0] * word_count
+    for i in indices:
+        mask[i // WORD_SIZE] |= 1 << (i % WORD_SIZE)
+    return np.array(mask, dtype=np.uint64)
+
+
+class LockstepSimulator:
+    """Advances every game of a generation together, one frame at a time, in Phase.ONLY_DOTS.
+
+    The game is held as arrays with an entry for each game: PacMan's state in a MovementTable, the
+    remaining PacDots as a bitmask, the score and only_dots' counters. Each frame looks, thinks, moves,
+    eats and ends games for all live games at once with array operations:
+    - vision is the sight from each PacMan's state, with DOT wherever the game's PacDot mask meets the
+      state's sight mask, coded as a number in base 3
+    - thinking looks each vision up in an array of each distinct Genome's choice for every vision,
+      worked out before the first frame by propagating every vision through a NetworkBatch of the
+      distinct Genomes
+    - moving and eating look up the MovementTable
+
+    Assigns the fitness that only_dots would, unless two of a Genome's outputs are equal up to rounding
+    (NetworkBatch adds the weighted values in a different order to Genome.propagate). Cycle detection
+    isn't used since it never changes the results, and only the results (not PacMan's position) are set
+    on the Players.
+    """
+
+    def __init__(self) -> None:
+        self.table: MovementTable | None = None
+
+    def evaluate(self, players: list[Player]) -> list[Player]:
+        """Simulate all the given Players in Phase.ONLY_DOTS, setting their results in place and returning
+        them."""
+
+        if not players:
+            return players
+
+        if self.table is None:
+            self.table = MovementTable()
+        table = self.table
+
+        for pacman in players:
+            pacman.initialise()
+            pacman.prepare()
+
+        # Each distinct Genome's choice for each vision
+        distinct = []
+        digests: dict[str, int] = {}
+        genome = np.empty(len(players), dtype=np.int32)
+        for i, pacman in enumerate(players):
+            genome[i] = digests.setdefault(genome_digest(pacman.genome), len(distinct))
+            if genome[i] == len(distinct):
+                distinct.append(pacman.genome)
+        choices = NetworkBatch(distinct).choose(DOTS_VISIONS)
+
+        # The state of each game
+        game_count = len(players)
+        state = np.full(game_count, table.start, dtype=np.int32)
+        pacdots = np.tile(table.full_mask, (game_count, 1))
+        used = np.array([pacman.used_inputs[:4] for pacman in players], dtype=bool)
+        score = np.array([pacman.score for pacman in players], dtype=np.int64)
+        lifespan = np.zeros(game_count, dtype=np.int64)
+        famine_count = np.zeros(game_count, dtype=np.int64)
+        stationary_count = np.zeros(game_count, dtype=np.int64)
+        prev_tile = np.full(game_count, table.tile[table.start], dtype=np.int32)
+
+        # Run all games until PacMan eats all Dots or takes too long to do so
+        MAX_FAMINE_COUNT = simulation_settings['max_famine_count']
+        MAX_STATIONARY_COUNT = simulation_settings['max_stationary_count']
+        live = np.arange(game_count)
+        while live.size:
+
+            # Look, leaving out the inputs that can't change the choice
+            states = state[live]
+            sees_dots = (table.sight_mask[states] & pacdots[live, None, :]).any(axis=2)
+            vision = np.where(used[live], np.where(sees_dots, DOT, table.sight[states]), CLEAR)
+            visions = vision @ PLACE_VALUES
+
+            # Think
+            moves = choices[genome[live], visions]
+
+            # Move
+            states = table.moved(states, moves)
+            lifespan[live] += 1
+
+            # Update score/famine_count
+            eats = table.eats[states]
+            word = np.maximum(eats, 0) // WORD_SIZE
+            bit = np.left_shift(np.uint64(1), (np.maximum(eats, 0) % WORD_SIZE).astype(np.uint64))
+            eaten = (eats >= 0) & (pacdots[live, word] & bit != 0)
+            pacdots[live[eaten], word[eaten]] ^= bit[eaten]
+            score[live] += 10 * eaten
+            famine_count[live] = np.where(eaten, 0, famine_count[live] + 1)
+            if eaten.any():
+                states[eaten] = table.fed(states[eaten])
+
+            # Update stationary_count
+            tiles = table.tile[states]
+            stationary_count[live] = np.where(tiles == prev_tile[live], stationary_count[live] + 1, 0)
+            prev_tile[live] = tiles
+            state[live] = states
+
+            live = live[
+                (famine_count[live] < MAX_FAMINE_COUNT)
+                & (stationary_count[live] < MAX_STATIONARY_COUNT)
+                & (score[live] < 2000)
+            ]
+
+        # Alter lifespans to be true lifespan
+        lifespan -= np.where(
+            famine_count == MAX_FAMINE_COUNT,
+            MAX_FAMINE_COUNT,
+            np.where(stationary_count == MAX_STATIONARY_COUNT, MAX_STATIONARY_COUNT, 0),
+        )
+
+        for i, pacman in enumerate(players):
+            pacman.score = int(score[i])
+            pacman.lifespan = int(lifespan[i])
+            pacman.fitness = (pacman.score // 10) ** 4 / (pacman.lifespan + 1000)
+
+        return players
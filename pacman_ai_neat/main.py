@@ -1,9 +1,19 @@
+from pathlib import Path
+
 import neat
 
 from pacman_ai_neat.player import Player
 from pacman_ai_neat.phase import Phase
 from pacman_ai_neat.phase_transition import phase_transition
-from pacman_ai_neat.settings import settings
+from pacman_ai_neat.fitness_cache import FitnessCache, CachedEvaluator, PolicyCachedEvaluator
+from pacman_ai_neat.episodes import EpisodeSimulator, AdaptiveEpisodeEvaluator
+from pacman_ai_neat.evaluator import SerialEvaluator, ParallelEvaluator, BatchedSimulator
+from pacman_ai_neat.lockstep import LockstepSimulator
+from pacman_ai_neat.prefix_sharing import PrefixSharingSimulator
+from pacman_ai_neat.successive_halving import SuccessiveHalvingEvaluator
+from pacman_ai_neat.trajectory import RecordingSimulator, TrajectoryRecorder, TrajectoryStore, store_path
+from pacman_ai_neat.warm_start import WarmStartSimulator
+from pacman_ai_neat.settings import settings, simulation_settings
 
 
 def main() -> None:
@@ -22,11 +32,89 @@ def main() -> None:
     else:
         settings['playback_settings']['save_folder'] = f'playback/{phase.name.lower()}'
 
+    # Report how many looks and thinks were skipped
+    if simulation_settings['decision_points_only']:
+        settings['progress_settings']['averages'] = [*(settings['progress_settings']['averages'] or []), 'skipped_decisions']
+
+    # Record the moves of each Genome so Playback can replay the saved ones
+    simulate = phase.simulator_function
+    recorder = None
+    if simulation_settings['record_trajectories'] and not simulation_settings['warm_start_fraction']:
+        save_folder = settings['playback_settings']['save_folder']
+        recorder = TrajectoryRecorder(TrajectoryStore(store_path(save_folder)), save_folder)
+        simulate = RecordingSimulator(simulate)
+
+    # Start some episodes near the end of the game
+    if simulation_settings['warm_start_fraction']:
+        simulate = WarmStartSimulator(simulate)
+
+    # Take the fitness over several episodes if there are Ghosts
+    if simulation_settings['episodes'] > 1 and not phase.deterministic:
+        if simulation_settings['evaluator'] != 'adaptive_episodes':
+            simulate = EpisodeSimulator(simulate)
+        settings['progress_settings']['averages'] = [*(settings['progress_settings']['averages'] or []), 'mean_score']
+
+    # Evaluate each generation as a whole
+    match(simulation_settings['evaluator']):
+        case None:
+            evaluator = SerialEvaluator(simulate)
+        case 'parallel':
+            evaluator = ParallelEvaluator(simulate)
+        case 'lockstep':
+            if phase is not Phase.ONLY_DOTS:
+                raise Exception('The lockstep evaluator can only be used in Phase.ONLY_DOTS')
+            evaluator = LockstepSimulator()
+        case 'prefix_sharing':
+            if phase is not Phase.ONLY_DOTS:
+                raise Exception('The prefix_sharing evaluator can only be used in Phase.ONLY_DOTS')
+            evaluator = PrefixSharingSimulator()
+            settings['progress_settings']['averages'] = [*(settings['progress_settings']['averages'] or []), 'sharing_ratio']
+        case 'adaptive_episodes':
+            if phase.deterministic:
+                raise Exception('The adaptive_episodes evaluator can only be used in phases with Ghosts')
+            evaluator = AdaptiveEpisodeEvaluator(simulate)
+        case 'successive_halving':
+            if simulate is not phase.simulator_function:
+                raise Exception('The successive_halving evaluator can\'t be used with episodes, warm starts or recorded trajectories')
+            evaluator = SuccessiveHalvingEvaluator(simulate)
+        case name:
+            raise Exception(f'Invalid evaluator {name}')
+
+    # Remember the results of Genomes that have already been simulated if possible (not the fitness of Players
+    # left behind by successive halving, which depends on the rest of the generation)
+    if (
+        simulation_settings['fitness_cache']
+        and phase.deterministic
+        and not simulation_settings['warm_start_fraction']
+        and simulation_settings['evaluator'] != 'successive_halving'
+    ):
+        cache_path = Path(settings['population_settings']['save_folder']).parent / 'fitness_cache.sqlite'
+        cache = FitnessCache(cache_path, simulation_settings['fitness_cache_size'])
+        match(simulation_settings['fitness_cache_key']):
+            case 'genome':
+                evaluator = CachedEvaluator(evaluator, phase, cache)
+            case 'policy':
+                evaluator = PolicyCachedEvaluator(evaluator, phase, cache)
+            case key:
+                raise Exception(f'Invalid fitness_cache_key {key}')
+        settings['progress_settings']['averages'] = [
+            *(settings['progress_settings']['averages'] or []), 'cache_hits', 'cache_misses'
+        ]
+
+    # neat.run calls simulate with one Player at a time, so each generation is queued and evaluated as a
+    # whole once neat first reads a fitness (see BatchedSimulator)
+    simulate = BatchedSimulator(evaluator, settings['population_settings']['size'])
+    if recorder is not None:
+        simulate.listeners.append(recorder)
+
     neat.run(
         PlayerClass=Player,
-        simulate=phase.simulator_function,
+        simulate=simulate,
         settings=settings,
     )
+    simulate.finish()
+    if recorder is not None:
+        recorder.store_saved()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,130 @@
+from typing import Callable, Iterable
+
+import numpy as np
+from neat.genome import Genome
+
+from pacman_ai_neat.policy import PolicyTable
+from pacman_ai_neat.settings import genome_settings
+
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-x))
+
+
+def relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0)
+
+
+def linear(x: np.ndarray) -> np.ndarray:
+    return x
+
+
+ACTIVATIONS: dict[str, Callable[[np.ndarray], np.ndarray]] = {'sigmoid': sigmoid, 'relu': relu, 'linear': linear}
+
+# The most Genomes propagated together by compile_tables, to bound the size of the arrays
+BATCH_SIZE = 64
+
+
+class LayeredNetwork:
+    """A Genome compiled into a fixed plan of layered weight matrices.
+
+    The Nodes are numbered in the order of genome.nodes. The Nodes in layer 0 with ids below
+    genome_settings['input_count'] take the inputs and any other Node in layer 0 is a bias Node, with
+    value 1. The Nodes of each later layer take the activation of the sum of the enabled Connections into
+    them, which for the whole layer is the product of the values of every Node with the matrix of the
+    Connections' weights. The Nodes of the last layer are the outputs and use the sigmoid, while hidden
+    Nodes use genome_settings['hidden_activation']. This is how neat's Genome.propagate computes the
+    outputs, up to the order the weighted values are added in.
+    """
+
+    def __init__(self, genome: Genome) -> None:
+        nodes = genome.nodes
+        column = {node.id: i for i, node in enumerate(nodes)}
+        input_count = genome_settings['input_count']
+
+        self.size = len(nodes)
+        self.layer = np.array([node.layer for node in nodes])
+        self.layer_count = int(self.layer.max()) + 1
+
+        # The values of the Nodes in layer 0 are (inputs @ self.inputs + self.bias)
+        self.inputs = np.zeros((input_count, self.size))
+        self.bias = np.zeros(self.size)
+        for i, node in enumerate(nodes):
+            if node.layer == 0 and node.id < input_count:
+                self.inputs[node.id, i] = 1
+            elif node.layer == 0:
+                self.bias[i] = 1
+
+        self.weights = np.zeros((self.size, self.size))
+        for connection in genome.connections:
+            if connection.enabled:
+                self.weights[column[connection.input.id], column[connection.output.id]] += connection.weight
+
+        self.outputs = np.flatnonzero(self.layer == self.layer_count - 1)
+
+
+class NetworkBatch:
+    """The LayeredNetworks of many Genomes stacked into arrays, so that a batch of visions is propagated
+    through every one of them with one matrix product per layer.
+
+    Networks with fewer Nodes or layers are padded with Nodes that have no Connections and are never
+    updated, which leaves their outputs unchanged, so any Genomes can be stacked together.
+    """
+
+    def __init__(self, genomes: list[Genome]) -> None:
+        networks = [LayeredNetwork(genome) for genome in genomes]
+        size = max(network.size for network in networks)
+        input_count = genome_settings['input_count']
+        output_count = len(networks[0].outputs)
+
+        self.layer_count = max(network.layer_count for network in networks)
+        self.inputs = np.zeros((len(networks), input_count, size))
+        self.bias = np.zeros((len(networks), 1, size))
+        self.weights = np.zeros((len(networks), size, size))
+        self.layer = np.full((len(networks), 1, size), -1)
+        self.is_output = np.zeros((len(networks), 1, size), dtype=bool)
+        self.outputs = np.zeros((len(networks), 1, output_count), dtype=np.intp)
+        for i, network in enumerate(networks):
+            n = network.size
+            self.inputs[i, :, :n] = network.inputs
+            self.bias[i, 0, :n] = network.bias
+            self.weights[i, :n, :n] = network.weights
+            self.layer[i, 0, :n] = network.layer
+            self.is_output[i, 0, network.outputs] = True
+            self.outputs[i, 0] = network.outputs
+
+        self.hidden_activation = ACTIVATIONS[genome_settings['hidden_activation'] or 'sigmoid']
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def propagate(self, visions: np.ndarray) -> np.ndarray:
+        """Return the outputs of every Genome for every vision, as an array indexed by Genome, vision
+        and output."""
+
+        values = visions @ self.inputs + self.bias
+        for layer in range(1, self.layer_count):
+            totals = values @ self.weights
+            activated = np.where(self.is_output, sigmoid(totals), self.hidden_activation(totals))
+            values = np.where(self.layer == layer, activated, values)
+
+        return np.take_along_axis(values, self.outputs, axis=2)
+
+    def choose(self, visions: np.ndarray) -> np.ndarray:
+        """Return the index of the output with highest activation of every Genome for every vision, as an
+        array indexed by Genome and vision."""
+
+        return self.propagate(visions).argmax(axis=2)
+
+
+def compile_tables(tables: list[PolicyTable], visions: Iterable[tuple[float, ...]]) -> None:
+    """Add the given visions to each of the given PolicyTables, propagating them through the tables'
+    Genomes a batch at a time rather than one vision at a time."""
+
+    visions = list(visions)
+    inputs = np.array(visions, dtype=float)
+    for start in range(0, len(tables), BATCH_SIZE):
+        batch = tables[start:start + BATCH_SIZE]
+        choices = NetworkBatch([table.genome for table in batch]).choose(inputs)
+        for table, row in zip(batch, choices.tolist()):
+            table.choices.update(zip(visions, row))
@@ -1,30 +1,62 @@
 from enum import Enum
-from typing import Callable
+from typing import Callable, Iterator
 
 from pacman_ai_neat.simulator import only_dots, dots_and_blinky, dots_and_two_ghosts, dots_and_ghosts, full_game
 from pacman_ai_neat.player import Player
+from pacman_ai_neat.policy import CARDINAL_VALUES, DOTS_CARDINAL_VALUES, DOTS_ORDINAL_VALUES, ORDINAL_VALUES, vision_space
 
 
 class Phase(Enum):
     """Phases of training.
 
     The simulator functions corresponds to the correct simlator function for the phase.
+    The cardinal values are those PacMan's cardinal vision can take in the phase's simulator (there is 
+    no Fruit or frightened Ghosts before Phase.FULL_GAME), and the ordinal values likewise for his
+    ordinal vision (there are no active Ghosts in Phase.ONLY_DOTS).
     """
 
-    ONLY_DOTS = 1, only_dots
-    DOTS_AND_BLINKY = 2, dots_and_blinky
-    DOTS_AND_TWO_GHOSTS = 3, dots_and_two_ghosts
-    DOTS_AND_GHOSTS = 4, dots_and_ghosts
-    FULL_GAME = 5, full_game
+    ONLY_DOTS = 1, only_dots, DOTS_CARDINAL_VALUES, DOTS_ORDINAL_VALUES
+    DOTS_AND_BLINKY = 2, dots_and_blinky, DOTS_CARDINAL_VALUES, ORDINAL_VALUES
+    DOTS_AND_TWO_GHOSTS = 3, dots_and_two_ghosts, DOTS_CARDINAL_VALUES, ORDINAL_VALUES
+    DOTS_AND_GHOSTS = 4, dots_and_ghosts, DOTS_CARDINAL_VALUES, ORDINAL_VALUES
+    FULL_GAME = 5, full_game, CARDINAL_VALUES, ORDINAL_VALUES
 
     def __new__(cls, *args, **kwargs) -> object:
         obj = object.__new__(cls)
         obj._value_ = args[0]
         return obj
     
-    def __init__(self, value: int, simulator_function: Callable[[Player], Player]) -> None:
+    def __init__(
+        self,
+        value: int,
+        simulator_function: Callable[[Player], Player],
+        cardinal_values: tuple[float, ...],
+        ordinal_values: tuple[int, ...],
+    ) -> None:
         self._simulator_function_ = simulator_function
+        self._cardinal_values_ = cardinal_values
+        self._ordinal_values_ = ordinal_values
 
     @property
     def simulator_function(self) -> Callable[[Player], Player]:
-        return self._simulator_function_ 
\ No newline at end of file
+        return self._simulator_function_
+
+    @property
+    def cardinal_values(self) -> tuple[float, ...]:
+        return self._cardinal_values_
+
+    @property
+    def ordinal_values(self) -> tuple[int, ...]:
+        return self._ordinal_values_
+
+    @property
+    def deterministic(self) -> bool:
+        """Return True if the phase's simulator has no randomness (there are no Ghosts to move)."""
+
+        return self is Phase.ONLY_DOTS
+
+    @property
+    def vision_space(self) -> Iterator[tuple[float, ...]]:
+        """Return an iterator over every vision PacMan can have in the phase."""
+
+        return vision_space(self._cardinal_values_, self._ordinal_values_)
@@ -1,18 +1,31 @@
+import random
+import time
+
 import pygame
 
 from pacman_app.background import Background
 from pacman_app import PacMan, PacDots, Ghosts
+from pacman_app.map.direction import Direction
 from pacman_app.sprites import SpriteSheet, BlinkySprite, PinkySprite, InkySprite, ClydeSprite, FruitSprite
 from pacman_app.sprites.letters import Letters
 from pacman_app.sprites.numbers import Numbers
-from pacman_app.pixels import to_pixels
 
 from neat import PlaybackPlayers
 from neat.settings import settings_handler
 
 from pacman_ai_neat.phase import Phase
+from pacman_ai_neat.policy import genome_digest
+from pacman_ai_neat.prefetch import GenomePrefetcher
+from pacman_ai_neat.renderer import Renderer
 from pacman_ai_neat.settings import settings
+from pacman_ai_neat.simulator import full_game_frame
 from pacman_ai_neat.playback_player import PlaybackPlayer
+from pacman_ai_neat.snapshot import GameState
+from pacman_ai_neat.trajectory import MoveLog, TrajectoryStore, store_path
+
+
+# The number of frames between the GameStates kept for seeking
+KEYFRAME_INTERVAL = 300
 
 
 class Playback:
@@ -21,6 +34,15 @@ class Playback:
     Switch between generations with the left and right arrow keys.
     Switch between Species with the up and down arrow keys.
     Slow down up or speed up the playback with the j and k keys.
+    Seek back or forward 5 seconds with the comma and full stop keys.
+    Fast forward to the end of the episode with the f key.
+    Holding a key repeats it, so holding an arrow key scrubs through the generations or Species.
+
+    The Genomes around the one being watched are loaded in the background so that switching is instant.
+    If prefetch is False nothing is loaded in the background and the Genome watched can't be switched.
+
+    If an episode of PacMan's Genome was recorded in training it is replayed from its MoveLog rather than
+    by running the Genome.
     """
 
     def __init__(
@@ -29,33 +51,36 @@ class Playback:
         playback_player: type,
         player_args: dict,
         phase: Phase,
+        trajectories: TrajectoryStore | None = None,
+        seed: int | None = None,
+        prefetch: bool = True,
     ) -> None:
         
         # Set our current Phase
         match(phase):
 
             case Phase.ONLY_DOTS:
-                self.new_episode = self.only_dots_new_episode
+                self.start_episode = self.only_dots_new_episode
                 self.advance = self.only_dots_advance
                 self.update_screen = self.only_dots_update_screen
 
             case Phase.DOTS_AND_BLINKY:
-                self.new_episode = self.dots_and_blinky_new_episode
+                self.start_episode = self.dots_and_blinky_new_episode
                 self.advance = self.dots_and_blinky_advance
                 self.update_screen = self.dots_and_ghosts_update_screen
 
             case Phase.DOTS_AND_TWO_GHOSTS:
-                self.new_episode = self.dots_and_ghosts_new_episode
+                self.start_episode = self.dots_and_ghosts_new_episode
                 self.advance = self.dots_and_blinky_advance
                 self.update_screen = self.dots_and_ghosts_update_screen
 
             case Phase.DOTS_AND_GHOSTS:
-                self.new_episode = self.dots_and_ghosts_new_episode
+                self.start_episode = self.dots_and_ghosts_new_episode
                 self.advance = self.dots_and_ghosts_advance
                 self.update_screen = self.dots_and_ghosts_update_screen
 
             case Phase.FULL_GAME:
-                self.new_episode = self.full_game_new_episode
+                self.start_episode = self.full_game_new_episode
                 self.advance = self.full_game_advance
                 self.update_screen = self.full_game_update_screen
 
@@ -69,8 +94,17 @@ class Playback:
         font_height = int(0.04 * screen_size[1])
         self.stats_font = pygame.font.Font(pygame.font.get_default_font(), int(0.7 * font_height))
         self.clock = pygame.time.Clock()
+        pygame.key.set_repeat(300, 50)
         self.base_speed = 60
         self.speed_multiplier = 1
+        self.fast_forwarding = False
+
+        # Frame rate measurement set up
+        self.sim_fps = 0.0
+        self.render_fps = 0.0
+        self.step_count = 0
+        self.render_count = 0
+        self.measure_start = time.perf_counter()
 
         # Background set up
         self.bg = Background(self.tile_size)
@@ -80,11 +114,22 @@ class Playback:
         self.letters = Letters(spritesheet)
         self.numbers = Numbers(spritesheet)
 
+        # Renderer set up
+        self.renderer = Renderer(
+            self.screen, self.tile_size, self.bg, self.letters, self.numbers, self.stats_font,
+            show_power_dots = phase is Phase.FULL_GAME,
+        )
+
         # PlaybackPlayer set up
         player_args['spritesheet'] = spritesheet
         self.players = PlaybackPlayers(playback_folder, playback_player, player_args)
         if len(list(self.players)) > 1:
             raise Exception('One should not attempt to view playback of more than one PacMan at a time')
+        self.generation = self.players.generation
+        self.species_no = self.players.species_no
+        self.prefetcher = GenomePrefetcher(playback_folder, playback_player, player_args) if prefetch else None
+        if self.prefetcher is not None:
+            self.prefetcher.prefetch_around(self.generation, self.species_no)
 
         # Ghosts set up
         blinky = BlinkySprite(self.pacman, spritesheet)
@@ -100,6 +145,14 @@ class Playback:
         # Fruit set up
         self.fruit = FruitSprite(spritesheet)
 
+        # Recorded episode set up
+        self.trajectories = trajectories
+        self.seed = seed
+        self.move_log: MoveLog | None = None
+        self.last_frame: int | None = None
+        self.frame = 0
+        self.keyframes: dict[int, GameState] = {}
+
         self.new_episode()
 
     @property
@@ -115,6 +168,35 @@ class Playback:
         self.ghosts.pacman = self.pacman
         self.ghosts.initialise()
 
+    def new_episode(self) -> None:
+        """Start a new episode, replaying the recorded MoveLog of PacMan's Genome if there is one.
+
+        If self.seed is set the episode is instead played by the Genome with the random module seeded with
+        it, as in WinFinder.play_seed.
+        """
+
+        if self.seed is not None:
+            self.move_log = None
+        elif self.trajectories is not None:
+            self.move_log = self.trajectories.get(genome_digest(self.pacman.genome))
+        if self.move_log is not None:
+            random.seed(self.move_log.seed)
+            self.last_frame = len(self.move_log)
+        else:
+            if self.seed is not None:
+                random.seed(self.seed)
+            self.last_frame = None
+
+        self.start_episode()
+        self.frame = 0
+        self.keyframes = {}
+
+    @property
+    def episode_over(self) -> bool:
+        """Return True if PacMan has died or the recorded episode has ended."""
+
+        return self.pacman.dead or (self.last_frame is not None and self.frame >= self.last_frame)
+
     def only_dots_new_episode(self) -> None:
         """Start a new episode for Phase.ONLY_DOTS."""
 
@@ -145,6 +227,20 @@ class Playback:
         self.pacdots = PacDots()
         self.fruit.available = False
 
+    def switch_genome(self, generation: int, species_no: int) -> None:
+        """Start watching the Genome of the given generation and Species if it exists."""
+
+        if generation < 0 or species_no < 0 or self.prefetcher is None:
+            return
+
+        loaded = self.prefetcher.get(generation, species_no)
+        if loaded is None:
+            return
+
+        self.generation, self.species_no, self.pacman.genome = loaded
+        self.prefetcher.prefetch_around(self.generation, self.species_no)
+        self.new_episode()
+
     def check_key_press(self) -> None:
         """Check for new key presses."""
 
@@ -157,30 +253,38 @@ class Playback:
             if event.type == pygame.KEYDOWN:
 
                 if event.key == pygame.K_RIGHT:
-                    self.players.generation += 1
-                    self.new_episode()
+                    self.switch_genome(self.generation + 1, self.species_no)
                 elif event.key == pygame.K_LEFT:
-                    self.players.generation -= 1
-                    self.new_episode()
+                    self.switch_genome(self.generation - 1, self.species_no)
 
                 elif event.key == pygame.K_UP:
-                    self.players.species_no += 1
-                    self.new_episode()
+                    self.switch_genome(self.generation, self.species_no + 1)
                 elif event.key == pygame.K_DOWN:
-                    self.players.species_no -= 1
-                    self.new_episode()
+                    self.switch_genome(self.generation, self.species_no - 1)
 
                 elif event.key == pygame.K_j:
                     self.speed_multiplier = max(1, self.speed_multiplier // 2)
                 elif event.key == pygame.K_k:
                     self.speed_multiplier *= 2
+                elif event.key == pygame.K_f:
+                    self.fast_forwarding = True
+
+                elif event.key == pygame.K_COMMA:
+                    self.seek(self.frame - 5 * self.base_speed)
+                elif event.key == pygame.K_PERIOD:
+                    self.seek(self.frame + 5 * self.base_speed)
+
+    def next_move(self) -> Direction:
+        """Return PacMan's move this frame, from the MoveLog if one is being replayed."""
+
+        if self.move_log is not None:
+            return self.move_log[self.frame]
+        return self.pacman.decide(self.pacdots, self.fruit, self.ghosts)
 
     def advance_pacman(self) -> None:
         """Advance PacMan one frame."""
 
-        self.pacman.look(self.pacdots, self.fruit, self.ghosts)
-        move = self.pacman.think()
-        self.pacman.move(move)
+        self.pacman.move(self.next_move())
 
     def advance_ghosts(self) -> None:
         """Advance the Ghosts one frame."""
@@ -201,37 +305,6 @@ class Playback:
         
         return False
         
-    def check_power_dots(self) -> bool:
-        """Return True if PacMan has just eaten a PowerDot.
-        
-        Automatically updates PacMan's attributes and sets the Ghosts to frightened.
-        """
-
-        if self.pacdots.check_if_powered(self.pacman):
-            self.pacman.score += 50
-            self.pacman.move_next = False
-            self.ghosts.frightened = True
-            return True
-        
-        return False
-    
-    def check_fruit(self) -> None:
-        """Check if PacMan has just eaten the Fruit.
-        
-        Automatically updates PacMan's attributes.
-        """
-
-        if not self.fruit.available:
-            return
-        
-        if self.pacman.collided_with(self.fruit):
-            self.pacman.score += 100
-            self.fruit.available = False
-        elif self.fruit.available_countdown == 0:
-            self.fruit.available = False
-
-        self.fruit.available_countdown -= 1
-    
     def dot_ghost_release_threshold(self) -> None:
         """Check if enough PacDots have been eaten to release a Ghost."""
 
@@ -248,14 +321,6 @@ class Playback:
         elif self.pacdots.remaining == self.ghosts.blinky.elroy_second_threshold:
             self.ghosts.blinky.elroy = 2
 
-    def dot_fruit_threshold(self) -> None:
-        """Check if enough PacDots have been eaten to make the Fruit available."""
-
-        if self.pacdots.remaining == self.fruit.first_threshold:
-            self.fruit.available = True
-        elif self.pacdots.remaining == self.fruit.second_threshold:
-            self.fruit.available = True
-
     def only_dots_advance(self) -> None:
         """Advance to the next frame in Phase.ONLY_DOTS."""
 
@@ -280,36 +345,40 @@ class Playback:
         self.dot_elroy_threshold()
 
     def full_game_advance(self) -> None:
-        """Advance to the next frame in Phase.FULL_GAME."""
+        """Advance to the next frame in Phase.FULL_GAME, by the rules of the full_game simulator."""
 
-        self.advance_pacman()
-        self.advance_ghosts()
-        self.check_dots()
-        self.check_power_dots()
-        self.check_fruit()
-        self.dot_ghost_release_threshold()
-        self.dot_elroy_threshold()
-        self.dot_fruit_threshold()
+        full_game_frame(self.pacman, self.next_move(), self.pacdots, self.ghosts)
+
+    def step(self) -> None:
+        """Advance to the next frame, keeping a GameState every KEYFRAME_INTERVAL frames."""
 
-    def draw_dots(self) -> None:
-        """Draw the PacDots."""
+        if self.frame % KEYFRAME_INTERVAL == 0 and self.frame not in self.keyframes:
+            self.keyframes[self.frame] = GameState(
+                self.pacman, self.pacdots, self.fruit, self.ghosts, keep=(pygame.Surface,)
+            )
 
-        for dot in self.pacdots.dots:
-            dot_position = to_pixels(dot, self.tile_size)
-            pygame.draw.circle(self.screen, 'pink', dot_position, self.tile_size*0.2)
+        self.advance()
+        self.frame += 1
+        self.step_count += 1
 
-    def draw_power_dots(self) -> None:
-        """Draw the PowerDots."""
+    def seek(self, frame: int) -> None:
+        """Go to the given frame of the episode, going back to the closest keyframe before it if needed."""
 
-        for dot in self.pacdots.power_dots:
-            dot_position = to_pixels(dot, self.tile_size)
-            pygame.draw.circle(self.screen, 'pink', dot_position, self.tile_size*0.35)
+        frame = max(0, frame)
+        if frame < self.frame:
+            keyframe = max(keyframe for keyframe in self.keyframes if keyframe <= frame)
+            self.keyframes[keyframe].restore(self.pacman, self.pacdots, self.fruit, self.ghosts)
+            self.frame = keyframe
+
+        while self.frame < frame and not self.episode_over:
+            self.step()
 
     def draw_fruit(self) -> None:
         """Draw the Fruit."""
 
         if self.fruit.available:
             self.fruit.draw(self.screen)
+            self.renderer.mark(self.renderer.sprite_rect(self.fruit.position))
 
     def draw_ghosts(self) -> None:
         """Draw the Ghosts."""
@@ -317,82 +386,103 @@ class Playback:
         for ghost in self.ghosts:
             if not ghost.inactive:
                 ghost.draw(self.screen, self.tile_size)
+                self.renderer.mark(self.renderer.sprite_rect(ghost.position))
 
     def draw_pacman(self) -> None:
         """Draw PacMan."""
 
         self.pacman.draw(self.screen, self.tile_size)
+        self.renderer.mark(self.renderer.sprite_rect(self.pacman.position))
 
-    def draw_score(self) -> None:
-        """Draw the score."""
-
-        self.letters.draw_score(self.screen)
-        self.numbers.draw_score(self.screen, self.pacman.score)
-
-    def write_stats(self) -> None:
-        """Write the playback stats."""
-
-        # Show the gen
-        gen = self.stats_font.render(f'Gen: {self.players.generation}', True, 'white')
-        gen_rect = gen.get_rect(topleft=(self.tile_size, 0.5 * self.tile_size))
-        self.screen.blit(gen, gen_rect)
-
-        # Show the species_no
-        species_no = self.stats_font.render(f'Species: {self.players.species_no + 1}', True, 'white')
-        species_no_rect = gen.get_rect(topleft=(self.tile_size, 1.5 * self.tile_size))
-        self.screen.blit(species_no, species_no_rect)
-
-        # Show the speed
-        speed = self.stats_font.render(f'Speed: {self.speed_multiplier}x', True, 'white')
-        speed_rect = speed.get_rect(topright=(29 * self.tile_size, 0.5 * self.tile_size))
-        self.screen.blit(speed, speed_rect)
+    @property
+    def stats(self) -> list[tuple[str, str, tuple[float, float]]]:
+        """Return the playback stats with where to write them."""
+
+        return [
+            (f'Gen: {self.generation}', 'topleft', (self.tile_size, 0.5 * self.tile_size)),
+            (f'Species: {self.species_no + 1}', 'topleft', (self.tile_size, 1.5 * self.tile_size)),
+            (f'Speed: {self.speed_multiplier}x', 'topright', (29 * self.tile_size, 0.5 * self.tile_size)),
+            (
+                f'Sim: {self.sim_fps:.0f} fps, Render: {self.render_fps:.0f} fps',
+                'topright',
+                (29 * self.tile_size, 1.5 * self.tile_size),
+            ),
+        ]
 
     def only_dots_update_screen(self) -> None:
         """Draw the current frame to the screen in Phase.ONLY_DOTS."""
 
-        self.bg.draw(self.screen)
-        self.draw_dots()
+        self.renderer.begin_frame(self.pacdots, self.pacman.score, self.stats)
         self.draw_pacman()
-        self.draw_score()
-        self.write_stats()
-        pygame.display.flip()
+        self.renderer.end_frame()
 
     def dots_and_ghosts_update_screen(self) -> None:
         """Draw the current frame to the screen in Phase.DOTS_AND_GHOSTS."""
 
-        self.bg.draw(self.screen)
-        self.draw_dots()
+        self.renderer.begin_frame(self.pacdots, self.pacman.score, self.stats)
         self.draw_ghosts()
         self.draw_pacman()
-        self.draw_score()
-        self.write_stats()
-        pygame.display.flip()
+        self.renderer.end_frame()
 
     def full_game_update_screen(self) -> None:
         """Draw the current frame to the screen in Phase.FULL_GAME."""
 
-        self.bg.draw(self.screen)
-        self.draw_dots()
-        self.draw_power_dots()
+        self.renderer.begin_frame(self.pacdots, self.pacman.score, self.stats)
         self.draw_fruit()
         self.draw_ghosts()
         self.draw_pacman()
-        self.draw_score()
-        self.write_stats()
-        pygame.display.flip()
+        self.renderer.end_frame()
+
+    def measure_fps(self) -> None:
+        """Update the measured simulation and render frame rates once a second."""
+
+        elapsed = time.perf_counter() - self.measure_start
+        if elapsed < 1:
+            return
+
+        self.sim_fps = self.step_count / elapsed
+        self.render_fps = self.render_count / elapsed
+        self.step_count = 0
+        self.render_count = 0
+        self.measure_start = time.perf_counter()
+
+    def simulate_frames(self) -> None:
+        """Advance by the frames shown between two rendered frames.
+
+        At speed_multiplier times the base speed this is speed_multiplier frames. When fast forwarding
+        it is as many frames as can be simulated in the time of one rendered frame, until the episode ends.
+        """
+
+        if not self.fast_forwarding:
+            for _ in range(self.speed_multiplier):
+                self.step()
+                if self.episode_over:
+                    return
+            return
+
+        deadline = time.perf_counter() + 1 / self.base_speed
+        while not self.episode_over and time.perf_counter() < deadline:
+            self.step()
 
     def run(self) -> None:
-        """Run the main game loop."""
+        """Run the main game loop.
+
+        The screen is rendered at the base speed and the speed multiplier changes how many frames are
+        simulated in between.
+        """
 
         while True:
             self.check_key_press()
-            self.advance()
+            self.simulate_frames()
             self.update_screen()
+            self.render_count += 1
+            self.measure_fps()
 
-            if self.pacman.dead:
+            if self.episode_over:
+                self.fast_forwarding = False
                 self.new_episode()
 
-            self.clock.tick(self.base_speed * self.speed_multiplier)
+            self.clock.tick(self.base_speed)
 
 
 def playback() -> None:
@@ -402,5 +492,7 @@ def playback() -> None:
     phase = Phase[settings['phase'].upper()]
     playback_folder = handled_settings['playback_settings']['save_folder'] + f'/{phase.name.lower()}'
     player_args = handled_settings['player_args']
-    pb = Playback(playback_folder, PlaybackPlayer, player_args, phase)
+    trajectories_path = store_path(playback_folder)
+    trajectories = TrajectoryStore(trajectories_path) if trajectories_path.exists() else None
+    pb = Playback(playback_folder, PlaybackPlayer, player_args, phase, trajectories)
     pb.run()
\ No newline at end of file
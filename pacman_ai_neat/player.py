@@ -1,34 +1,108 @@
 from pacman_app import PacMan, PacDots, Fruit, Ghosts
 from pacman_app.characters.ghosts.mode import Mode
-from pacman_app.map import MAP, Tile
-from pacman_app.map.direction import Direction, Vector
+from pacman_app.map.direction import Direction
 from neat import BasePlayer
 
+from pacman_ai_neat.bitboard import Bitboard
+from pacman_ai_neat.policy import PolicyTable, PrunedNetwork, used_inputs
+from pacman_ai_neat.settings import vision_settings, simulation_settings
+from pacman_ai_neat.vision import perspective_of, sight_line, ordinal_offsets
+
+
+# Every input of PacMan's vision is computed
+ALL_INPUTS = (True,) * 8
+
 
 class Player(PacMan, BasePlayer):
 
+    # Attributes that are caches, statistics or the Genome rather than part of the game state
+    transient_attributes = frozenset({
+        'genome', 'network', 'fitness', '_fitness', 'lifespan', 'vision', 'bitboard', 'policy_table', 'used_inputs',
+        'surroundings', 'decision', 'skipped_decisions', 'cache_hits', 'cache_misses', 'paused_episode',
+        'move_log', 'pending_evaluation', 'evaluation', 'mean_score', 'sharing_ratio',
+    })
+
+    # The BatchedSimulator that has queued PacMan, until it sets his results
+    pending_evaluation = None
+    # The number of generations evaluated before PacMan's in this run
+    evaluation: int = 0
+
     def __init__(self, *player_args: dict) -> None:
         super().__init__()
         self.vision: list[float]
+        self.bitboard = Bitboard() if vision_settings['bitboards'] else None
+        self.network: PrunedNetwork | None = None
+        self.policy_table: PolicyTable | None = None
+        self.used_inputs: tuple[bool, ...] = ALL_INPUTS
+        self.surroundings: tuple | None = None
+        self.decision: Direction
+        self.skipped_decisions: int = 0
+        self.lifespan: int = 0
+        self.mean_score: float = 0
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+        self.sharing_ratio: float = 1
+        self.paused_episode = None
+        self.move_log = None
+
+    def __getstate__(self) -> dict:
+        """Return the attributes to pickle, leaving out caches that are rebuilt when needed."""
+
+        if self.pending_evaluation is not None:
+            self.pending_evaluation.flush()
+
+        state = self.__dict__.copy()
+        state['pending_evaluation'] = None
+        state['network'] = None
+        state['policy_table'] = None
+        state['surroundings'] = None
+        state['paused_episode'] = None
+        state['move_log'] = None
+        if self.bitboard is not None:
+            state['bitboard'] = Bitboard()
+        return state
+
+    def initialise(self) -> None:
+        """Reset PacMan for a new episode, discarding the PolicyTable of any previous Genome and the 
+        last decision."""
+
+        super().initialise()
+        if self.policy_table is not None and not self.policy_table.is_for(self.genome):
+            self.policy_table = None
+        self.network = None
+        self.used_inputs = ALL_INPUTS
+        self.surroundings = None
+        self.skipped_decisions = 0
 
     @property
-    def perspective(self) -> list[Direction]:
-        """Return a list containing the Directions corresponding to PacMan's forward, right, 
-        back and left."""
-
-        directions = [self.direction]
-        for _ in range(3):
-            directions.append(Direction(Vector(-directions[-1].value.d_y, directions[-1].value.d_x)))
-        return directions
-    
-    def in_bounds(self, tile: tuple[int,int]) -> bool:
-        """Return True if the given tile is in the PacMaze."""
+    def fitness(self) -> float:
+        """Return PacMan's fitness, first evaluating the batch he is queued in if there is one."""
 
-        if tile[0] < 2 or tile[0] > 27 or tile[1] < 4 or tile[1] > 32:
-            return False
-        
-        return True
+        if self.pending_evaluation is not None:
+            self.pending_evaluation.flush()
+        return self._fitness
+
+    @fitness.setter
+    def fitness(self, fitness: float) -> None:
+        self._fitness = fitness
+
+    @property
+    def perspective(self) -> tuple[Direction, ...]:
+        """Return the Directions corresponding to PacMan's forward, right, back and left."""
+
+        return perspective_of(self.direction)
     
+    def prepare(self) -> None:
+        """Get ready for an episode with the current Genome.
+
+        If vision_settings['lazy_vision'] is set, look will only compute the inputs that are connected to
+        an output of the Genome and think will only propagate through the Nodes that are.
+        """
+
+        if vision_settings['lazy_vision']:
+            self.used_inputs = used_inputs(self.genome)
+            self.network = PrunedNetwork(self.genome)
+
     def look_in_direction(
         self,
         direction: Direction,
@@ -37,7 +111,7 @@ class Player(PacMan, BasePlayer):
         active_ghost_pos: set[tuple[int,int]],
         frightened_ghost_pos: set[tuple[int,int]]
     ) -> float:
-        """Look 5 tiles in the given direction and return a value corresponding to what is seen.
+        """Look RAY_LENGTH tiles in the given direction and return a value corresponding to what is seen.
 
         If the first tile is wall returns 1.
         If there is nothing (possibly before a wall) returns 0.
@@ -50,17 +124,9 @@ class Player(PacMan, BasePlayer):
         if not self.can_move_in_direction(direction):
             return 1
 
-        tiles = [(self.position.tile_x + i*direction.value.d_x, self.position.tile_y + i*direction.value.d_y) for i in range(1,6)]
+        tiles, leaves_maze = sight_line(self.position.tile_pos, direction)
         value = 0
         for tile in tiles:
-
-            # If out of bounds then its only been path (only happens in tunnel)
-            if not self.in_bounds(tile):
-                return 0
-            
-            # If its wall then we can make a decision
-            if MAP[tile] == Tile.WALL:
-                return value
             
             # If its an active ghost we want to treat it like we can't move that way
             if tile in active_ghost_pos:
@@ -78,22 +144,22 @@ class Player(PacMan, BasePlayer):
             if fruit_pos and tile == fruit_pos:
                 value = min(-0.6, value)
 
+        # If we left the PacMaze then its only been path (only happens in tunnel)
+        if leaves_maze:
+            return 0
+
         return value
     
     def look_in_ordinal(self, direction: Direction, active_ghost_pos: set[tuple[int,int]]) -> bool:
-        """Return True if there is an active ghost in the 3x3 square of tiles in the direction 45 degrees
-        clockwise from the given direction."""
+        """Return True if there is an active ghost in the ORDINAL_SIZE x ORDINAL_SIZE square of tiles in 
+        the direction 45 degrees clockwise from the given direction."""
 
-        # Get the 9 tiles
-        orthog_direction = Direction(Vector(-direction.value.d_y, direction.value.d_x))
-        tiles = set((
-            self.position.tile_x + i*(direction.value.d_x + orthog_direction.value.d_x),
-            self.position.tile_y + j*(direction.value.d_y + orthog_direction.value.d_y)
-        ) for i in range(1,4) for j in range(1,4))
+        tile_x, tile_y = self.position.tile_pos
+        offsets = ordinal_offsets(direction)
 
         # Check if there are any Ghosts in there
-        for ghost_pos in active_ghost_pos:
-            if ghost_pos in tiles:
+        for ghost_x, ghost_y in active_ghost_pos:
+            if (ghost_x - tile_x, ghost_y - tile_y) in offsets:
                 return True
             
         return False
@@ -101,43 +167,136 @@ class Player(PacMan, BasePlayer):
     def look(self, pacdots: PacDots, fruit: Fruit, ghosts: Ghosts) -> None:
         """Set PacMan's vision.
         
-        Can see the below for 5 squares in the 4 cardinal directions (in the order from self.perspective):
+        Can see the below for RAY_LENGTH squares in the 4 cardinal directions (in the order from self.perspective):
         - whether it can move in the direction (value = 0)
         - whether there is a wall in the direction (value = 1)
         - whether there is a PacDot (value = -0.5)
         - whether there is the Fruit (value = -0.7)
         - whether there is an active ghost (value = 1)
         - whether there is a frightened ghost (value = -1)
-        as well as 4 one-hot values indicating if there is an active ghost in the 3x3 square of tiles diagonally 
-        away from PacMan in the 4 ordinal directions.
+        as well as 4 one-hot values indicating if there is an active ghost in the ORDINAL_SIZE x ORDINAL_SIZE 
+        square of tiles diagonally away from PacMan in the 4 ordinal directions.
         """
 
+        if self.bitboard is not None:
+            self.look_with_bitboard(pacdots, fruit, ghosts)
+            return
+
         cardinal_vision = []
         ordinal_vision = []
 
+        used = self.used_inputs
+
         # Prepare the things we're looking at
-        pacdot_pos = pacdots.dots | pacdots.power_dots
-        fruit_pos = fruit.position.tile_pos if fruit.available else None
         active_ghost_pos = set(ghost.position.tile_pos for ghost in ghosts if not ghost.inactive and not ghost.mode == Mode.RETURN_TO_HOME and not ghost.frightened)
-        frightened_ghost_pos = set(ghost.position.tile_pos for ghost in ghosts if not ghost.inactive and ghost.frightened)
+        if any(used[:4]):
+            pacdot_pos = pacdots.dots | pacdots.power_dots
+            fruit_pos = fruit.position.tile_pos if fruit.available else None
+            frightened_ghost_pos = set(ghost.position.tile_pos for ghost in ghosts if not ghost.inactive and ghost.frightened)
 
-        # Look in all the directions
+        # Look in all the directions (skipping any inputs that can't change PacMan's choice)
         directions = self.perspective
-        for direction in directions:
-            cardinal_vision.append(self.look_in_direction(
-                direction=direction,
-                pacdot_pos=pacdot_pos,
-                fruit_pos=fruit_pos,
-                active_ghost_pos=active_ghost_pos,
-                frightened_ghost_pos=frightened_ghost_pos,
-            ))
-            ordinal_vision.append(int(self.look_in_ordinal(direction, active_ghost_pos)))
+        for i, direction in enumerate(directions):
+            if used[i]:
+                cardinal_vision.append(self.look_in_direction(
+                    direction=direction,
+                    pacdot_pos=pacdot_pos,
+                    fruit_pos=fruit_pos,
+                    active_ghost_pos=active_ghost_pos,
+                    frightened_ghost_pos=frightened_ghost_pos,
+                ))
+            else:
+                cardinal_vision.append(0)
+            ordinal_vision.append(int(self.look_in_ordinal(direction, active_ghost_pos)) if used[i + 4] else 0)
+
+        self.vision = cardinal_vision + ordinal_vision
+
+    def look_with_bitboard(self, pacdots: PacDots, fruit: Fruit, ghosts: Ghosts) -> None:
+        """Set PacMan's vision exactly as in look, but answering each check with bitmasks."""
+
+        board = self.bitboard
+        board.update(pacdots, fruit, ghosts)
+        tile = self.position.tile_pos
+
+        used = self.used_inputs
+
+        cardinal_vision = []
+        ordinal_vision = []
+        for i, direction in enumerate(self.perspective):
+            if not used[i]:
+                cardinal_vision.append(0)
+            elif self.can_move_in_direction(direction):
+                cardinal_vision.append(board.look_along(tile, direction))
+            else:
+                cardinal_vision.append(1)
+            ordinal_vision.append(int(board.look_in_ordinal(tile, direction)) if used[i + 4] else 0)
 
         self.vision = cardinal_vision + ordinal_vision
 
     def think(self) -> Direction:
-        """Feed the input into the Genome and return the output as a valid move."""
+        """Feed the input into the Genome and return the output as a valid move.
+        
+        If a PolicyTable has been given or is in use the choice is looked up in it instead.
+        """
+
+        if self.policy_table is None:
+            match(simulation_settings['policy_table']):
+
+                case None:
+                    choices = (self.network or self.genome).propagate(self.vision)
+                    choice = max(enumerate(choices), key = lambda choice: choice[1])[0]
+                    return self.perspective[choice]
+
+                case 'lazy':
+                    self.policy_table = PolicyTable(self.genome)
+
+                case 'full':
+                    self.policy_table = PolicyTable(self.genome)
+                    self.policy_table.compile()
+
+                case setting:
+                    raise Exception(f'Invalid policy_table setting {setting}')
+
+        return self.perspective[self.policy_table[tuple(self.vision)]]
+
+    def get_surroundings(self, pacdots: PacDots, fruit: Fruit, ghosts: Ghosts) -> tuple:
+        """Return everything that look depends on, so that equal surroundings mean equal vision.
+
+        The walls around PacMan are fixed by his tile, so which moves he can make isn't checked, and only
+        the Ghosts that aren't inactive (and so can be seen) are described.
+        """
+
+        return (
+            self.position.tile_pos,
+            self.direction,
+            pacdots.remaining,
+            fruit.available and fruit.position.tile_pos,
+            tuple((ghost.position.tile_pos, ghost.frightened, ghost.mode) for ghost in ghosts if not ghost.inactive),
+        )
+
+    def decide(self, pacdots: PacDots, fruit: Fruit, ghosts: Ghosts) -> Direction:
+        """Look and think, returning the move PacMan wants to make.
+
+        If simulation_settings['decision_points_only'] is set then the last decision is reused (and 
+        counted in self.skipped_decisions) whenever PacMan's surroundings are the same as when it was 
+        made, since the vision and hence the move would be too. If a MoveLog has been given the move is
+        added to it.
+        """
+
+        if not simulation_settings['decision_points_only']:
+            self.look(pacdots, fruit, ghosts)
+            self.decision = self.think()
+        else:
+            surroundings = self.get_surroundings(pacdots, fruit, ghosts)
+            if surroundings == self.surroundings:
+                self.skipped_decisions += 1
+            else:
+                self.look(pacdots, fruit, ghosts)
+                self.decision = self.think()
+                self.surroundings = surroundings
+
+        # Record the move if the episode is being recorded
+        if self.move_log is not None:
+            self.move_log.append(self.decision)
 
-        choices = self.genome.propagate(self.vision)
-        choice = max(enumerate(choices), key = lambda choice: choice[1])[0]
-        return self.perspective[choice]
\ No newline at end of file
+        return self.decision
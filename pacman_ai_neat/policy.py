@@ -0,0 +1,189 @@
+import hashlib
+import math
+import pickle
+from itertools import product
+from typing import Iterable, Iterator
+
+from neat.genome import Genome
+
+from pacman_ai_neat.settings import genome_settings, vision_settings
+
+
+# Every value a cardinal and an ordinal input from Player.look can take
+CARDINAL_VALUES = (1, 0, -0.5, -0.6, -1)
+ORDINAL_VALUES = (0, 1)
+# The values a cardinal input can take without the Fruit or frightened Ghosts
+DOTS_CARDINAL_VALUES = (1, 0, -0.5)
+# The values an ordinal input can take without active Ghosts
+DOTS_ORDINAL_VALUES = (0,)
+
+
+def genome_digest(genome: Genome) -> str:
+    """Return a hash of the Genome's content (its topology and weights)."""
+
+    return hashlib.sha256(pickle.dumps(genome)).hexdigest()
+
+
+def live_nodes(genome: Genome) -> set[int]:
+    """Return the ids of the Genome's Nodes that lead to an output through enabled Connections (the
+    outputs included).
+
+    Every other Node is dead: its value can never change the outputs.
+    """
+
+    # The Nodes feeding into each Node
+    sources: dict[int, list[int]] = {}
+    for connection in genome.connections:
+        if connection.enabled:
+            sources.setdefault(connection.output.id, []).append(connection.input.id)
+
+    # Walk back from the output Nodes (those in the last layer)
+    last_layer = max(node.layer for node in genome.nodes)
+    reached = set()
+    stack = [node.id for node in genome.nodes if node.layer == last_layer]
+    while stack:
+        node_id = stack.pop()
+        if node_id not in reached:
+            reached.add(node_id)
+            stack.extend(sources.get(node_id, ()))
+
+    return reached
+
+
+def used_inputs(genome: Genome) -> tuple[bool, ...]:
+    """Return whether each input of the Genome leads to an output through enabled Connections.
+
+    Inputs that don't can never change the Genome's choice. This only reads the Genome's Connections,
+    so it costs nothing like propagating the Genome.
+    """
+
+    reached = live_nodes(genome)
+    return tuple(i in reached for i in range(genome_settings['input_count']))
+
+
+def sigmoid(x: float) -> float:
+    return 1 / (1 + math.exp(-x))
+
+
+def relu(x: float) -> float:
+    return max(x, 0)
+
+
+def linear(x: float) -> float:
+    return x
+
+
+ACTIVATIONS = {'sigmoid': sigmoid, 'relu': relu, 'linear': linear}
+
+
+class PrunedNetwork:
+    """A Genome reduced to what can change its outputs, for propagating one vision at a time.
+
+    Disabled Connections and dead Nodes (those with no enabled path to an output) are dropped, and the
+    rest are kept as a plan of the Nodes to compute in layer order, each with the Nodes and weights
+    feeding into it. Inputs are the Nodes of layer 0 with ids below genome_settings['input_count'] and
+    any other Node of layer 0 is a bias Node with value 1. Outputs (the last layer) use the sigmoid and
+    hidden Nodes genome_settings['hidden_activation'], as in neat's Genome.propagate.
+    """
+
+    def __init__(self, genome: Genome) -> None:
+        live = live_nodes(genome)
+        input_count = genome_settings['input_count']
+        last_layer = max(node.layer for node in genome.nodes)
+        hidden_activation = ACTIVATIONS[genome_settings['hidden_activation'] or 'sigmoid']
+
+        sources: dict[int, list[tuple[int, float]]] = {}
+        for connection in genome.connections:
+            if connection.enabled and connection.output.id in live:
+                sources.setdefault(connection.output.id, []).append((connection.input.id, connection.weight))
+
+        self.bias = [node.id for node in genome.nodes if node.layer == 0 and node.id >= input_count]
+        self.plan = [
+            (node.id, sigmoid if node.layer == last_layer else hidden_activation, sources.get(node.id, []))
+            for node in sorted(genome.nodes, key=lambda node: node.layer)
+            if node.layer > 0 and node.id in live
+        ]
+        self.outputs = [node.id for node in genome.nodes if node.layer == last_layer]
+
+    def propagate(self, inputs: list[float]) -> list[float]:
+        """Return the Genome's outputs for the given inputs."""
+
+        values = dict(enumerate(inputs))
+        for node_id in self.bias:
+            values[node_id] = 1
+        for node_id, activation, sources in self.plan:
+            values[node_id] = activation(sum(weight * values[source] for source, weight in sources))
+
+        return [values[node_id] for node_id in self.outputs]
+
+
+def network_of(genome: Genome) -> Genome | PrunedNetwork:
+    """Return what to propagate visions through for the Genome: a PrunedNetwork of it if
+    vision_settings['lazy_vision'] is set, otherwise the Genome itself."""
+
+    return PrunedNetwork(genome) if vision_settings['lazy_vision'] else genome
+
+
+def vision_space(
+    cardinal_values: tuple[float, ...] = CARDINAL_VALUES,
+    ordinal_values: tuple[int, ...] = ORDINAL_VALUES,
+) -> Iterator[tuple[float, ...]]:
+    """Yield every vision made up of 4 of the given cardinal values followed by 4 of the given
+    ordinal values."""
+
+    for cardinal_vision in product(cardinal_values, repeat=4):
+        for ordinal_vision in product(ordinal_values, repeat=4):
+            yield cardinal_vision + ordinal_vision
+
+
+class PolicyTable:
+    """The move a Genome chooses for each vision, so that thinking is a single lookup.
+
+    Visions are added the first time they are seen unless the table is compiled beforehand.
+    """
+
+    def __init__(self, genome: Genome) -> None:
+        self.genome = genome
+        self.network = network_of(genome)
+        self.digest = genome_digest(genome)
+        self.choices: dict[tuple[float, ...], int] = {}
+
+    def is_for(self, genome: Genome) -> bool:
+        """Return whether the table holds the choices of the given Genome, i.e. it has the content the
+        table was built from (a Genome mutated in place since then no longer does)."""
+
+        return genome_digest(genome) == self.digest
+
+    def evaluate(self, vision: tuple[float, ...]) -> int:
+        """Feed the vision into the Genome and return the index of the output with highest activation."""
+
+        choices = self.network.propagate(list(vision))
+        return max(enumerate(choices), key = lambda choice: choice[1])[0]
+
+    def compile(self, visions: Iterable[tuple[float, ...]] | None = None) -> None:
+        """Add the given visions to the table (all possible visions if none are given)."""
+
+        for vision in visions if visions is not None else vision_space():
+            if vision not in self.choices:
+                self.choices[vision] = self.evaluate(vision)
+
+    def fingerprint(self, visions: Iterable[tuple[float, ...]]) -> str:
+        """Return a hash of the Genome's choices for the given visions.
+
+        Genomes with equal fingerprints over every vision PacMan can have play identically.
+        """
+
+        visions = tuple(visions)
+        self.compile(visions)
+        return hashlib.sha256(bytes(self.choices[vision] for vision in visions)).hexdigest()
+
+    def __getitem__(self, vision: tuple[float, ...]) -> int:
+        try:
+            return self.choices[vision]
+        except KeyError:
+            choice = self.choices[vision] = self.evaluate(vision)
+            return choice
+
+    def __len__(self) -> int:
+        return len(self.choices)
+
@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from neat import PlaybackPlayers
+from neat.genome import Genome
+
+
+# A loaded Genome along with the generation and Species PlaybackPlayers loaded it from
+Loaded = tuple[int, int, Genome]
+
+
+class GenomePrefetcher:
+    """Loads saved Genomes on a background thread so that switching between them is instant.
+
+    Genomes are loaded by a PlaybackPlayers of its own (the same way Playback's are), from the generations
+    and Species folders in folder. After each switch the Genomes of the generations and Species within
+    radius of the one being watched are loaded, nearest first, into a cache holding at most max_size
+    Genomes (forgetting the least recently used first). Generations and Species that haven't been saved
+    (yet) aren't cached, so they are looked for again the next time they are asked for.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        playback_player: type,
+        player_args: dict,
+        radius: int = 3,
+        max_size: int = 32,
+    ) -> None:
+        self.folder = Path(folder)
+        self.players = PlaybackPlayers(folder, playback_player, player_args)
+        self.radius = radius
+        self.max_size = max_size
+        self.cache: OrderedDict[tuple[int, int], Loaded] = OrderedDict()
+        self.pending: list[tuple[int, int]] = []
+        self.condition = threading.Condition()
+        # PlaybackPlayers is switched to each Genome to load it, so only one can be loaded at a time
+        self.loading = threading.Lock()
+        threading.Thread(target=self.load_pending, daemon=True).start()
+
+    def load(self, generation: int, species_no: int) -> Loaded | None:
+        """Load the Genome of the given generation and Species into the cache and return it with the
+        generation and Species it was loaded from (None if it hasn't been saved)."""
+
+        if not (self.folder / str(generation) / str(species_no)).is_dir():
+            return None
+
+        with self.loading:
+            self.players.generation = generation
+            self.players.species_no = species_no
+            loaded = (self.players.generation, self.players.species_no, self.players[0].genome)
+        if loaded[:2] != (generation, species_no):
+            return None
+
+        with self.condition:
+            self.cache[generation, species_no] = loaded
+            self.cache.move_to_end((generation, species_no))
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+
+        return loaded
+
+    def get(self, generation: int, species_no: int) -> Loaded | None:
+        """Return the Genome of the given generation and Species with the generation and Species it was
+        loaded from (None if it hasn't been saved), loading it now if it hasn't been prefetched."""
+
+        with self.condition:
+            if (generation, species_no) in self.cache:
+                self.cache.move_to_end((generation, species_no))
+                return self.cache[generation, species_no]
+
+        return self.load(generation, species_no)
+
+    def prefetch_around(self, generation: int, species_no: int) -> None:
+        """Replace the Genomes waiting to be loaded with those near the given generation and Species."""
+
+        neighbours = []
+        for distance in range(1, self.radius + 1):
+            neighbours.extend([
+                (generation + distance, species_no),
+                (generation - distance, species_no),
+                (generation, species_no + distance),
+                (generation, species_no - distance),
+            ])
+
+        with self.condition:
+            self.pending = [key for key in neighbours if key not in self.cache and min(key) >= 0]
+            self.condition.notify()
+
+    def load_pending(self) -> None:
+        """Load the waiting Genomes forever (run on the background thread)."""
+
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                generation, species_no = self.pending.pop(0)
+
+            self.load(generation, species_no)
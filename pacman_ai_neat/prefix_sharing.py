@@ -0,0 +1,160 @@
+from pacman_ai_neat.cycle_detector import CycleDetector
+from pacman_ai_neat.environment import Environment
+from pacman_ai_neat.network import compile_tables
+from pacman_ai_neat.phase import Phase
+from pacman_ai_neat.player import Player, ALL_INPUTS
+from pacman_ai_neat.policy import PolicyTable
+from pacman_ai_neat.settings import simulation_settings
+from pacman_ai_neat.snapshot import GameState
+
+
+# The Players following a branch, the GameState it starts from (None for the start of the game) and the
+# counters of only_dots along with the number of frames played to reach it
+Branch = tuple[list[int], GameState | None, tuple]
+
+
+class PrefixSharingSimulator:
+    """Simulates every game of a generation in Phase.ONLY_DOTS as a tree of rollouts.
+
+    Games in which PacMan has made the same moves are in the same state, so a group of Players is played
+    as a single game until their Genomes choose different moves. The state is then saved as a GameState
+    and each group of Players choosing the same move carries on from it as its own branch. Assigns exactly
+    the fitness that only_dots would.
+
+    The sharing ratio of each generation (the frames separate games would have played divided by the
+    frames actually played) is set as every Player's sharing_ratio, so it can be added to the progress.
+    """
+
+    def __init__(self) -> None:
+        self.tables: list[PolicyTable] = []
+        self.simulated_frames = 0
+        self.rollout_frames = 0
+
+    @property
+    def sharing_ratio(self) -> float:
+        return self.rollout_frames / max(1, self.simulated_frames)
+
+    def play_branch(
+        self,
+        players: list[Player],
+        branch: Branch,
+        environment: Environment,
+        branches: list[Branch],
+    ) -> None:
+        """Play the given branch until the game ends, adding a branch to branches whenever its Players
+        choose different moves, and assign the results to the Players that follow it to the end."""
+
+        members, state, counters = branch
+        pacman = players[members[0]]
+        environment.chase(pacman)
+        if state is not None:
+            state.restore(pacman, environment.pacdots, environment.fruit, environment.ghosts)
+        pacman.used_inputs = ALL_INPUTS
+        pacdots = environment.pacdots
+        fruit = environment.fruit
+        ghosts = environment.ghosts
+
+        # Run a loop until PacMan eats all Dots or takes too long to do so
+        lifespan, famine_count, stationary_count, prev_tile, frames = counters
+        start_frames = frames
+        MAX_FAMINE_COUNT = simulation_settings['max_famine_count']
+        MAX_STATIONARY_COUNT = simulation_settings['max_stationary_count']
+        cycle_detector = CycleDetector(pacman, pacdots) if simulation_settings['cycle_detection'] else None
+        while famine_count < MAX_FAMINE_COUNT and stationary_count < MAX_STATIONARY_COUNT and pacman.score < 2000:
+
+            # Group the Players by the move their Genomes choose
+            pacman.look(pacdots, fruit, ghosts)
+            vision = tuple(pacman.vision)
+            choices: dict[int, list[int]] = {}
+            for member in members:
+                choices.setdefault(self.tables[member][vision], []).append(member)
+
+            # Leave all but one group to carry on from here later
+            if len(choices) > 1:
+                state = GameState(pacman, pacdots, fruit, ghosts)
+                counters = (lifespan, famine_count, stationary_count, prev_tile, frames)
+                *others, (choice, members) = choices.items()
+                branches.extend((other_members, state, counters) for _, other_members in others)
+
+                if players[members[0]] is not pacman:
+                    pacman = players[members[0]]
+                    environment.chase(pacman)
+                    state.restore(pacman, pacdots, fruit, ghosts)
+                    pacman.used_inputs = ALL_INPUTS
+                    if cycle_detector:
+                        cycle_detector = CycleDetector(pacman, pacdots)
+            else:
+                choice = next(iter(choices))
+
+            pacman.move(pacman.perspective[choice])
+            lifespan += 1
+            frames += 1
+
+            # Update score/famine_count
+            if pacdots.check_if_eaten(pacman):
+                pacman.score += 10
+                pacman.move_next = False
+                famine_count = 0
+            else:
+                famine_count += 1
+
+            # Update stationary_count
+            if pacman.position.tile_pos == prev_tile:
+                stationary_count += 1
+            else:
+                stationary_count = 0
+                prev_tile = pacman.position.tile_pos
+
+                # If PacMan has been here before without eating anything he will go round in circles until he starves
+                if cycle_detector and cycle_detector.repeated():
+                    lifespan += MAX_FAMINE_COUNT - famine_count
+                    famine_count = MAX_FAMINE_COUNT
+
+        # Alter lifespans to be true lifespan
+        if famine_count == MAX_FAMINE_COUNT:
+            lifespan -= MAX_FAMINE_COUNT
+        elif stationary_count == MAX_STATIONARY_COUNT:
+            lifespan -= MAX_STATIONARY_COUNT
+
+        for member in members:
+            players[member].score = pacman.score
+            players[member].lifespan = lifespan
+            players[member].fitness = (pacman.score // 10) ** 4 / (lifespan + 1000)
+
+        self.simulated_frames += frames - start_frames
+        self.rollout_frames += frames * len(members)
+
+    def evaluate(self, players: list[Player]) -> list[Player]:
+        """Simulate all the given Players in Phase.ONLY_DOTS, setting their fitness in place and returning
+        them."""
+
+        if not players:
+            return players
+
+        for pacman in players:
+            pacman.initialise()
+
+        # Each Genome's moves are looked up in a table shared with any Genomes of the same content,
+        # compiling them all up front (in batches) if simulation_settings['policy_table'] is set
+        distinct: dict[str, PolicyTable] = {}
+        self.tables = []
+        for pacman in players:
+            table = PolicyTable(pacman.genome)
+            self.tables.append(distinct.setdefault(table.digest, table))
+        if simulation_settings['policy_table']:
+            compile_tables(list(distinct.values()), Phase.ONLY_DOTS.vision_space)
+
+        # Set up the Dots, inactive Fruit and inactive Ghosts that every branch is played in
+        environment = Environment(players[0])
+        environment.ghosts.blinky.inactive = True
+
+        self.simulated_frames = 0
+        self.rollout_frames = 0
+        branches: list[Branch] = [(list(range(len(players))), None, (0, 0, 0, players[0].position.tile_pos, 0))]
+        while branches:
+            self.play_branch(players, branches.pop(), environment, branches)
+
+        for pacman in players:
+            pacman.sharing_ratio = self.sharing_ratio
+
+        return players
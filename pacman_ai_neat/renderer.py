@@ -0,0 +1,178 @@
+import pygame
+
+from pacman_app import PacDots
+from pacman_app.background import Background
+from pacman_app.pixels import to_pixels
+from pacman_app.sprites.letters import Letters
+from pacman_app.sprites.numbers import Numbers
+
+
+# The number of rows of tiles above the PacMaze where the score and stats are written
+HUD_ROWS = 3
+
+
+class Renderer:
+    """Draws frames of the game to the screen, only redrawing and pushing what has changed.
+
+    The PacMaze, PacDots, score and stats are kept on a static layer. Eaten PacDots are erased from it
+    and the score and stats are only rewritten when they change, with text rendered once per distinct
+    string. Each frame, the areas drawn over in the last frame are restored from the static layer, the 
+    moving sprites are drawn on top and only the areas that changed are passed to pygame.display.update.
+
+    Anything drawn on top of the static layer must be marked (e.g. with the Rect returned by pygame.draw
+    or Surface.blit) so that it is pushed now and erased next frame.
+    """
+
+    def __init__(
+        self,
+        screen: pygame.Surface,
+        tile_size: int,
+        background: Background,
+        letters: Letters,
+        numbers: Numbers,
+        font: pygame.font.Font | None = None,
+        show_power_dots: bool = True,
+    ) -> None:
+        self.screen = screen
+        self.tile_size = tile_size
+        self.letters = letters
+        self.numbers = numbers
+        self.font = font
+        self.show_power_dots = show_power_dots
+
+        # The PacMaze on its own and with everything that rarely changes
+        self.maze = pygame.Surface(screen.get_size())
+        background.draw(self.maze)
+        self.static = self.maze.copy()
+        self.hud_rect = pygame.Rect(0, 0, screen.get_width(), HUD_ROWS * tile_size)
+
+        # What is on the static layer
+        self.pacdots: PacDots | None = None
+        self.dots: set[tuple[int,int]] = set()
+        self.power_dots: set[tuple[int,int]] = set()
+        self.hud: tuple | None = None
+        self.texts: dict[str, pygame.Surface] = {}
+
+        # The areas to restore and push
+        self.full_update = True
+        self.dirty: list[pygame.Rect] = []
+        self.drawn: list[pygame.Rect] = []
+        self.last_drawn: list[pygame.Rect] = []
+
+    def dot_rect(self, dot: tuple[int,int], radius: float) -> pygame.Rect:
+        """Return the Rect covering a dot with the given radius."""
+
+        rect = pygame.Rect(0, 0, 2 * radius + 2, 2 * radius + 2)
+        rect.center = to_pixels(dot, self.tile_size)
+        return rect
+
+    def draw_dots(self) -> None:
+        """Draw all the PacDots (and PowerDots if shown) onto the static layer."""
+
+        for dot in self.dots:
+            pygame.draw.circle(self.static, 'pink', to_pixels(dot, self.tile_size), self.tile_size*0.2)
+        for dot in self.power_dots:
+            pygame.draw.circle(self.static, 'pink', to_pixels(dot, self.tile_size), self.tile_size*0.35)
+
+    def update_dots(self, pacdots: PacDots) -> None:
+        """Bring the PacDots on the static layer up to date, erasing eaten ones or redrawing them all if
+        any have come back (e.g. in a new episode)."""
+
+        dots = pacdots.dots
+        power_dots = pacdots.power_dots if self.show_power_dots else set()
+        if pacdots is self.pacdots and len(dots) == len(self.dots) and len(power_dots) == len(self.power_dots):
+            return
+
+        if pacdots is self.pacdots and dots <= self.dots and power_dots <= self.power_dots:
+            for dot in self.dots - dots:
+                rect = self.dot_rect(dot, self.tile_size*0.2)
+                self.static.blit(self.maze, rect, rect)
+                self.dirty.append(rect)
+            for dot in self.power_dots - power_dots:
+                rect = self.dot_rect(dot, self.tile_size*0.35)
+                self.static.blit(self.maze, rect, rect)
+                self.dirty.append(rect)
+            self.dots = set(dots)
+            self.power_dots = set(power_dots)
+            return
+
+        self.pacdots = pacdots
+        self.dots = set(dots)
+        self.power_dots = set(power_dots)
+        self.static.blit(self.maze, (0, 0))
+        self.draw_dots()
+        self.hud = None
+        self.full_update = True
+
+    def render_text(self, text: str) -> pygame.Surface:
+        """Return the rendered text, only rendering each string once."""
+
+        if text not in self.texts:
+            if len(self.texts) > 256:
+                self.texts.clear()
+            self.texts[text] = self.font.render(text, True, 'white')
+        return self.texts[text]
+
+    def update_hud(self, score: int, stats: list[tuple[str, str, tuple[float, float]]]) -> None:
+        """Rewrite the score and the given stats on the static layer if they have changed.
+
+        Each stat is its text, the Rect attribute to position it by and the position.
+        """
+
+        hud = (score, tuple(stats))
+        if hud == self.hud:
+            return
+        self.hud = hud
+
+        self.static.blit(self.maze, self.hud_rect, self.hud_rect)
+        self.letters.draw_score(self.static)
+        self.numbers.draw_score(self.static, score)
+        for text, anchor, position in stats:
+            surface = self.render_text(text)
+            self.static.blit(surface, surface.get_rect(**{anchor: position}))
+        self.dirty.append(self.hud_rect)
+
+    def begin_frame(
+        self,
+        pacdots: PacDots,
+        score: int,
+        stats: list[tuple[str, str, tuple[float, float]]] | None = None,
+    ) -> None:
+        """Bring the static layer up to date and restore the screen from it wherever it has been drawn on
+        or has changed."""
+
+        self.update_dots(pacdots)
+        self.update_hud(score, stats or [])
+
+        if self.full_update:
+            self.screen.blit(self.static, (0, 0))
+            return
+
+        for rect in self.last_drawn + self.dirty:
+            self.screen.blit(self.static, rect, rect)
+
+    def sprite_rect(self, position: object) -> pygame.Rect:
+        """Return a Rect covering a sprite drawn centred on the given position."""
+
+        rect = pygame.Rect(0, 0, 2 * self.tile_size, 2 * self.tile_size)
+        rect.center = to_pixels(position, self.tile_size)
+        return rect
+
+    def mark(self, rect: pygame.Rect) -> None:
+        """Record that the given area has been drawn on top of the static layer this frame."""
+
+        self.drawn.append(rect)
+
+    def end_frame(self) -> None:
+        """Push the areas that have changed to the display."""
+
+        if self.full_update:
+            pygame.display.flip()
+        else:
+            screen_rect = self.screen.get_rect()
+            pygame.display.update([rect.clip(screen_rect) for rect in self.last_drawn + self.dirty + self.drawn])
+
+        self.full_update = False
+        self.dirty = []
+        self.last_drawn = self.drawn
+        self.drawn = []
@@ -0,0 +1,166 @@
+import hashlib
+import random
+import sys
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, ContextManager, Hashable, Iterator
+
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.policy import genome_digest
+from pacman_ai_neat.settings import simulation_settings
+
+
+class _BoundRandom(threading.local):
+    """The Random bound to each thread (None if the thread uses the random module)."""
+
+    current: random.Random | None = None
+
+
+_bound = _BoundRandom()
+
+
+def current_random() -> random.Random:
+    """Return the Random that this thread's simulations draw from, the random module's own one if none
+    is bound."""
+
+    return _bound.current if _bound.current is not None else random._inst
+
+
+class _RandomProxy:
+    """Stands in for the random module in pacman_app, forwarding every call to the Random bound to the
+    calling thread."""
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(current_random(), name)
+
+
+def _forward(name: str) -> Callable:
+    """Return a function that calls the method of the given name of the calling thread's Random."""
+
+    def forwarded(*args, **kwargs) -> object:
+        return getattr(current_random(), name)(*args, **kwargs)
+
+    return forwarded
+
+
+_proxy = _RandomProxy()
+# The number of modules that had been imported the last time the proxy was installed
+_installed_at = 0
+
+
+def _uses_of_random(namespace: dict) -> list[str]:
+    """Return the names in the namespace bound to the random module or a method of its shared Random."""
+
+    return [
+        name for name, value in namespace.items()
+        if value is random or getattr(value, '__self__', None) is random._inst
+    ]
+
+
+def _install_proxy() -> None:
+    """Point pacman_app's uses of the random module at the Random bound to the calling thread, in every
+    pacman_app module imported since this was last done.
+
+    pacman_app draws from the random module directly and has no way to be given a Random, so its modules
+    are patched: a global bound to the random module is replaced with a _RandomProxy and a global bound to
+    a method of the random module's shared Random (as from random import choice gives) with a function
+    forwarding to the same method of the bound Random. Anything else holding on to the random module,
+    such as a class attribute, can't be patched, so an Exception is raised rather than let it draw from
+    the shared stream unnoticed.
+    """
+
+    global _installed_at
+    if len(sys.modules) == _installed_at:
+        return
+
+    for name, module in list(sys.modules.items()):
+        if name.partition('.')[0] != 'pacman_app' or module is None:
+            continue
+
+        namespace = vars(module)
+        for attribute in _uses_of_random(namespace):
+            value = namespace[attribute]
+            setattr(module, attribute, _proxy if value is random else _forward(value.__name__))
+
+        for value in list(namespace.values()):
+            if isinstance(value, type) and value.__module__ == name and _uses_of_random(vars(value)):
+                raise Exception(
+                    f'{name}.{value.__name__} holds on to the random module, so its draws would not come '
+                    f'from the bound Random'
+                )
+
+    _installed_at = len(sys.modules)
+
+
+@contextmanager
+def using_random(rng: random.Random) -> Iterator[random.Random]:
+    """Make everything this thread simulates draw from the given Random for the duration of the block.
+
+    pacman_app's Ghosts draw from the random module, which is shared by every thread, so this is how a
+    simulation is given its own stream (pacman_app is patched to draw from it, see _install_proxy).
+    """
+
+    _install_proxy()
+    previous = _bound.current
+    _bound.current = rng
+    try:
+        yield rng
+    finally:
+        _bound.current = previous
+
+
+def stream_seed(*key: Hashable) -> int:
+    """Return the seed of the random stream for the given key under simulation_settings['random_seed']."""
+
+    digest = hashlib.sha256(repr((simulation_settings['random_seed'], key)).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def seeded_random(seed: int) -> ContextManager[random.Random]:
+    """Draw from a Random seeded with the given seed for the duration of the block."""
+
+    return using_random(random.Random(seed))
+
+
+def random_stream(*key: Hashable) -> ContextManager[random.Random]:
+    """Draw from the random stream of the given key for the duration of the block."""
+
+    return seeded_random(stream_seed(*key))
+
+
+def simulation_key(pacman: Player) -> tuple:
+    """Return the key of the random stream seeded gives PacMan, which depends on his Genome and the
+    generation it is evaluated in so that no Genome plays the same stream every generation."""
+
+    return (pacman.evaluation, genome_digest(pacman.genome), 0)
+
+
+def episode_seed(pacman: Player) -> int:
+    """Return a seed for PacMan's next episode, the one seeded would give it if that applies and a new
+    random one otherwise."""
+
+    if simulation_settings['random_seed'] is not None and _bound.current is None:
+        return stream_seed(*simulation_key(pacman))
+
+    return current_random().getrandbits(64)
+
+
+def seeded(simulate: Callable[..., Player]) -> Callable[..., Player]:
+    """Give each call of the given simulator function a random stream determined by PacMan's Genome and
+    generation, if simulation_settings['random_seed'] is set and the call isn't already inside a random
+    stream.
+
+    A Genome then scores the same fitness however many processes or threads evaluate the generation and
+    in whatever order.
+    """
+
+    @wraps(simulate)
+    def seeded_simulate(pacman: Player, *args, **kwargs) -> Player:
+        if simulation_settings['random_seed'] is None or _bound.current is not None:
+            return simulate(pacman, *args, **kwargs)
+
+        with random_stream(*simulation_key(pacman)):
+            return simulate(pacman, *args, **kwargs)
+
+    return seeded_simulate
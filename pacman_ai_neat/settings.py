@@ -130,5 +130,129 @@ simulation_settings = {
 
     'max_stationary_count': 20,
     'max_famine_count': 2000,
+    # Choose whether PacMan looks up his moves in a table of each Genome's choices instead of propagating
+    # 'lazy' adds visions the first time they are seen, 'full' enumerates every vision before the first move
+    'policy_table': None,   # Options are [None, 'lazy', 'full']
+    # Choose whether PacMan only looks and thinks when his surroundings change, reusing his last move otherwise
+    # The number of skipped looks and thinks is added to the progress
+    'decision_points_only': False,
+    # Choose whether to end an episode as soon as PacMan is provably stuck in a loop (only in the only_dots phase, the only
+    # one in which nothing else moves)
+    'cycle_detection': False,
+    # How each generation is evaluated, None simulates the Players one after another in this process
+    # 'parallel' simulates the Players in a pool of worker processes
+    # 'lockstep' plays every game of the generation at once with array operations (only in the only_dots phase)
+    # 'prefix_sharing' plays Players as one game until their moves differ, adding the sharing ratio to the progress (only in
+    # the only_dots phase)
+    # 'adaptive_episodes' gives more episodes to Genomes near the selection cutoff (only in phases with Ghosts)
+    # 'successive_halving' plays everyone to each of the frame_caps but only the best past it (not with episodes, warm
+    # starts or recorded trajectories)
+    'evaluator': None,   # Options are [None, 'parallel', 'lockstep', 'prefix_sharing', 'adaptive_episodes', 'successive_halving']
+    # The number of worker processes to use when evaluating Players in parallel
+    'processes': None,  # Default = the number of CPUs
+    # Choose whether to remember the results of each Genome in deterministic phases rather than simulating it again
+    # The results are saved next to population_settings['save_folder'] and each generation's hits and misses are added
+    # to the progress
+    'fitness_cache': False,
+    # The number of results to remember before forgetting the least recently used
+    'fitness_cache_size': 100000,
+    # What to remember results by, 'policy' also shares results between Genomes whose moves are always the same
+    'fitness_cache_key': 'genome',   # Options are ['genome', 'policy']
+    # Seed from which each simulation with Ghosts gets its own random stream (determined by the Genome and generation)
+    # so fitness is reproducible and the same whether Players are evaluated serially or in parallel
+    'random_seed': None,    # Default = the Ghosts share the unseeded random module
+    # The number of episodes each Genome plays in phases with Ghosts, episode k is the same random stream for all Genomes
+    # of a generation and the mean score is added to the progress
+    'episodes': 1,
+    # The most episodes a Genome near the selection cutoff can be given by the adaptive_episodes evaluator
+    'max_episodes': None,   # Default = 4 * episodes
+    # The quantile of a Genome's episode fitnesses used as its fitness e.g. 0.25 to favour consistent Genomes
+    'episode_quantile': None,   # Default = the mean fitness is used
+    # The increasing frame caps a SuccessiveHalvingEvaluator plays everyone to before playing the best to the end
+    'frame_caps': None,  # e.g. [250, 1000], Default = [max_famine_count // 4]
+    # The fraction of the Players that carry on past each frame cap
+    'promotion_fraction': None,   # Default = 1 - population_settings['cull_percentage']
+    # The fraction of episodes that start from a game state harvested from earlier episodes rather than the beginning
+    'warm_start_fraction': 0,
+    # Game states are harvested every this many frames, if there are few enough PacDots remaining
+    'warm_start_interval': 100,
+    'warm_start_max_remaining': 60,
+    # The most game states kept to start from
+    'warm_start_pool_size': 1000,
+    # Choose whether to record the moves of an episode of every saved Genome so that Playback can replay it without the Genome
+    # The recordings are saved next to the phase's playback folder (not used with warm starts)
+    'record_trajectories': False,
 
-}
\ No newline at end of file
+}
+
+
+vision_settings = {
+
+    # The number of tiles PacMan can see in each cardinal direction
+    'ray_length': 5,
+    # The side length of the square of tiles PacMan can see in each ordinal direction
+    'ordinal_size': 3,
+    # Choose whether to answer PacMan's vision with integer bitmasks of the PacMaze instead of sets of tiles
+    'bitboards': False,
+    # Choose whether PacMan only computes the inputs, and only propagates through the Nodes, that can change
+    # the choice of his Genome
+    'lazy_vision': False,
+
+}
+
+
+win_finder_settings = {
+
+    # The saved Genome to find a winning seed for
+    'genome': 'playback/full_game/19/0/0.pickle',
+    # The number of worker processes searching seeds, each plays whole ranges of seeds
+    'processes': None,  # Default = the number of CPUs
+    # The number of consecutive seeds in each range handed to a worker
+    'shard_size': 100,
+    # Where the search records its progress so that it can be resumed if stopped
+    'checkpoint': 'playback/win_finder.json',
+    # Choose whether to play the start of the game that doesn't depend on the seed once, starting every seed from there
+    'fork_at_divergence': True,
+
+}
+
+
+race_settings = {
+
+    # The folder searched (including sub-folders) for saved Genomes to compare in the full game
+    'folder': 'playback/full_game',
+    # The number of seeds each remaining Genome plays per round, all Genomes play the same seeds
+    'seeds_per_round': 100,
+    # The most seeds any Genome plays
+    'max_seeds': 10000,
+    # What Genomes are compared by, a Genome is dropped once this is clearly worse than the leader's
+    'metric': 'dots_eaten',  # Options are ['dots_eaten', 'win_rate']
+    # The confidence level of the intervals used to compare Genomes
+    'confidence': 0.95,
+    # The number of worker processes playing seeds
+    'processes': None,  # Default = the number of CPUs
+    # Where the result of every game is saved so that running again only plays new games
+    'results': 'playback/race_results.sqlite',
+
+}
+
+
+export_settings = {
+
+    # The saved Genome to export an episode of, the phase is taken from its playback folder
+    'genome': 'playback/full_game/19/0/0.pickle',
+    # The random seed the episode is played with (e.g. one found by the WinFinder)
+    'seed': 0,
+    # Where to write the episode, a path ending in .gif writes an animated GIF (needs Pillow) and anything else is a
+    # folder of PNGs
+    'output': 'playback/export.gif',
+    # Only every this many frames is exported
+    'frame_step': 2,    # Default = 1
+    # The factor the frames are scaled by
+    'scale': 0.5,   # Default = 1
+    # The most frames played, as PacMan never dies in Phase.ONLY_DOTS
+    'max_frames': 20000,
+    # The number of worker processes encoding frames
+    'processes': None,  # Default = the number of CPUs
+
+}
@@ -1,43 +1,81 @@
+import math
+from typing import Callable
+
+from pacman_app import PacDots, Ghosts
+from pacman_app.map.direction import Direction
+
+from pacman_ai_neat.cycle_detector import CycleDetector
+from pacman_ai_neat.environment import Environment, resident_environment
 from pacman_ai_neat.player import Player
+from pacman_ai_neat.rng import seeded
 from pacman_ai_neat.settings import simulation_settings
-from pacman_app import PacDots, Fruit, Ghosts, Blinky, Pinky, Inky, Clyde
+from pacman_ai_neat.snapshot import PausedEpisode
 
 
-def only_dots(pacman: Player) -> Player:
-    """Run PacMan in the game with only PacDots.
-    
-    Runs until PacMan goes too long without eating a dot or stays still for too long.
-    Assigns a fitness that is a ratio between score^4 and time taken to achieve it.
+# The counters of a simulator function's loop: PacMan's lifespan, famine_count, stationary_count and prev_tile
+Counters = tuple[int, int, int, tuple[int,int]]
+
+
+def start_episode(pacman: Player, setup: Callable[[Environment], None] | None = None) -> tuple[Environment, Counters]:
+    """Return this process's Environment and the counters to play PacMan's episode from.
+
+    Carries on from PacMan's paused episode if it is one of his current Genome, otherwise resets PacMan and
+    the Environment's Dots, inactive Fruit and Ghosts for a new episode and applies setup to the Environment.
     """
 
+    episode, pacman.paused_episode = pacman.paused_episode, None
+    if episode is not None and episode.genome is pacman.genome:
+        return episode.resume(pacman)
+
     pacman.initialise()
+    pacman.prepare()
+    environment = resident_environment(pacman)
+    if setup is not None:
+        setup(environment)
+    return environment, (0, 0, 0, pacman.position.tile_pos)
 
-    # Dots
-    pacdots = PacDots()
 
-    # Set up inactive Fruit
-    fruit = Fruit()
+def leave_ghosts_inactive(environment: Environment) -> None:
+    """Make Blinky inactive like the other Ghosts, so that there are no Ghosts to see."""
 
-    # Set up inactive ghosts
-    blinky = Blinky(pacman)
-    pinky = Pinky(pacman)
-    inky = Inky(pacman)
-    clyde = Clyde(pacman)
-    ghosts = Ghosts(pacman, blinky, pinky, inky, clyde)
-    ghosts.initialise()
-    ghosts.blinky.inactive = True
+    environment.ghosts.blinky.inactive = True
+
+
+def hold_back_pinky(environment: Environment) -> None:
+    """Set the count that keeps Pinky in the Ghost house, so that Blinky is the only Ghost out."""
+
+    environment.ghosts.pinky.inactive_count = 51
+
+
+def only_dots(pacman: Player, frame_cap: int | None = None) -> Player:
+    """Run PacMan in the game with only PacDots.
+    
+    Runs until PacMan goes too long without eating a dot or stays still for too long.
+    Assigns a fitness that is a ratio between score^4 and time taken to achieve it.
+
+    If a frame_cap is given, stops once PacMan's lifespan reaches it and keeps a PausedEpisode so that
+    calling again (with a larger frame_cap) carries on from there.
+    """
+
+    # Carry on from the paused episode if there is one, otherwise start a new one
+    environment, (lifespan, famine_count, stationary_count, prev_tile) = start_episode(pacman, leave_ghosts_inactive)
+    pacdots = environment.pacdots
+    fruit = environment.fruit
+    ghosts = environment.ghosts
 
     # Run a loop until PacMan eats all Dots or takes too long to do so
-    lifespan = 0
-    famine_count = 0
-    stationary_count = 0
     MAX_FAMINE_COUNT = simulation_settings['max_famine_count']
     MAX_STATIONARY_COUNT = simulation_settings['max_stationary_count']
-    prev_tile = pacman.position.tile_pos
+    FRAME_CAP = frame_cap if frame_cap is not None else math.inf
+    cycle_detector = CycleDetector(pacman, pacdots) if simulation_settings['cycle_detection'] else None
     while famine_count < MAX_FAMINE_COUNT and stationary_count < MAX_STATIONARY_COUNT and pacman.score < 2000:
 
-        pacman.look(pacdots, fruit, ghosts)
-        move = pacman.think()
+        # Stop at the frame cap, keeping the episode to carry on with later
+        if lifespan >= FRAME_CAP:
+            pacman.paused_episode = PausedEpisode(pacman, environment, (lifespan, famine_count, stationary_count, prev_tile))
+            break
+
+        move = pacman.decide(pacdots, fruit, ghosts)
         pacman.move(move)
         lifespan += 1
 
@@ -56,51 +94,51 @@ def only_dots(pacman: Player) -> Player:
             stationary_count = 0
             prev_tile = pacman.position.tile_pos
 
+            # If PacMan has been here before without eating anything he will go round in circles until he starves
+            if cycle_detector and cycle_detector.repeated():
+                lifespan += MAX_FAMINE_COUNT - famine_count
+                famine_count = MAX_FAMINE_COUNT
+
     # Alter lifespans to be true lifespan
     if famine_count == MAX_FAMINE_COUNT:
         lifespan -= MAX_FAMINE_COUNT
     elif stationary_count == MAX_STATIONARY_COUNT:
         lifespan -= MAX_STATIONARY_COUNT
 
+    pacman.lifespan = lifespan
     pacman.fitness = (pacman.score // 10) ** 4 / (lifespan + 1000)
     return pacman
 
 
-def dots_and_blinky(pacman: Player) -> Player:
+@seeded
+def dots_and_blinky(pacman: Player, frame_cap: int | None = None) -> Player:
     """Run PacMan in the game with PacDots and just Blinky.
     
     Runs until PacMan dies, goes too long without eating a dot or stays still for too long.
     Assigns a fitness that is just the score PacMan achieves.
-    """
-
-    pacman.initialise()
-
-    # Dots
-    pacdots = PacDots()
 
-    # Set up inactive Fruit
-    fruit = Fruit()
+    If a frame_cap is given, stops once PacMan's lifespan reaches it and keeps a PausedEpisode so that
+    calling again (with a larger frame_cap) carries on from there.
+    """
 
-    # Set up inactive ghosts
-    blinky = Blinky(pacman)
-    pinky = Pinky(pacman)
-    inky = Inky(pacman)
-    clyde = Clyde(pacman)
-    ghosts = Ghosts(pacman, blinky, pinky, inky, clyde)
-    ghosts.initialise()
-    ghosts.pinky.inactive_count = 51
+    # Carry on from the paused episode if there is one, otherwise start a new one
+    environment, (lifespan, famine_count, stationary_count, prev_tile) = start_episode(pacman, hold_back_pinky)
+    pacdots = environment.pacdots
+    fruit = environment.fruit
+    ghosts = environment.ghosts
 
     # Run a loop until PacMan eats all Dots or takes too long to do so
-    lifespan = 0
-    famine_count = 0
-    stationary_count = 0
     MAX_FAMINE_COUNT = simulation_settings['max_famine_count']
     MAX_STATIONARY_COUNT = simulation_settings['max_stationary_count']
-    prev_tile = pacman.position.tile_pos
+    FRAME_CAP = frame_cap if frame_cap is not None else math.inf
     while famine_count < MAX_FAMINE_COUNT and stationary_count < MAX_STATIONARY_COUNT and not pacman.dead and pacman.score < 2400:
 
-        pacman.look(pacdots, fruit, ghosts)
-        move = pacman.think()
+        # Stop at the frame cap, keeping the episode to carry on with later
+        if lifespan >= FRAME_CAP:
+            pacman.paused_episode = PausedEpisode(pacman, environment, (lifespan, famine_count, stationary_count, prev_tile))
+            break
+
+        move = pacman.decide(pacdots, fruit, ghosts)
         pacman.move(move)
         lifespan += 1
 
@@ -138,44 +176,40 @@ def dots_and_blinky(pacman: Player) -> Player:
     elif stationary_count == MAX_STATIONARY_COUNT:
         lifespan -= MAX_STATIONARY_COUNT
 
+    pacman.lifespan = lifespan
     pacman.fitness = pacman.score
     return pacman
 
 
-def dots_and_two_ghosts(pacman: Player) -> Player:
+@seeded
+def dots_and_two_ghosts(pacman: Player, frame_cap: int | None = None) -> Player:
     """Run PacMan in the game with PacDots, Blinky and Pinky.
     
     Runs until PacMan dies, goes too long without eating a dot or stays still for too long.
     Assigns a fitness that is just the score PacMan achieves.
-    """
-
-    pacman.initialise()
 
-    # Dots
-    pacdots = PacDots()
-
-    # Set up inactive Fruit
-    fruit = Fruit()
+    If a frame_cap is given, stops once PacMan's lifespan reaches it and keeps a PausedEpisode so that
+    calling again (with a larger frame_cap) carries on from there.
+    """
 
-    # Set up inactive ghosts
-    blinky = Blinky(pacman)
-    pinky = Pinky(pacman)
-    inky = Inky(pacman)
-    clyde = Clyde(pacman)
-    ghosts = Ghosts(pacman, blinky, pinky, inky, clyde)
-    ghosts.initialise()
+    # Carry on from the paused episode if there is one, otherwise start a new one
+    environment, (lifespan, famine_count, stationary_count, prev_tile) = start_episode(pacman)
+    pacdots = environment.pacdots
+    fruit = environment.fruit
+    ghosts = environment.ghosts
 
     # Run a loop until PacMan eats all Dots or takes too long to do so
-    lifespan = 0
-    famine_count = 0
-    stationary_count = 0
     MAX_FAMINE_COUNT = simulation_settings['max_famine_count']
     MAX_STATIONARY_COUNT = simulation_settings['max_stationary_count']
-    prev_tile = pacman.position.tile_pos
+    FRAME_CAP = frame_cap if frame_cap is not None else math.inf
     while famine_count < MAX_FAMINE_COUNT and stationary_count < MAX_STATIONARY_COUNT and not pacman.dead and pacman.score < 2400:
 
-        pacman.look(pacdots, fruit, ghosts)
-        move = pacman.think()
+        # Stop at the frame cap, keeping the episode to carry on with later
+        if lifespan >= FRAME_CAP:
+            pacman.paused_episode = PausedEpisode(pacman, environment, (lifespan, famine_count, stationary_count, prev_tile))
+            break
+
+        move = pacman.decide(pacdots, fruit, ghosts)
         pacman.move(move)
         lifespan += 1
 
@@ -213,44 +247,40 @@ def dots_and_two_ghosts(pacman: Player) -> Player:
     elif stationary_count == MAX_STATIONARY_COUNT:
         lifespan -= MAX_STATIONARY_COUNT
 
+    pacman.lifespan = lifespan
     pacman.fitness = pacman.score
     return pacman
 
 
-def dots_and_ghosts(pacman: Player) -> Player:
+@seeded
+def dots_and_ghosts(pacman: Player, frame_cap: int | None = None) -> Player:
     """Run PacMan in the game with PacDots and Ghosts.
     
     Runs until PacMan dies, goes too long without eating a dot or stays still for too long.
     Assigns a fitness that is just the score PacMan achieves.
-    """
 
-    pacman.initialise()
-
-    # Dots
-    pacdots = PacDots()
-
-    # Set up inactive Fruit
-    fruit = Fruit()
+    If a frame_cap is given, stops once PacMan's lifespan reaches it and keeps a PausedEpisode so that
+    calling again (with a larger frame_cap) carries on from there.
+    """
 
-    # Set up inactive ghosts
-    blinky = Blinky(pacman)
-    pinky = Pinky(pacman)
-    inky = Inky(pacman)
-    clyde = Clyde(pacman)
-    ghosts = Ghosts(pacman, blinky, pinky, inky, clyde)
-    ghosts.initialise()
+    # Carry on from the paused episode if there is one, otherwise start a new one
+    environment, (lifespan, famine_count, stationary_count, prev_tile) = start_episode(pacman)
+    pacdots = environment.pacdots
+    fruit = environment.fruit
+    ghosts = environment.ghosts
 
     # Run a loop until PacMan eats all Dots or takes too long to do so
-    lifespan = 0
-    famine_count = 0
-    stationary_count = 0
     MAX_FAMINE_COUNT = simulation_settings['max_famine_count']
     MAX_STATIONARY_COUNT = simulation_settings['max_stationary_count']
-    prev_tile = pacman.position.tile_pos
+    FRAME_CAP = frame_cap if frame_cap is not None else math.inf
     while famine_count < MAX_FAMINE_COUNT and stationary_count < MAX_STATIONARY_COUNT and not pacman.dead and pacman.score < 2400:
 
-        pacman.look(pacdots, fruit, ghosts)
-        move = pacman.think()
+        # Stop at the frame cap, keeping the episode to carry on with later
+        if lifespan >= FRAME_CAP:
+            pacman.paused_episode = PausedEpisode(pacman, environment, (lifespan, famine_count, stationary_count, prev_tile))
+            break
+
+        move = pacman.decide(pacdots, fruit, ghosts)
         pacman.move(move)
         lifespan += 1
 
@@ -292,77 +322,89 @@ def dots_and_ghosts(pacman: Player) -> Player:
     elif stationary_count == MAX_STATIONARY_COUNT:
         lifespan -= MAX_STATIONARY_COUNT
 
+    pacman.lifespan = lifespan
     pacman.fitness = pacman.score
     return pacman
 
 
-def full_game(pacman: Player) -> Player:
+def full_game_frame(pacman: Player, move: Direction, pacdots: PacDots, ghosts: Ghosts) -> bool:
+    """Play a frame of Phase.FULL_GAME in which PacMan makes the given move and return True if he ate a
+    PacDot.
+
+    Playback replays episodes with this too, so that they follow the rules they were played by.
+    """
+
+    pacman.move(move)
+
+    # Update Ghosts
+    ghosts.move()
+    ghosts.check_collision()
+
+    # Update score
+    dots_changed = False
+    ate_pacdot = False
+    if pacdots.check_if_eaten(pacman):
+        dots_changed = True
+        ate_pacdot = True
+        pacman.score += 10
+        pacman.move_next = False
+    elif pacdots.check_if_powered(pacman):
+        dots_changed = True
+        pacman.score += 50
+        pacman.move_next = False
+        ghosts.frightened = True
+
+    # Check for PacDot checkpoints
+    if dots_changed:
+        if pacdots.remaining == 214:
+            ghosts.inky.inactive = False
+        elif pacdots.remaining == 184:
+            ghosts.clyde.inactive = False
+        elif pacdots.remaining == ghosts.blinky.elroy_first_threshold:
+            ghosts.blinky.elroy = 1
+        elif pacdots.remaining == ghosts.blinky.elroy_second_threshold:
+            ghosts.blinky.elroy = 2
+
+    return ate_pacdot
+
+
+@seeded
+def full_game(pacman: Player, frame_cap: int | None = None) -> Player:
     """Run PacMan in the game with PacDots, PowerDots and Ghosts.
     
     Runs until PacMan dies, goes too long without eating a dot or stays still for too long.
     Assigns a fitness that the number of dots eaten.
-    """
 
-    pacman.initialise()
-
-    # Dots
-    pacdots = PacDots()
-
-    # Set up inactive Fruit
-    fruit = Fruit()
+    If a frame_cap is given, stops once PacMan's lifespan reaches it and keeps a PausedEpisode so that
+    calling again (with a larger frame_cap) carries on from there.
+    """
 
-    # Set up inactive ghosts
-    blinky = Blinky(pacman)
-    pinky = Pinky(pacman)
-    inky = Inky(pacman)
-    clyde = Clyde(pacman)
-    ghosts = Ghosts(pacman, blinky, pinky, inky, clyde)
-    ghosts.initialise()
+    # Carry on from the paused episode if there is one, otherwise start a new one
+    environment, (lifespan, famine_count, stationary_count, prev_tile) = start_episode(pacman)
+    pacdots = environment.pacdots
+    fruit = environment.fruit
+    ghosts = environment.ghosts
 
     # Run a loop until PacMan eats all Dots or takes too long to do so
-    lifespan = 0
-    famine_count = 0
-    stationary_count = 0
     MAX_FAMINE_COUNT = simulation_settings['max_famine_count']
     MAX_STATIONARY_COUNT = simulation_settings['max_stationary_count']
-    prev_tile = pacman.position.tile_pos
+    FRAME_CAP = frame_cap if frame_cap is not None else math.inf
     while famine_count < MAX_FAMINE_COUNT and stationary_count < MAX_STATIONARY_COUNT and not pacman.dead:
 
-        pacman.look(pacdots, fruit, ghosts)
-        move = pacman.think()
-        pacman.move(move)
-        lifespan += 1
+        # Stop at the frame cap, keeping the episode to carry on with later
+        if lifespan >= FRAME_CAP:
+            pacman.paused_episode = PausedEpisode(pacman, environment, (lifespan, famine_count, stationary_count, prev_tile))
+            break
 
-        # Update Ghosts
-        ghosts.move()
-        ghosts.check_collision()
+        move = pacman.decide(pacdots, fruit, ghosts)
+        lifespan += 1
 
         # Update score/famine_count
-        dots_changed = False
-        if pacdots.check_if_eaten(pacman):
-            dots_changed = True
-            pacman.score += 10
-            pacman.move_next = False
+        if full_game_frame(pacman, move, pacdots, ghosts):
             famine_count = 0
-        elif pacdots.check_if_powered(pacman):
-            dots_changed = True
-            pacman.score += 50
-            pacman.move_next = False
-            ghosts.frightened = True
         else:
             famine_count += 1
 
-        # Check for PacDot checkpoints
-        if dots_changed:
-            if pacdots.remaining == 214:
-                ghosts.inky.inactive = False
-            elif pacdots.remaining == 184:
-                ghosts.clyde.inactive = False
-            elif pacdots.remaining == ghosts.blinky.elroy_first_threshold:
-                ghosts.blinky.elroy = 1
-            elif pacdots.remaining == ghosts.blinky.elroy_second_threshold:
-                ghosts.blinky.elroy = 2
-
         # Update stationary_count
         if pacman.position.tile_pos == prev_tile:
             stationary_count += 1
@@ -376,5 +418,6 @@ def full_game(pacman: Player) -> Player:
     elif stationary_count == MAX_STATIONARY_COUNT:
         lifespan -= MAX_STATIONARY_COUNT
 
+    pacman.lifespan = lifespan
     pacman.fitness = (244 - len(pacdots.dots | pacdots.power_dots)) * 10     #Still just the number of dots eaten)
     return pacman
\ No newline at end of file
@@ -0,0 +1,295 @@
+from copy import copy
+from enum import Enum
+
+from pacman_app import PacDots, Fruit, Ghosts
+
+from pacman_ai_neat.bitboard import tiles_mask, mask_tiles
+from pacman_ai_neat.environment import Environment, resident_environment
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.rng import current_random
+
+
+# Values of these types are stored as they are
+IMMUTABLE_TYPES = (type(None), bool, int, float, str, Enum)
+
+
+class _EntityReference:
+    """Stands in for a game entity referenced by another in a GameState, by its position in the game's
+    entities."""
+
+    __slots__ = ('index',)
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+
+class _Container:
+    """A stored list, set or dict, or a tuple holding anything other than immutable values."""
+
+    __slots__ = ('type', 'items')
+
+    def __init__(self, container_type: type, items: tuple) -> None:
+        self.type = container_type
+        self.items = items
+
+
+class _Fields:
+    """The stored attributes of an object other than a game entity (e.g. a position)."""
+
+    __slots__ = ('type', 'names', 'values')
+
+    def __init__(self, object_type: type, names: tuple[str, ...], values: tuple) -> None:
+        self.type = object_type
+        self.names = names
+        self.values = values
+
+
+def _store(value: object, indices: dict[int, int], keep: tuple[type, ...]) -> object:
+    """Return the given value in the form it is held in a GameState."""
+
+    if isinstance(value, IMMUTABLE_TYPES):
+        return value
+
+    if id(value) in indices:
+        return _EntityReference(indices[id(value)])
+
+    if keep and isinstance(value, keep):
+        return value
+
+    if isinstance(value, tuple):
+        if all(isinstance(item, IMMUTABLE_TYPES) for item in value):
+            return value
+        return _Container(tuple, tuple(_store(item, indices, keep) for item in value))
+
+    if isinstance(value, (list, set, frozenset)):
+        return _Container(type(value), tuple(_store(item, indices, keep) for item in value))
+
+    if isinstance(value, dict):
+        return _Container(dict, tuple((key, _store(item, indices, keep)) for key, item in value.items()))
+
+    if hasattr(value, '__dict__'):
+        return _Fields(type(value), *_store_fields(value, indices, keep))
+
+    return value
+
+
+def _store_fields(
+    obj: object,
+    indices: dict[int, int],
+    keep: tuple[type, ...],
+    exclude: frozenset[str] = frozenset(),
+) -> tuple[tuple[str, ...], tuple]:
+    """Return the names and stored values of the attributes of the given object, leaving out those in
+    exclude."""
+
+    names = tuple(name for name in vars(obj) if name not in exclude)
+    attributes = vars(obj)
+    return names, tuple(_store(attributes[name], indices, keep) for name in names)
+
+
+def _restored(stored: object, current: object, entities: tuple) -> object:
+    """Return the value held in a GameState as it was stored, reusing the current value of the attribute
+    where it is an object of the same type."""
+
+    if isinstance(stored, _EntityReference):
+        return entities[stored.index]
+
+    if isinstance(stored, _Fields):
+        obj = current if type(current) is stored.type else object.__new__(stored.type)
+        _restore_fields(obj, stored.names, stored.values, entities)
+        return obj
+
+    if isinstance(stored, _Container):
+        if stored.type is dict:
+            return {key: _restored(item, None, entities) for key, item in stored.items}
+        return stored.type(_restored(item, None, entities) for item in stored.items)
+
+    return stored
+
+
+def _restore_fields(obj: object, names: tuple[str, ...], values: tuple, entities: tuple) -> None:
+    """Assign the stored values to the attributes of the given object."""
+
+    attributes = vars(obj)
+    for name, value in zip(names, values):
+        attributes[name] = _restored(value, attributes.get(name), entities)
+
+
+class GameState:
+    """A compact snapshot of a game mid-episode, including the state of the Random the Ghosts draw from.
+
+    Each entity's fields (PacMan's position, direction, score and counters, the Ghosts' positions, modes,
+    timers and elroy levels, the Fruit's countdowns) are held as a flat tuple of values, with the remaining
+    PacDots and PowerDots as bitmasks. References from one entity to another (e.g. a Ghost's PacMan) are
+    held as the index of the entity, so a GameState can be restored any number of times and into any game,
+    which lets a game be rewound or forked. Restoring assigns the values back to the entities' attributes,
+    reusing the objects already there (e.g. positions) where they have the same type.
+
+    PacMan's transient attributes (e.g. his Genome) are not held. Objects of the types in keep (e.g. the
+    Surfaces of sprites) are referenced rather than stored. The random state is the current Random's
+    unless one taken earlier is given.
+    """
+
+    def __init__(
+        self,
+        pacman: Player,
+        pacdots: PacDots,
+        fruit: Fruit,
+        ghosts: Ghosts,
+        keep: tuple[type, ...] = (),
+        random_state: tuple | None = None,
+    ) -> None:
+        indices = {}
+        for i, entity in enumerate(self.entities(pacman, pacdots, fruit, ghosts)):
+            indices.setdefault(id(entity), i)
+
+        self.pacman = _store_fields(pacman, indices, keep, pacman.transient_attributes)
+        self.pacdots = _store_fields(pacdots, indices, keep, frozenset(('dots', 'power_dots')))
+        self.fruit = _store_fields(fruit, indices, keep)
+        self.ghosts = _store_fields(ghosts, indices, keep)
+        self.each_ghost = tuple(_store_fields(ghost, indices, keep) for ghost in ghosts)
+        self.dots = tiles_mask(pacdots.dots)
+        self.power_dots = tiles_mask(pacdots.power_dots)
+        self.random_state = random_state if random_state is not None else current_random().getstate()
+
+    @staticmethod
+    def entities(pacman: Player, pacdots: PacDots, fruit: Fruit, ghosts: Ghosts) -> tuple:
+        """Return the entities of the given game, including the PacMan the Ghosts are chasing (which is
+        PacMan himself in every game but a Playback of many Players)."""
+
+        return (pacman, pacdots, fruit, ghosts, ghosts.pacman, *ghosts)
+
+    @property
+    def remaining(self) -> int:
+        """Return the number of PacDots and PowerDots left to eat."""
+
+        return self.dots.bit_count() + self.power_dots.bit_count()
+
+    def restore(self, pacman: Player, pacdots: PacDots, fruit: Fruit, ghosts: Ghosts) -> None:
+        """Put the given game into this state.
+
+        PacMan keeps his transient attributes (e.g. his Genome), except that his last decision and his
+        Bitboard's PacDot masks are forgotten.
+        """
+
+        entities = self.entities(pacman, pacdots, fruit, ghosts)
+
+        _restore_fields(pacman, *self.pacman, entities)
+        pacman.surroundings = None
+        if pacman.bitboard is not None:
+            pacman.bitboard.pacdots = None
+        _restore_fields(pacdots, *self.pacdots, entities)
+        pacdots.dots = mask_tiles(self.dots)
+        pacdots.power_dots = mask_tiles(self.power_dots)
+        _restore_fields(fruit, *self.fruit, entities)
+        _restore_fields(ghosts, *self.ghosts, entities)
+        for ghost, (names, values) in zip(ghosts, self.each_ghost):
+            _restore_fields(ghost, names, values, entities)
+        current_random().setstate(self.random_state)
+
+
+class PacManState:
+    """A snapshot of PacMan alone (except his transient attributes), for Players that are moved about
+    without a game around them."""
+
+    def __init__(self, pacman: Player) -> None:
+        self.fields = _store_fields(pacman, {id(pacman): 0}, (), pacman.transient_attributes)
+
+    def restore(self, pacman: Player) -> None:
+        """Put the given PacMan into this state."""
+
+        _restore_fields(pacman, *self.fields, (pacman,))
+
+
+class PausedEpisode:
+    """An episode of a simulator function stopped at a frame cap, along with the simulator's counters, so
+    that it can be carried on in this process's Environment.
+
+    The game is left where it is in the Environment and only saved as a GameState when the Environment is
+    needed for another episode (or the episode is kept elsewhere), so carrying on straight away with the
+    same PacMan costs nothing.
+
+    The counters start with PacMan's lifespan. His score and lifespan are carried on with as they were
+    paused, unless the episode is handed to another PacMan with different ones.
+    """
+
+    def __init__(self, pacman: Player, environment: Environment, counters: tuple) -> None:
+        self.genome = pacman.genome
+        self.pacman = pacman
+        self.environment = environment
+        self.counters = counters
+        self.score = pacman.score
+        self.random_state = current_random().getstate()
+        self.state: GameState | None = None
+        environment.paused_episode = self
+
+    @property
+    def live(self) -> bool:
+        """Return whether the game is still in the Environment as it was paused."""
+
+        return self.environment is not None and self.environment.paused_episode is self
+
+    @property
+    def remaining(self) -> int:
+        """Return the number of PacDots and PowerDots left to eat."""
+
+        if self.state is not None:
+            return self.state.remaining
+        pacdots = self.environment.pacdots
+        return len(pacdots.dots) + len(pacdots.power_dots)
+
+    def save(self) -> None:
+        """Save the game as a GameState, leaving the Environment free for other episodes."""
+
+        if self.state is None:
+            environment = self.environment
+            self.state = GameState(
+                self.pacman, environment.pacdots, environment.fruit, environment.ghosts, random_state=self.random_state
+            )
+        self.discard()
+
+    def discard(self) -> None:
+        """Let go of the Environment and PacMan, without saving the game if it hasn't been already."""
+
+        if self.live:
+            self.environment.paused_episode = None
+        self.pacman = None
+        self.environment = None
+
+    @property
+    def lifespan(self) -> int:
+        """Return PacMan's lifespan when the episode was paused."""
+
+        return self.counters[0]
+
+    def handed_to(self, pacman: Player, score: int | None = None, lifespan: int | None = None) -> 'PausedEpisode':
+        """Return a copy of this episode that the given PacMan's Genome carries on with, from the given score
+        and lifespan if they are given."""
+
+        self.save()
+        episode = copy(self)
+        episode.genome = pacman.genome
+        if score is not None:
+            episode.score = score
+        if lifespan is not None:
+            episode.counters = (lifespan, *self.counters[1:])
+        return episode
+
+    def resume(self, pacman: Player) -> tuple[Environment, tuple]:
+        """Put this process's Environment and the given PacMan back into the paused state and return the
+        Environment with the counters."""
+
+        if self.live and pacman is self.pacman:
+            environment = self.environment
+            self.discard()
+            current_random().setstate(self.random_state)
+            return environment, self.counters
+
+        environment = resident_environment(pacman, new_episode=False)
+        self.state.restore(pacman, environment.pacdots, environment.fruit, environment.ghosts)
+        pacman.score = self.score
+        return environment, self.counters
+
+    def __getstate__(self) -> dict:
+        self.save()
+        return self.__dict__
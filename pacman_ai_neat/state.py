@@ -0,0 +1,36 @@
+from enum import Enum
+from typing import Hashable
+
+
+def freeze(value: object, shared: dict[int, int]) -> Hashable:
+    """Return a hashable copy of the given value, recursing into the attributes of objects.
+
+    Objects whose ids are keys of shared are replaced by their value in shared instead, so that
+    references between game entities are not followed.
+    """
+
+    if value is None or isinstance(value, (bool, int, float, str, Enum)):
+        return value
+
+    if id(value) in shared:
+        return ('shared', shared[id(value)])
+
+    if isinstance(value, (tuple, list)):
+        return tuple(freeze(item, shared) for item in value)
+
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item, shared) for item in value)
+
+    if isinstance(value, dict):
+        return tuple((key, freeze(item, shared)) for key, item in value.items())
+
+    if hasattr(value, '__dict__'):
+        return (type(value).__name__, freeze_attributes(value, shared))
+
+    return value
+
+
+def freeze_attributes(obj: object, shared: dict[int, int], exclude: frozenset[str] = frozenset()) -> Hashable:
+    """Return a hashable copy of the attributes of the given object, leaving out those in exclude."""
+
+    return tuple((name, freeze(value, shared)) for name, value in vars(obj).items() if name not in exclude)
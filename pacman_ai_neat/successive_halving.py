@@ -0,0 +1,57 @@
+import math
+from typing import Callable
+
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.settings import population_settings, simulation_settings
+
+
+class SuccessiveHalvingEvaluator:
+    """Evaluates a whole generation with increasing frame caps, only carrying on with the best Players
+    each time.
+
+    Every Player is first simulated up to the first frame cap. The best promotion_fraction of all the
+    Players are then carried on from where they were paused to the next cap, and so on, with the last
+    round having no cap. Players that were not promoted keep the fitness they had when they were paused,
+    while the fitness of every Player that reaches the end is exactly what a full simulation gives.
+
+    Paused games stay in this process's Environment until it is needed for the next Player, so only the
+    episodes that are set aside are saved and the last Player of each round carries on where it is.
+    """
+
+    def __init__(
+        self,
+        simulate: Callable[..., Player],
+        frame_caps: list[int] | None = None,
+        promotion_fraction: float | None = None,
+    ) -> None:
+        self.simulate = simulate
+        self.frame_caps = frame_caps or simulation_settings['frame_caps'] or [simulation_settings['max_famine_count'] // 4]
+        self.promotion_fraction = (
+            promotion_fraction or simulation_settings['promotion_fraction'] or 1 - (population_settings['cull_percentage'] or 0.5)
+        )
+
+    def evaluate(self, players: list[Player]) -> list[Player]:
+        """Simulate all the given Players, setting their fitness in place and returning them."""
+
+        for pacman in players:
+            pacman.paused_episode = None
+
+        promoted = players
+        for frame_cap in [*self.frame_caps, None]:
+            for pacman in promoted:
+                self.simulate(pacman, frame_cap=frame_cap)
+
+            # Only Players in the top fraction whose episodes haven't finished need carrying on
+            ranked = sorted(players, key = lambda pacman: pacman.fitness, reverse=True)
+            promoted = [
+                pacman for pacman in ranked[:math.ceil(self.promotion_fraction * len(players))]
+                if pacman.paused_episode is not None
+            ]
+
+        # Don't keep the game states of Players that were left behind
+        for pacman in players:
+            if pacman.paused_episode is not None:
+                pacman.paused_episode.discard()
+            pacman.paused_episode = None
+
+        return players
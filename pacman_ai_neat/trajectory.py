@@ -0,0 +1,205 @@
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Callable
+
+from pacman_app.map.direction import Direction
+from neat.genome import Genome
+
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.policy import genome_digest
+from pacman_ai_neat.rng import episode_seed, seeded_random
+
+
+# Moves are recorded by their index in this tuple, which must fit in the 2 bits a MoveLog gives it
+DIRECTIONS = tuple(Direction)
+assert len(DIRECTIONS) == 4, 'A MoveLog packs each move into 2 bits, so there must be exactly four Directions'
+
+
+def store_path(playback_folder: str) -> Path:
+    """Return the path of the TrajectoryStore for the phase whose Genomes are saved in the given folder."""
+
+    folder = Path(playback_folder)
+    return folder.parent / f'{folder.name}_trajectories.sqlite'
+
+
+class MoveLog:
+    """The move PacMan made in each frame of an episode along with the seed the random module was given at
+    its start, which is everything needed to replay the episode without his Genome.
+
+    Moves are kept as runs of the same move, and encoded as the seed followed by a varint of 
+    (run length << 2 | move) for each run, so a whole episode takes a few hundred bytes.
+    """
+
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+        self.runs: list[list[int]] = []
+        self.moves: bytearray | None = None
+
+    def append(self, move: Direction) -> None:
+        """Record the move made in the next frame."""
+
+        index = DIRECTIONS.index(move)
+        if self.runs and self.runs[-1][0] == index:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([index, 1])
+
+    def encode(self) -> bytes:
+        """Return the log as bytes."""
+
+        data = bytearray(struct.pack('<Q', self.seed))
+        for index, length in self.runs:
+            value = length << 2 | index
+            while value >= 0x80:
+                data.append(value & 0x7f | 0x80)
+                value >>= 7
+            data.append(value)
+
+        return bytes(data)
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'MoveLog':
+        """Return the MoveLog encoded in the given bytes."""
+
+        move_log = cls(struct.unpack_from('<Q', data)[0])
+        value = 0
+        shift = 0
+        for byte in data[8:]:
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                move_log.runs.append([value & 3, value >> 2])
+                value = 0
+                shift = 0
+
+        return move_log
+
+    def __len__(self) -> int:
+        return sum(length for _, length in self.runs)
+
+    def __getitem__(self, frame: int) -> Direction:
+        """Return the move made in the given frame."""
+
+        # Expand the runs on first lookup
+        if self.moves is None:
+            self.moves = bytearray()
+            for index, length in self.runs:
+                self.moves.extend(bytes((index,)) * length)
+
+        return DIRECTIONS[self.moves[frame]]
+
+
+class TrajectoryStore:
+    """The MoveLog of an episode of each saved Genome of a phase, saved to disk by Genome content.
+
+    Recording a Genome again replaces its MoveLog, so a Genome saved in several generations is replayed
+    from its latest episode.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Return this process's connection to the database, creating the table if needed."""
+
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute('CREATE TABLE IF NOT EXISTS trajectories (key TEXT PRIMARY KEY, log BLOB)')
+            self._connection.commit()
+        return self._connection
+
+    def get(self, key: str) -> MoveLog | None:
+        """Return the MoveLog recorded for the given key (None if there isn't one)."""
+
+        row = self.connection.execute('SELECT log FROM trajectories WHERE key = ?', (key,)).fetchone()
+        return MoveLog.decode(row[0]) if row is not None else None
+
+    def put(self, key: str, move_log: MoveLog) -> None:
+        """Record the given MoveLog for the given key."""
+
+        self.put_many([(key, move_log)])
+
+    def put_many(self, items: list[tuple[str, MoveLog]]) -> None:
+        """Record each of the given MoveLogs for its key, in a single transaction."""
+
+        if not items:
+            return
+
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO trajectories VALUES (?, ?)', ((key, move_log.encode()) for key, move_log in items)
+        )
+        self.connection.commit()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
+
+
+class RecordingSimulator:
+    """Wraps a simulator function so that each episode is recorded as PacMan's move_log.
+
+    Each episode draws from a Random seeded with the seed the simulator would have used (or a new random
+    one), so that the seed can be recorded with the moves. Which logs are kept is left to a
+    TrajectoryRecorder.
+    """
+
+    def __init__(self, simulate: Callable[[Player], Player]) -> None:
+        self.simulate = simulate
+
+    def __call__(self, pacman: Player) -> Player:
+        pacman.move_log = MoveLog(episode_seed(pacman))
+        with seeded_random(pacman.move_log.seed):
+            self.simulate(pacman)
+
+        return pacman
+
+
+class TrajectoryRecorder:
+    """Stores the MoveLogs of the Genomes neat saves for Playback in a TrajectoryStore.
+
+    Called with the Players of each evaluation (as a listener of a BatchedSimulator), it takes their
+    move_logs and stores those of the Genomes found in any generation folder saved since it was last
+    called. neat saves a generation's Genomes after evaluating it, so store_saved must also be called once
+    the run is over to store the last generation's.
+    """
+
+    def __init__(self, store: TrajectoryStore, playback_folder: str) -> None:
+        self.store = store
+        self.folder = Path(playback_folder)
+        self.logs: dict[str, MoveLog] = {}
+        self.stored_generations = set(self.generations())
+
+    def generations(self) -> list[Path]:
+        """Return the generation folders saved in the playback folder."""
+
+        if not self.folder.is_dir():
+            return []
+        return [path for path in self.folder.iterdir() if path.is_dir() and path.name.isdigit()]
+
+    def store_saved(self) -> None:
+        """Store the MoveLogs of the Genomes saved in generation folders that haven't been looked at yet."""
+
+        items = []
+        for generation in self.generations():
+            if generation in self.stored_generations:
+                continue
+            self.stored_generations.add(generation)
+            for path in generation.rglob('*.pickle'):
+                key = genome_digest(Genome.load(path))
+                if key in self.logs:
+                    items.append((key, self.logs[key]))
+
+        self.store.put_many(items)
+
+    def __call__(self, players: list[Player]) -> None:
+        self.store_saved()
+        self.logs = {}
+        for pacman in players:
+            if pacman.move_log is not None:
+                self.logs[genome_digest(pacman.genome)] = pacman.move_log
+                pacman.move_log = None
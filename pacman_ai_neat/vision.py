@@ -0,0 +1,72 @@
+from functools import cache
+
+from pacman_app.map import MAP, Tile
+from pacman_app.map.direction import Direction, Vector
+
+from pacman_ai_neat.settings import vision_settings
+
+
+RAY_LENGTH = vision_settings['ray_length']
+ORDINAL_SIZE = vision_settings['ordinal_size']
+
+
+def in_bounds(tile: tuple[int,int]) -> bool:
+    """Return True if the given tile is in the PacMaze."""
+
+    if tile[0] < 2 or tile[0] > 27 or tile[1] < 4 or tile[1] > 32:
+        return False
+
+    return True
+
+
+def clockwise(direction: Direction) -> Direction:
+    """Return the Direction 90 degrees clockwise from the given one."""
+
+    return Direction(Vector(-direction.value.d_y, direction.value.d_x))
+
+
+@cache
+def perspective_of(direction: Direction) -> tuple[Direction, ...]:
+    """Return the Directions corresponding to forward, right, back and left when facing the given
+    Direction."""
+
+    directions = [direction]
+    for _ in range(3):
+        directions.append(clockwise(directions[-1]))
+    return tuple(directions)
+
+
+@cache
+def sight_line(tile: tuple[int,int], direction: Direction) -> tuple[tuple[tuple[int,int], ...], bool]:
+    """Return the tiles seen looking RAY_LENGTH tiles from the given tile in the given direction, and
+    whether the line of sight leaves the PacMaze.
+
+    The tiles stop at the first wall or the edge of the PacMaze (only happens in the tunnel), neither of
+    which are included.
+    """
+
+    tiles = []
+    for i in range(1, RAY_LENGTH + 1):
+        next_tile = (tile[0] + i*direction.value.d_x, tile[1] + i*direction.value.d_y)
+
+        if not in_bounds(next_tile):
+            return tuple(tiles), True
+
+        if MAP[next_tile] == Tile.WALL:
+            break
+
+        tiles.append(next_tile)
+
+    return tuple(tiles), False
+
+
+@cache
+def ordinal_offsets(direction: Direction) -> frozenset[tuple[int,int]]:
+    """Return the offsets from PacMan's tile of the ORDINAL_SIZE x ORDINAL_SIZE square of tiles in the
+    direction 45 degrees clockwise from the given direction."""
+
+    orthog_direction = clockwise(direction)
+    return frozenset((
+        i*(direction.value.d_x + orthog_direction.value.d_x),
+        j*(direction.value.d_y + orthog_direction.value.d_y)
+    ) for i in range(1, ORDINAL_SIZE + 1) for j in range(1, ORDINAL_SIZE + 1))
@@ -0,0 +1,105 @@
+import random
+from typing import Callable
+
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.rng import stream_seed
+from pacman_ai_neat.settings import simulation_settings
+from pacman_ai_neat.snapshot import PausedEpisode
+
+
+class StatePool:
+    """Paused episodes harvested from earlier episodes, grouped by the number of PacDots remaining.
+
+    Each group holds an equal share of the pool as a uniform sample of every episode offered to it, so
+    only the episodes that are kept are saved. Sampling picks a group uniformly so every stage of the
+    endgame is started from equally often. Each group also keeps the mean score and lifespan of every
+    episode offered to it, which warm starts carry on from.
+    """
+
+    def __init__(self, size: int, max_remaining: int) -> None:
+        self.group_size = max(1, size // max_remaining)
+        self.max_remaining = max_remaining
+        self.groups: dict[int, list[PausedEpisode]] = {}
+        # The number of episodes offered to each group and their total score and lifespan
+        self.offered: dict[int, tuple[int, int, int]] = {}
+        self.random = random.Random(stream_seed('warm_start') if simulation_settings['random_seed'] is not None else None)
+
+    def add(self, episode: PausedEpisode) -> None:
+        """Keep (and so save) the given episode if there are few enough PacDots remaining and it is drawn
+        into its group's sample."""
+
+        remaining = episode.remaining
+        if remaining > self.max_remaining:
+            return
+
+        count, score, lifespan = self.offered.get(remaining, (0, 0, 0))
+        self.offered[remaining] = (count + 1, score + episode.score, lifespan + episode.lifespan)
+
+        group = self.groups.setdefault(remaining, [])
+        if len(group) < self.group_size:
+            episode.save()
+            group.append(episode)
+        elif (i := self.random.randrange(count + 1)) < self.group_size:
+            episode.save()
+            group[i] = episode
+
+    def baseline(self, remaining: int) -> tuple[int, int]:
+        """Return the mean score and lifespan of the episodes offered with the given number of PacDots
+        remaining."""
+
+        count, score, lifespan = self.offered[remaining]
+        return round(score / count), round(lifespan / count)
+
+    def sample(self) -> PausedEpisode:
+        """Return a random episode from a random group."""
+
+        return self.random.choice(self.random.choice(list(self.groups.values())))
+
+    def __len__(self) -> int:
+        return sum(len(group) for group in self.groups.values())
+
+
+class WarmStartSimulator:
+    """Wraps the simulator function of a phase so that some episodes start near the end of the game.
+
+    Episodes that start from the beginning are played in stretches of simulation_settings['warm_start_interval']
+    frames, adding the state between stretches to a StatePool when there are few enough PacDots remaining.
+    A warm_start_fraction of episodes instead carry on from a state in the pool. Rather than the score and
+    lifespan of the episode the state was harvested from (which another Genome earned), they carry on from
+    the pool's mean score and lifespan for that number of PacDots remaining, so the fitness is on the same
+    scale as that of a whole episode and only depends on the state drawn through the stage of the game.
+    """
+
+    def __init__(self, simulate: Callable[..., Player]) -> None:
+        self.simulate = simulate
+        self.fraction = simulation_settings['warm_start_fraction']
+        self.interval = simulation_settings['warm_start_interval']
+        self.pool = StatePool(simulation_settings['warm_start_pool_size'], simulation_settings['warm_start_max_remaining'])
+
+    def warm_start(self, pacman: Player) -> Player:
+        """Simulate PacMan from a state in the pool."""
+
+        pacman.initialise()
+        pacman.prepare()
+        episode = self.pool.sample()
+        pacman.paused_episode = episode.handed_to(pacman, *self.pool.baseline(episode.remaining))
+        return self.simulate(pacman)
+
+    def harvest(self, pacman: Player) -> Player:
+        """Simulate PacMan from the beginning, harvesting states along the way."""
+
+        pacman.paused_episode = None
+        frame_cap = self.interval
+        self.simulate(pacman, frame_cap=frame_cap)
+        while pacman.paused_episode is not None:
+            self.pool.add(pacman.paused_episode)
+            frame_cap += self.interval
+            self.simulate(pacman, frame_cap=frame_cap)
+
+        return pacman
+
+    def __call__(self, pacman: Player) -> Player:
+        if self.pool and self.pool.random.random() < self.fraction:
+            return self.warm_start(pacman)
+
+        return self.harvest(pacman)
@@ -1,9 +1,18 @@
+import json
+import os
 import random
+import time
+from multiprocessing import Pool
 from pathlib import Path
 
 from neat.genome import Genome
 from pacman_app import PacDots, Fruit, Ghosts, Blinky, Pinky, Inky, Clyde
-from pacman_ai_neat.player import Player
+from pacman_ai_neat.network import compile_tables
+from pacman_ai_neat.player import Player, ALL_INPUTS
+from pacman_ai_neat.policy import PolicyTable, used_inputs, vision_space
+from pacman_ai_neat.rng import using_random
+from pacman_ai_neat.settings import vision_settings, win_finder_settings
+from pacman_ai_neat.snapshot import GameState
 
 
 class WinFinder:
@@ -11,12 +20,22 @@ class WinFinder:
     different random seeds until a win is found.
     
     Prints the seeds and the number of PacDots eaten.
+
+    If win_finder_settings['fork_at_divergence'] is set, the frames before the random module is first used
+    (which are the same for every seed) are only played once, and each seed is played from a GameState
+    saved at that point.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, genome_path: Path = Path(win_finder_settings['genome'])) -> None:
                 
         self.pacman = Player({})
-        self.pacman.genome = Genome.load(Path('playback/full_game/19/0/0.pickle'))
+        self.pacman.genome = Genome.load(genome_path)
+
+        # Every game looks up its moves in the same table, compiled for every vision at once, and only
+        # computes the inputs it needs if vision_settings['lazy_vision'] is set
+        self.policy_table = PolicyTable(self.pacman.genome)
+        compile_tables([self.policy_table], vision_space())
+        self.used_inputs = used_inputs(self.pacman.genome) if vision_settings['lazy_vision'] else ALL_INPUTS
 
         # Ghosts set up
         blinky = Blinky(self.pacman)
@@ -32,6 +51,15 @@ class WinFinder:
         # Fruit set up
         self.fruit = Fruit()
 
+        # The Ghosts draw from this WinFinder's own Random
+        self.random = random.Random()
+
+        # Play the frames shared by every seed
+        self.divergence: GameState | None = None
+        self.deterministic_dots_eaten: int | None = None
+        if win_finder_settings['fork_at_divergence']:
+            self.find_divergence()
+
     def initialise_ghosts(self) -> None:
         """Initialise the Ghosts and ensure that they are referencing current self.pacman."""
 
@@ -44,6 +72,8 @@ class WinFinder:
         """Prepare a new episode for all game entities."""
 
         self.pacman.initialise()
+        self.pacman.policy_table = self.policy_table
+        self.pacman.used_inputs = self.used_inputs
         self.initialise_ghosts()
         self.pacdots = PacDots()
         self.fruit.available = False
@@ -51,8 +81,7 @@ class WinFinder:
     def advance_pacman(self) -> None:
         """Advance PacMan one frame."""
 
-        self.pacman.look(self.pacdots, self.fruit, self.ghosts)
-        move = self.pacman.think()
+        move = self.pacman.decide(self.pacdots, self.fruit, self.ghosts)
         self.pacman.move(move)
 
     def advance_ghosts(self) -> None:
@@ -147,6 +176,58 @@ class WinFinder:
         while not self.pacman.dead:
             self.advance()
 
+    def dots_eaten(self) -> int:
+        """Return the number of PacDots and PowerDots eaten in the current game."""
+
+        return 244 - len(self.pacdots.dots | self.pacdots.power_dots)
+
+    def find_divergence(self) -> None:
+        """Find the first frame in which the random module is used and save the GameState at its start.
+
+        If the game ends without using the random module then every seed plays the same game and only its
+        result is kept.
+        """
+
+        with using_random(self.random):
+            self.random.seed(0)
+            initial_random_state = self.random.getstate()
+            self.new_episode()
+            if self.random.getstate() != initial_random_state:
+                return
+
+            frames = 0
+            while not self.pacman.dead:
+                self.advance()
+                if self.random.getstate() != initial_random_state:
+                    break
+                frames += 1
+            else:
+                self.deterministic_dots_eaten = self.dots_eaten()
+                return
+
+            # Replay up to the start of the frame that used the random module
+            self.new_episode()
+            for _ in range(frames):
+                self.advance()
+            self.divergence = GameState(self.pacman, self.pacdots, self.fruit, self.ghosts)
+
+    def play_seed(self, seed: int) -> int:
+        """Play the full game with the given random seed and return the number of PacDots eaten."""
+
+        if self.deterministic_dots_eaten is not None:
+            return self.deterministic_dots_eaten
+
+        with using_random(self.random):
+            if self.divergence is not None:
+                self.divergence.restore(self.pacman, self.pacdots, self.fruit, self.ghosts)
+                self.random.seed(seed)
+            else:
+                self.random.seed(seed)
+                self.new_episode()
+
+            self.run_game()
+        return self.dots_eaten()
+
     def find_seed(self) -> None:
         """Iterate through games with different random seeds until a win occurs."""
 
@@ -154,16 +235,138 @@ class WinFinder:
         dots_eaten = 0
         best = 0
         while dots_eaten < 244:
-            random.seed(seed)
-            self.new_episode()
-            self.run_game()
-            dots_eaten = 244 - len(self.pacdots.dots | self.pacdots.power_dots)
+            dots_eaten = self.play_seed(seed)
             if dots_eaten > best:
                 best = dots_eaten
                 print(f'{seed = }, dots eaten = {best}')
             seed += 1
 
 
+# The WinFinder kept by each worker process
+_win_finder: WinFinder | None = None
+
+
+def _initialise_worker(genome_path: Path) -> None:
+    """Create the WinFinder this worker will reuse for every range of seeds it is sent."""
+
+    global _win_finder
+    _win_finder = WinFinder(genome_path)
+
+
+def _play_shard(shard: int) -> tuple[int, list[int]]:
+    """Play every seed in the given shard and return the shard with the PacDots eaten for each seed."""
+
+    shard_size = win_finder_settings['shard_size']
+    start = shard * shard_size
+    return shard, [_win_finder.play_seed(seed) for seed in range(start, start + shard_size)]
+
+
+class SeedSearch:
+    """Searches for a winning seed of the best saved Genome with a WinFinder in each of a pool of worker
+    processes.
+
+    Seeds are handed out in shards of consecutive seeds. Each game seeds the Random of the worker's
+    WinFinder, so every seed plays out exactly as it would in WinFinder.find_seed. Finished shards are
+    recorded in a checkpoint file so a stopped search resumes where it left off.
+
+    Prints the seeds and the number of PacDots eaten, along with the number of games played per second.
+    """
+
+    def __init__(
+        self,
+        genome_path: Path = Path(win_finder_settings['genome']),
+        checkpoint_path: Path = Path(win_finder_settings['checkpoint']),
+        processes: int | None = None,
+    ) -> None:
+        self.genome_path = genome_path
+        self.checkpoint_path = checkpoint_path
+        self.processes = processes or win_finder_settings['processes'] or os.cpu_count()
+        self.shard_size = win_finder_settings['shard_size']
+
+        self.completed: set[int] = set()
+        self.best_seed: int | None = None
+        self.best = 0
+        self.load_checkpoint()
+
+    def load_checkpoint(self) -> None:
+        """Continue from the checkpoint file if there is one for the same Genome and shard size."""
+
+        if not self.checkpoint_path.exists():
+            return
+
+        with open(self.checkpoint_path) as file:
+            checkpoint = json.load(file)
+
+        if checkpoint['genome'] != str(self.genome_path) or checkpoint['shard_size'] != self.shard_size:
+            raise Exception(
+                f'Checkpoint {self.checkpoint_path} is for a different Genome or shard size, delete it to start again'
+            )
+
+        self.completed = set(checkpoint['completed'])
+        self.best_seed = checkpoint['best_seed']
+        self.best = checkpoint['best']
+        print(f'Resuming with {len(self.completed) * self.shard_size} seeds played, ' 
+              f'seed = {self.best_seed}, dots eaten = {self.best}')
+
+    def save_checkpoint(self) -> None:
+        """Record the finished shards and the best seed so far, replacing the file in one step."""
+
+        checkpoint = {
+            'genome': str(self.genome_path),
+            'shard_size': self.shard_size,
+            'completed': sorted(self.completed),
+            'best_seed': self.best_seed,
+            'best': self.best,
+        }
+
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.checkpoint_path.with_suffix('.tmp')
+        with open(temporary_path, 'w') as file:
+            json.dump(checkpoint, file)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def next_shards(self, count: int) -> list[int]:
+        """Return the given number of the lowest shards that haven't been played."""
+
+        shards = []
+        shard = 0
+        while len(shards) < count:
+            if shard not in self.completed:
+                shards.append(shard)
+            shard += 1
+
+        return shards
+
+    def find_seed(self) -> None:
+        """Play shards of seeds in the worker processes until a win occurs."""
+
+        print(f'{"seed":>10} | {"dots eaten":>10} | {"games/sec":>10}')
+
+        games = 0
+        start_time = time.perf_counter()
+        with Pool(self.processes, initializer=_initialise_worker, initargs=(self.genome_path,)) as pool:
+
+            # Hand out a few shards per worker at a time so the pool never runs far past a win
+            while self.best < 244:
+                for shard, dots_eaten in pool.imap_unordered(_play_shard, self.next_shards(4 * self.processes)):
+
+                    for seed, dots in enumerate(dots_eaten, shard * self.shard_size):
+                        # Shards finish out of order, so ties go to the lowest seed
+                        if self.best_seed is None or dots > self.best or (dots == self.best and seed < self.best_seed):
+                            self.best_seed = seed
+                            self.best = dots
+
+                    games += len(dots_eaten)
+                    games_per_sec = games / (time.perf_counter() - start_time)
+                    print(f'{self.best_seed:>10} | {self.best:>10} | {games_per_sec:>10.1f}')
+
+                    self.completed.add(shard)
+                    self.save_checkpoint()
+
+
 if __name__ == '__main__':
-    wf = WinFinder()
-    wf.find_seed()
\ No newline at end of file
+    if win_finder_settings['processes'] == 1:
+        wf = WinFinder()
+        wf.find_seed()
+    else:
+        SeedSearch().find_seed()
@@ -9,6 +9,8 @@ from pacman_app.sprites.numbers import Numbers
 from pacman_app.pixels import to_pixels
 
 from pacman_ai_neat.playback_player import PlaybackPlayer
+from pacman_ai_neat.renderer import Renderer
+from pacman_ai_neat.vision import RAY_LENGTH
 
 
 class CardinalVision(Game):
@@ -32,6 +34,9 @@ class CardinalVision(Game):
         self.letters = Letters(spritesheet)
         self.numbers = Numbers(spritesheet)
 
+        # Renderer set up
+        self.renderer = Renderer(self.screen, self.tile_size, self.bg, self.letters, self.numbers)
+
         # Fruit set up
         self.fruit = FruitSprite(spritesheet)
 
@@ -50,48 +55,38 @@ class CardinalVision(Game):
     def update_screen(self) -> None:
         """Draw the current frame to the screen."""
 
-        # Wipe the last frame
-        self.bg.draw(self.screen)
-
-        # Draw dots first so characters drawn oven them
-        for dot in self.pacdots.dots:
-            dot_position = to_pixels(dot, self.tile_size)
-            pygame.draw.circle(self.screen, 'pink', dot_position, self.tile_size*0.2)
-
-        for dot in self.pacdots.power_dots:
-            dot_position = to_pixels(dot, self.tile_size)
-            pygame.draw.circle(self.screen, 'pink', dot_position, self.tile_size*0.35)
+        # Wipe what was drawn over the PacMaze and PacDots last frame
+        self.renderer.begin_frame(self.pacdots, self.pacman.score)
 
         # Draw fruit
         if self.fruit.available:
             self.fruit.draw(self.screen)
+            self.renderer.mark(self.renderer.sprite_rect(self.fruit.position))
 
         # Ghosts next
         for ghost in self.ghosts:
             if not ghost.inactive:
                 ghost.draw(self.screen, self.tile_size)
+                self.renderer.mark(self.renderer.sprite_rect(ghost.position))
 
         # Draw PacMan's ordinal vision
         start = to_pixels(self.pacman.position.tile_pos, self.tile_size)
         for i, direction in enumerate(self.pacman.perspective):
             end = to_pixels((
-                self.pacman.position.tile_x + 5 * direction.value.d_x,
-                self.pacman.position.tile_y + 5 * direction.value.d_y
+                self.pacman.position.tile_x + RAY_LENGTH * direction.value.d_x,
+                self.pacman.position.tile_y + RAY_LENGTH * direction.value.d_y
                 ), self.tile_size
             )
             sight = self.pacman.vision[i]
             color = (255 * (1 + min(sight,0)), 255 * (1 - max(sight, 0)), 0)
-            pygame.draw.line(self.screen, color, start, end, 2)
+            self.renderer.mark(pygame.draw.line(self.screen, color, start, end, 2))
 
         # Finally PacMan
         self.pacman.draw(self.screen, self.tile_size)
+        self.renderer.mark(self.renderer.sprite_rect(self.pacman.position))
 
-        # Write up-to-date score
-        self.letters.draw_score(self.screen)
-        self.numbers.draw_score(self.screen, self.pacman.score)
-
-        # Update the screen
-        pygame.display.flip()
+        # Update the changed parts of the screen
+        self.renderer.end_frame()
 
     def run(self) -> None:
         """Run the main game loop."""
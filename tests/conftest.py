@@ -0,0 +1,46 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from pacman_ai_neat.player import Player
+
+
+class LinearGenome:
+    """Stands in for a Genome: each of the 4 outputs is a weighted sum of the 8 inputs, over
+    Connections of which some are disabled."""
+
+    def __init__(self, seed: int) -> None:
+        rng = random.Random(seed)
+        self.nodes = [SimpleNamespace(id=i, layer=0) for i in range(8)]
+        self.nodes += [SimpleNamespace(id=8 + i, layer=1) for i in range(4)]
+        self.connections = [
+            SimpleNamespace(input=self.nodes[i], output=self.nodes[8 + j], weight=rng.uniform(-1, 1), enabled=rng.random() < 0.6)
+            for i in range(8) for j in range(4)
+        ]
+
+    def propagate(self, inputs: list[float]) -> list[float]:
+        outputs = [0.0] * 4
+        for connection in self.connections:
+            if connection.enabled:
+                outputs[connection.output.id - 8] += connection.weight * inputs[connection.input.id]
+        return outputs
+
+
+@pytest.fixture
+def make_genome():
+    """Return a function that makes the LinearGenome of the given seed."""
+
+    return LinearGenome
+
+
+@pytest.fixture
+def make_player():
+    """Return a function that makes a Player with the LinearGenome of the given seed."""
+
+    def make(seed: int) -> Player:
+        pacman = Player({})
+        pacman.genome = LinearGenome(seed)
+        return pacman
+
+    return make
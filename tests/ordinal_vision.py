@@ -6,10 +6,11 @@ from pacman_app import PacDots, Ghosts
 from pacman_app.sprites import SpriteSheet, BlinkySprite, PinkySprite, InkySprite, ClydeSprite, FruitSprite
 from pacman_app.sprites.letters import Letters
 from pacman_app.sprites.numbers import Numbers
-from pacman_app.map.direction import Direction, Vector
 from pacman_app.pixels import to_pixels
 
 from pacman_ai_neat.playback_player import PlaybackPlayer
+from pacman_ai_neat.renderer import Renderer
+from pacman_ai_neat.vision import ORDINAL_SIZE, clockwise
 
 
 class OrdinalVision(Game):
@@ -33,6 +34,9 @@ class OrdinalVision(Game):
         self.letters = Letters(spritesheet)
         self.numbers = Numbers(spritesheet)
 
+        # Renderer set up
+        self.renderer = Renderer(self.screen, self.tile_size, self.bg, self.letters, self.numbers)
+
         # Fruit set up
         self.fruit = FruitSprite(spritesheet)
 
@@ -51,53 +55,44 @@ class OrdinalVision(Game):
     def update_screen(self) -> None:
         """Draw the current frame to the screen."""
 
-        # Wipe the last frame
-        self.bg.draw(self.screen)
-
-        # Draw dots first so characters drawn oven them
-        for dot in self.pacdots.dots:
-            dot_position = to_pixels(dot, self.tile_size)
-            pygame.draw.circle(self.screen, 'pink', dot_position, self.tile_size*0.2)
-
-        for dot in self.pacdots.power_dots:
-            dot_position = to_pixels(dot, self.tile_size)
-            pygame.draw.circle(self.screen, 'pink', dot_position, self.tile_size*0.35)
+        # Wipe what was drawn over the PacMaze and PacDots last frame
+        self.renderer.begin_frame(self.pacdots, self.pacman.score)
 
         # Draw fruit
         if self.fruit.available:
             self.fruit.draw(self.screen)
+            self.renderer.mark(self.renderer.sprite_rect(self.fruit.position))
 
         # Ghosts next
         for ghost in self.ghosts:
             if not ghost.inactive:
                 ghost.draw(self.screen, self.tile_size)
+                self.renderer.mark(self.renderer.sprite_rect(ghost.position))
 
         # Draw PacMan's ordinal vision
-        s = pygame.Surface((self.tile_size * 3, self.tile_size * 3))
+        s = pygame.Surface((self.tile_size * ORDINAL_SIZE, self.tile_size * ORDINAL_SIZE))
         s.set_alpha(128)
-        rect = pygame.Rect(0, 0, self.tile_size * 3, self.tile_size * 3)
+        rect = pygame.Rect(0, 0, self.tile_size * ORDINAL_SIZE, self.tile_size * ORDINAL_SIZE)
+        offset = (ORDINAL_SIZE + 1) / 2
         for i, direction in enumerate(self.pacman.perspective):
-            orthog_direction = Direction(Vector(-direction.value.d_y, direction.value.d_x))
+            orthog_direction = clockwise(direction)
             center = to_pixels((
-                self.pacman.position.tile_x + 2 * (direction.value.d_x + orthog_direction.value.d_x),
-                self.pacman.position.tile_y + 2 * (direction.value.d_y + orthog_direction.value.d_y)
+                self.pacman.position.tile_x + offset * (direction.value.d_x + orthog_direction.value.d_x),
+                self.pacman.position.tile_y + offset * (direction.value.d_y + orthog_direction.value.d_y)
                 ), self.tile_size
             )
             rect.center = center
             sight = self.pacman.vision[i + 4]
             color = (255, 0, 0) if sight else (0, 255, 0)
             s.fill(color)
-            self.screen.blit(s, rect.topleft)
+            self.renderer.mark(self.screen.blit(s, rect.topleft))
 
         # Finally PacMan
         self.pacman.draw(self.screen, self.tile_size)
+        self.renderer.mark(self.renderer.sprite_rect(self.pacman.position))
 
-        # Write up-to-date score
-        self.letters.draw_score(self.screen)
-        self.numbers.draw_score(self.screen, self.pacman.score)
-
-        # Update the screen
-        pygame.display.flip()
+        # Update the changed parts of the screen
+        self.renderer.end_frame()
 
     def run(self) -> None:
         """Run the main game loop."""
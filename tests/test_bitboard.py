@@ -0,0 +1,45 @@
+from pacman_app.map.direction import Direction
+
+from pacman_ai_neat.bitboard import PADDING, WIDTH, Bitboard, mask_tiles, sight_line_mask, tile_bit, tiles_mask
+from pacman_ai_neat.rng import seeded_random
+from pacman_ai_neat.simulator import dots_and_ghosts
+from pacman_ai_neat.vision import sight_line
+
+
+def test_masks_round_trip() -> None:
+    tiles = {(0, 0), (27, 35), (13, 17), (-PADDING, 17), (WIDTH + PADDING - 1, 17), (-1, 17), (WIDTH, 17)}
+    assert mask_tiles(tiles_mask(tiles)) == tiles
+    assert len({tile_bit(tile) for tile in tiles}) == len(tiles)
+
+
+def test_tiles_off_the_board_have_no_bit() -> None:
+    for tile in ((-PADDING - 1, 17), (WIDTH + PADDING, 17), (5, -1), (5, 36)):
+        assert tile_bit(tile) == 0
+    assert tiles_mask([(5, -1), (5, 36)]) == 0
+
+
+def test_sight_line_masks_match_sight_lines() -> None:
+    for tile in ((1, 4), (13, 23), (0, 17), (27, 17)):
+        for direction in Direction:
+            tiles, leaves_maze = sight_line(tile, direction)
+            assert sight_line_mask(tile, direction) == (tiles_mask(tiles), leaves_maze)
+
+
+def test_bitboard_vision_matches_ray_vision(make_player) -> None:
+    pacman = make_player(0)
+    frame_cap = 0
+    with seeded_random(0):
+        dots_and_ghosts(pacman, frame_cap=frame_cap)
+        while pacman.paused_episode is not None:
+            environment = pacman.paused_episode.environment
+            game = (environment.pacdots, environment.fruit, environment.ghosts)
+
+            pacman.bitboard = Bitboard()
+            pacman.look(*game)
+            bitboard_vision = pacman.vision
+            pacman.bitboard = None
+            pacman.look(*game)
+            assert bitboard_vision == pacman.vision
+
+            frame_cap += 5
+            dots_and_ghosts(pacman, frame_cap=frame_cap)
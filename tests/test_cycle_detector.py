@@ -0,0 +1,28 @@
+import pytest
+
+from pacman_ai_neat.cycle_detector import CycleDetector
+from pacman_ai_neat.prefix_sharing import PrefixSharingSimulator
+from pacman_ai_neat.settings import simulation_settings
+from pacman_ai_neat.simulator import only_dots
+
+
+def test_cycle_detection_gives_the_results_of_a_full_run(make_player, monkeypatch: pytest.MonkeyPatch) -> None:
+    seeds = range(12)
+    expected = [(pacman.fitness, pacman.score, pacman.lifespan) for pacman in map(only_dots, map(make_player, seeds))]
+
+    # Note when a loop is found
+    cycles = []
+    repeated = CycleDetector.repeated
+
+    def spy(detector: CycleDetector) -> bool:
+        cycles.append(repeated(detector))
+        return cycles[-1]
+
+    monkeypatch.setattr(CycleDetector, 'repeated', spy)
+    monkeypatch.setitem(simulation_settings, 'cycle_detection', True)
+
+    assert [(pacman.fitness, pacman.score, pacman.lifespan) for pacman in map(only_dots, map(make_player, seeds))] == expected
+    assert any(cycles)
+
+    players = PrefixSharingSimulator().evaluate([make_player(seed) for seed in seeds])
+    assert [(pacman.fitness, pacman.score, pacman.lifespan) for pacman in players] == expected
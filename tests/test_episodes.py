@@ -0,0 +1,67 @@
+import pytest
+
+from pacman_ai_neat.episodes import AdaptiveEpisodeEvaluator, EpisodeSimulator
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.rng import current_random, seeded_random
+from pacman_ai_neat.trajectory import MoveLog, RecordingSimulator
+
+
+def draw(pacman: Player) -> Player:
+    """Stands in for a simulator function, drawing PacMan's results from the random stream."""
+
+    pacman.score = current_random().randrange(100)
+    pacman.lifespan = current_random().randrange(1000)
+    pacman.fitness = pacman.score + current_random().random()
+    return pacman
+
+
+def test_aggregate_interpolates_quantiles() -> None:
+    assert EpisodeSimulator(draw, 4).aggregate([4, 1, 3, 2]) == 2.5
+    assert EpisodeSimulator(draw, 4, quantile=0).aggregate([4, 1, 3, 2]) == 1
+    assert EpisodeSimulator(draw, 4, quantile=0.5).aggregate([4, 1, 3, 2]) == 2.5
+    assert EpisodeSimulator(draw, 5, quantile=0.25).aggregate([5, 1, 3, 2, 4]) == 2
+
+
+def test_results_over_episodes(make_player) -> None:
+    pacman = make_player(0)
+    move_logs = [MoveLog(seed) for seed in range(3)]
+    EpisodeSimulator(draw, 3).set_results(pacman, [(5.0, 50, 500), (9.0, 90, 100), (1.0, 10, 700)], move_logs)
+
+    assert pacman.fitness == 5
+    assert (pacman.score, pacman.lifespan) == (90, 100)
+    assert pacman.move_log is move_logs[1]
+    assert pacman.mean_score == 50
+
+
+def test_episodes_are_shared_within_a_generation(make_player) -> None:
+    simulator = EpisodeSimulator(draw, 3)
+    first, clone, later = make_player(0), make_player(1), make_player(0)
+    later.evaluation = 1
+
+    assert simulator(first).fitness == simulator(clone).fitness
+    assert simulator(first).fitness != simulator(later).fitness
+
+
+@pytest.mark.parametrize('episodes', [2, 3])
+def test_adaptive_episodes_play_at_least_the_episodes(make_player, episodes: int) -> None:
+    played: dict[int, int] = {}
+
+    def counted(pacman: Player) -> Player:
+        played[id(pacman)] = played.get(id(pacman), 0) + 1
+        return draw(pacman)
+
+    players = AdaptiveEpisodeEvaluator(counted, episodes, max_episodes=4 * episodes).evaluate(
+        [make_player(seed) for seed in range(10)]
+    )
+
+    assert all(episodes <= played[id(pacman)] <= 4 * episodes for pacman in players)
+
+
+def test_recorded_episode_is_the_one_kept(make_player) -> None:
+    for seed in range(4):
+        pacman = EpisodeSimulator(RecordingSimulator(draw), 4)(make_player(seed))
+
+        # Replaying the recorded seed gives the score and lifespan PacMan was given
+        with seeded_random(pacman.move_log.seed):
+            replayed = draw(make_player(seed))
+        assert (replayed.score, replayed.lifespan) == (pacman.score, pacman.lifespan)
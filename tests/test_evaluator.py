@@ -0,0 +1,77 @@
+import warnings
+
+import pytest
+
+from pacman_ai_neat.evaluator import BatchedSimulator, ParallelEvaluator, SerialEvaluator
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.settings import simulation_settings
+from pacman_ai_neat.simulator import dots_and_blinky, only_dots
+
+
+class RecordingEvaluator:
+    """Evaluates Players with only_dots, recording each batch it is given."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[Player]] = []
+        self.closed = False
+
+    def evaluate(self, players: list[Player]) -> list[Player]:
+        self.batches.append(list(players))
+        return SerialEvaluator(only_dots).evaluate(players)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_generations_are_evaluated_as_one_batch(make_player) -> None:
+    evaluator = RecordingEvaluator()
+    simulate = BatchedSimulator(evaluator)
+    evaluated = []
+    simulate.listeners.append(evaluated.append)
+
+    for generation in range(2):
+        players = [simulate(make_player(seed)) for seed in range(3)]
+        assert len(evaluator.batches) == generation
+
+        # Reading any fitness evaluates the whole queue
+        fitness = players[1].fitness
+        assert evaluator.batches[-1] == players
+        assert evaluated[-1] == players
+        assert [pacman.evaluation for pacman in players] == [generation] * 3
+
+        expected = only_dots(make_player(1)).fitness
+        assert fitness == expected
+
+    simulate(make_player(0))
+    simulate.finish()
+    assert len(evaluator.batches) == 3
+    assert evaluator.closed
+
+
+def test_reading_fitness_before_the_generation_is_queued_is_warned_about(make_player) -> None:
+    simulate = BatchedSimulator(SerialEvaluator(only_dots), generation_size=4)
+
+    # The order neat.run relies on: the whole generation is handed over, then fitnesses are read
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        players = [simulate(make_player(seed)) for seed in range(4)]
+        sorted(players, key=lambda pacman: pacman.fitness)
+
+    with pytest.warns(UserWarning):
+        for seed in range(4):
+            simulate(make_player(seed)).fitness
+    assert simulate.evaluations == 5
+
+
+@pytest.mark.parametrize('simulator', [only_dots, dots_and_blinky])
+def test_parallel_evaluation_matches_serial(make_player, monkeypatch: pytest.MonkeyPatch, simulator) -> None:
+    monkeypatch.setitem(simulation_settings, 'random_seed', 2)
+    seeds = [0, 1, 2, 3, 0, 4, 5]
+
+    serial = SerialEvaluator(simulator).evaluate([make_player(seed) for seed in seeds])
+    with ParallelEvaluator(simulator, processes=2, attributes=('fitness', 'score', 'lifespan')) as evaluator:
+        for _ in range(2):
+            parallel = evaluator.evaluate([make_player(seed) for seed in seeds])
+            assert [(pacman.fitness, pacman.score, pacman.lifespan) for pacman in parallel] == [
+                (pacman.fitness, pacman.score, pacman.lifespan) for pacman in serial
+            ]
@@ -0,0 +1,30 @@
+import io
+import random
+
+import pytest
+
+pytest.importorskip('pygame')
+Image = pytest.importorskip('PIL.Image')
+
+from pacman_ai_neat.export import _encode_gif_frame, write_gif
+
+
+def test_gif_frames_play_back_in_the_web_palette() -> None:
+    rng = random.Random(0)
+    size = (28, 36)
+    # Colours of the web palette come back exactly
+    colours = [tuple(51 * rng.randrange(6) for _ in range(3)) for _ in range(5)]
+    frames = [bytes(colour) * (size[0] * size[1]) for colour in colours]
+
+    file = io.BytesIO()
+    count = write_gif(file, size, map(_encode_gif_frame, ((pixels, size, 40) for pixels in frames)))
+    assert count == len(frames)
+
+    file.seek(0)
+    gif = Image.open(file)
+    assert gif.n_frames == len(frames)
+    assert gif.info['loop'] == 0
+    for frame, colour in enumerate(colours):
+        gif.seek(frame)
+        assert gif.info['duration'] == 40
+        assert gif.convert('RGB').getcolors() == [(size[0] * size[1], colour)]
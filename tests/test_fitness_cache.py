@@ -0,0 +1,96 @@
+import copy
+import time
+from pathlib import Path
+
+import pytest
+
+from pacman_ai_neat.fitness_cache import CachedEvaluator, FitnessCache, PolicyCachedEvaluator
+from pacman_ai_neat.phase import Phase
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.settings import simulation_settings, vision_settings
+
+
+class CountingEvaluator:
+    """Gives each Player a fitness from its Genome's first weight, counting the Players evaluated."""
+
+    def __init__(self) -> None:
+        self.evaluated = 0
+
+    def evaluate(self, players: list[Player]) -> list[Player]:
+        for pacman in players:
+            pacman.fitness = pacman.genome.connections[0].weight
+            pacman.score = 10
+            pacman.lifespan = 100
+        self.evaluated += len(players)
+        return players
+
+
+def test_cache_forgets_least_recently_used(tmp_path: Path) -> None:
+    cache = FitnessCache(tmp_path / 'cache.sqlite', max_size=2)
+    cache.put_many({'a': (1.0, 10, 100), 'b': (2.0, 20, 200)})
+    cache.commit()
+    # Results are ordered by when they were last used, so make sure the clock moves on
+    time.sleep(0.05)
+    assert cache.get_many(['a', 'c']) == {'a': (1.0, 10, 100)}
+
+    cache.put_many({'c': (3.0, 30, 300)})
+    cache.commit()
+    assert set(cache.get_many(['a', 'b', 'c'])) == {'a', 'c'}
+
+
+def test_clones_are_simulated_once(make_player, tmp_path: Path) -> None:
+    cache = FitnessCache(tmp_path / 'cache.sqlite', 100)
+    evaluator = CountingEvaluator()
+    cached = CachedEvaluator(evaluator, Phase.ONLY_DOTS, cache)
+
+    players = [make_player(0), make_player(1), make_player(0)]
+    cached.evaluate(players)
+    assert evaluator.evaluated == 2
+    assert players[0].fitness == players[2].fitness
+    assert [(pacman.cache_hits, pacman.cache_misses) for pacman in players] == [(1, 2)] * 3
+
+    # A later generation recalls them all from disk
+    players = [make_player(1), make_player(0)]
+    CachedEvaluator(evaluator, Phase.ONLY_DOTS, FitnessCache(tmp_path / 'cache.sqlite', 100)).evaluate(players)
+    assert evaluator.evaluated == 2
+    assert (players[0].cache_hits, players[0].cache_misses) == (2, 0)
+
+
+def test_keys_depend_on_genome_phase_and_settings(make_player, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = FitnessCache(tmp_path / 'cache.sqlite', 100)
+    key = CachedEvaluator(None, Phase.ONLY_DOTS, cache).key
+
+    assert key(make_player(0)) == key(make_player(0))
+    assert key(make_player(0)) != key(make_player(1))
+    assert key(make_player(0)) != CachedEvaluator(None, Phase.DOTS_AND_BLINKY, cache).key(make_player(0))
+
+    # Settings that only change how fast PacMan is simulated share results
+    monkeypatch.setitem(simulation_settings, 'policy_table', 'lazy')
+    monkeypatch.setitem(vision_settings, 'bitboards', True)
+    assert key(make_player(0)) == CachedEvaluator(None, Phase.ONLY_DOTS, cache).key(make_player(0))
+
+    for settings, name in [
+        (simulation_settings, 'max_famine_count'),
+        (simulation_settings, 'max_stationary_count'),
+        (vision_settings, 'ray_length'),
+        (vision_settings, 'ordinal_size'),
+    ]:
+        with monkeypatch.context() as patch:
+            patch.setitem(settings, name, settings[name] + 1)
+            assert key(make_player(0)) != CachedEvaluator(None, Phase.ONLY_DOTS, cache).key(make_player(0))
+
+
+
+def test_policy_keys_are_shared_by_genomes_that_choose_the_same(make_player, tmp_path: Path) -> None:
+    key = PolicyCachedEvaluator(None, Phase.ONLY_DOTS, FitnessCache(tmp_path / 'cache.sqlite', 100)).key
+    pacman = make_player(0)
+    scaled = make_player(0)
+    scaled.genome = copy.deepcopy(scaled.genome)
+    for connection in scaled.genome.connections:
+        connection.weight *= 2
+
+    assert key(pacman) == key(scaled)
+    assert key(pacman) != key(make_player(1))
+
+    # The key only covers the visions PacMan can have without active Ghosts
+    assert len(pacman.policy_table) == len(list(Phase.ONLY_DOTS.vision_space)) == 3 ** 4
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from pacman_ai_neat.genome_race import Entrant, RaceResults
+
+
+def test_estimates_only_count_shared_seeds() -> None:
+    entrant = Entrant(Path('0.pickle'), 'key', {0: 244, 1: 100, 2: 202, 3: 244})
+
+    assert entrant.games(2) == [244, 100]
+    assert entrant.mean_dots_eaten(1.96, 2)[0] == 172
+    assert entrant.win_rate(1.96, 2)[0] == 0.5
+    assert entrant.win_rate(1.96, 4)[0] == 0.5
+    assert entrant.mean_dots_eaten(1.96, 3)[0] == 182
+
+
+def test_intervals_contain_the_estimate_and_narrow() -> None:
+    few = Entrant(Path('0.pickle'), 'key', {seed: 244 if seed % 2 else 150 for seed in range(10)})
+    many = Entrant(Path('1.pickle'), 'key', {seed: 244 if seed % 2 else 150 for seed in range(1000)})
+
+    for metric in ('dots_eaten', 'win_rate'):
+        estimate, lower, upper = few.estimate(metric, 1.96, 10)
+        assert lower <= estimate <= upper
+        many_estimate, many_lower, many_upper = many.estimate(metric, 1.96, 1000)
+        assert many_estimate == estimate
+        assert many_upper - many_lower < upper - lower
+
+    # Nothing is known without any games
+    assert few.estimate('dots_eaten', 1.96, 0) == (0, 0, 244)
+    assert few.estimate('win_rate', 1.96, 0) == (0, 0, 1)
+
+
+def test_results_are_saved_by_key(tmp_path: Path) -> None:
+    results = RaceResults(tmp_path / 'race.sqlite')
+    results.add('a', [(0, 100), (1, 244)])
+    results.add('a', [(1, 200)])
+
+    assert RaceResults(tmp_path / 'race.sqlite').load('a') == {0: 100, 1: 200}
+    assert results.load('b') == {}
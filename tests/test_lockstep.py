@@ -0,0 +1,23 @@
+import pytest
+
+from pacman_ai_neat.lockstep import LockstepSimulator
+from pacman_ai_neat.settings import vision_settings
+from pacman_ai_neat.simulator import only_dots
+
+
+@pytest.mark.parametrize('lazy_vision', [False, True])
+def test_lockstep_matches_only_dots(make_player, monkeypatch: pytest.MonkeyPatch, lazy_vision: bool) -> None:
+    monkeypatch.setitem(vision_settings, 'lazy_vision', lazy_vision)
+    seeds = [0, 1, 2, 3, 0, 4]
+
+    expected = []
+    for seed in seeds:
+        pacman = only_dots(make_player(seed))
+        expected.append((pacman.fitness, pacman.score, pacman.lifespan))
+
+    simulator = LockstepSimulator()
+    for _ in range(2):
+        players = simulator.evaluate([make_player(seed) for seed in seeds])
+        assert [(pacman.fitness, pacman.score, pacman.lifespan) for pacman in players] == expected
+
+    assert simulator.evaluate([]) == []
@@ -0,0 +1,58 @@
+import math
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+from pacman_ai_neat.network import NetworkBatch, compile_tables
+from pacman_ai_neat.policy import DOTS_CARDINAL_VALUES, PolicyTable, vision_space
+
+
+class LayeredGenome:
+    """Stands in for a Genome with a bias Node, hidden layers and sigmoid Nodes, propagating one Node at
+    a time as neat does."""
+
+    def __init__(self, seed: int, hidden_layers: int) -> None:
+        rng = random.Random(seed)
+        layers = [0] * 9 + [layer for layer in range(1, hidden_layers + 1) for _ in range(3)] + [hidden_layers + 1] * 4
+        self.nodes = [SimpleNamespace(id=i, layer=layer) for i, layer in enumerate(layers)]
+        self.connections = [
+            SimpleNamespace(input=source, output=target, weight=rng.uniform(-2, 2), enabled=rng.random() < 0.8)
+            for source in self.nodes for target in self.nodes if source.layer < target.layer
+        ]
+
+    def propagate(self, inputs: list[float]) -> list[float]:
+        values = {i: value for i, value in enumerate(inputs)}
+        values[8] = 1
+        for node in sorted(self.nodes[9:], key=lambda node: node.layer):
+            total = sum(
+                connection.weight * values[connection.input.id]
+                for connection in self.connections if connection.enabled and connection.output is node
+            )
+            values[node.id] = 1 / (1 + math.exp(-total))
+        return [values[node.id] for node in self.nodes[-4:]]
+
+
+def test_network_batch_chooses_as_the_genomes(make_genome) -> None:
+    genomes = [make_genome(0), LayeredGenome(1, 0), LayeredGenome(2, 1), LayeredGenome(3, 2), make_genome(4)]
+    visions = list(vision_space())
+    batch = NetworkBatch(genomes)
+
+    outputs = batch.propagate(np.array(visions))
+    for genome, genome_outputs in zip(genomes[1:4], outputs[1:4]):
+        assert np.allclose([genome.propagate(list(vision)) for vision in visions], genome_outputs)
+
+    for genome, choices in zip(genomes, batch.choose(np.array(visions)).tolist()):
+        expected = [genome.propagate(list(vision)) for vision in visions]
+        assert choices == [outputs.index(max(outputs)) for outputs in expected]
+
+
+def test_compile_tables_adds_the_genomes_choices(make_genome, monkeypatch) -> None:
+    monkeypatch.setattr('pacman_ai_neat.network.BATCH_SIZE', 2)
+    tables = [PolicyTable(make_genome(seed)) for seed in range(5)]
+    compile_tables(tables, vision_space(DOTS_CARDINAL_VALUES))
+
+    for table in tables:
+        expected = PolicyTable(table.genome)
+        expected.compile(vision_space(DOTS_CARDINAL_VALUES))
+        assert table.choices == expected.choices
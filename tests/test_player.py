@@ -0,0 +1,29 @@
+import pytest
+
+from pacman_ai_neat.settings import simulation_settings
+from pacman_ai_neat.simulator import dots_and_ghosts, full_game, only_dots
+
+
+@pytest.mark.parametrize('simulator', [only_dots, dots_and_ghosts, full_game])
+def test_decision_points_only_keeps_results_identical(make_player, monkeypatch: pytest.MonkeyPatch, simulator) -> None:
+    monkeypatch.setitem(simulation_settings, 'random_seed', 5)
+
+    def results() -> list[tuple]:
+        return [
+            (pacman.fitness, pacman.score, pacman.lifespan, pacman.position.tile_pos)
+            for pacman in map(simulator, map(make_player, range(4)))
+        ]
+
+    expected = results()
+    monkeypatch.setitem(simulation_settings, 'decision_points_only', True)
+    assert results() == expected
+
+
+def test_decisions_are_skipped_between_tiles(make_player, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(simulation_settings, 'decision_points_only', True)
+    pacman = only_dots(make_player(0))
+    skipped = pacman.skipped_decisions
+    assert skipped > 0
+
+    # Skips are counted afresh each episode
+    assert only_dots(pacman).skipped_decisions == skipped
@@ -0,0 +1,105 @@
+import copy
+import math
+from types import SimpleNamespace
+
+import pytest
+
+from pacman_ai_neat.policy import DOTS_CARDINAL_VALUES, PolicyTable, PrunedNetwork, used_inputs, vision_space
+from pacman_ai_neat.settings import genome_settings, simulation_settings, vision_settings
+from pacman_ai_neat.simulator import only_dots
+
+
+def test_policy_table_holds_the_genomes_choices(make_genome) -> None:
+    genome = make_genome(0)
+    table = PolicyTable(genome)
+    table.compile(vision_space(DOTS_CARDINAL_VALUES))
+
+    for vision in vision_space(DOTS_CARDINAL_VALUES):
+        choices = genome.propagate(list(vision))
+        assert table[vision] == choices.index(max(choices))
+
+
+@pytest.mark.parametrize('policy_table', ['lazy', 'full'])
+def test_policy_tables_play_as_the_genome(make_player, monkeypatch: pytest.MonkeyPatch, policy_table: str) -> None:
+    expected = [(pacman.fitness, pacman.lifespan) for pacman in map(only_dots, map(make_player, range(3)))]
+
+    monkeypatch.setitem(simulation_settings, 'policy_table', policy_table)
+    assert [(pacman.fitness, pacman.lifespan) for pacman in map(only_dots, map(make_player, range(3)))] == expected
+
+    monkeypatch.setitem(simulation_settings, 'policy_table', 'partial')
+    with pytest.raises(Exception):
+        only_dots(make_player(0))
+
+
+def branching_genome() -> SimpleNamespace:
+    """Return a Genome of 4 inputs in which input 0 reaches the output directly and input 1 through a
+    hidden Node, input 2 only reaches a dead end and input 3's Connection is disabled."""
+
+    nodes = [SimpleNamespace(id=i, layer=0) for i in range(4)]
+    hidden, dead_end = SimpleNamespace(id=4, layer=1), SimpleNamespace(id=5, layer=1)
+    output = SimpleNamespace(id=6, layer=2)
+    connections = [
+        SimpleNamespace(input=nodes[0], output=output, weight=0.5, enabled=True),
+        SimpleNamespace(input=nodes[1], output=hidden, weight=-1.5, enabled=True),
+        SimpleNamespace(input=hidden, output=output, weight=2.0, enabled=True),
+        SimpleNamespace(input=nodes[2], output=dead_end, weight=1.0, enabled=True),
+        SimpleNamespace(input=nodes[3], output=output, weight=3.0, enabled=False),
+    ]
+    return SimpleNamespace(nodes=[*nodes, hidden, dead_end, output], connections=connections)
+
+
+def test_used_inputs_follow_enabled_connections_to_the_outputs(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(genome_settings, 'input_count', 4)
+    assert used_inputs(branching_genome()) == (True, True, False, False)
+
+
+def test_unused_inputs_never_change_the_choice(make_genome) -> None:
+    genome = make_genome(0)
+    used = used_inputs(genome)
+    table = PolicyTable(genome)
+    for vision in vision_space(DOTS_CARDINAL_VALUES):
+        masked = tuple(value if use else 0 for value, use in zip(vision, used))
+        assert table[vision] == table[masked]
+
+
+def test_pruned_network_drops_dead_nodes_and_disabled_connections(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(genome_settings, 'input_count', 4)
+    network = PrunedNetwork(branching_genome())
+
+    assert [(node_id, [source for source, _ in sources]) for node_id, _, sources in network.plan] == [(4, [1]), (6, [0, 4])]
+
+    def sigmoid(x: float) -> float:
+        return 1 / (1 + math.exp(-x))
+
+    assert network.propagate([1, -1, 7, 7]) == [sigmoid(0.5 + 2.0 * sigmoid(1.5))]
+
+
+def test_pruned_networks_play_as_the_genome(make_player, monkeypatch: pytest.MonkeyPatch) -> None:
+    expected = [(pacman.fitness, pacman.lifespan) for pacman in map(only_dots, map(make_player, range(3)))]
+
+    monkeypatch.setitem(vision_settings, 'lazy_vision', True)
+    assert [(pacman.fitness, pacman.lifespan) for pacman in map(only_dots, map(make_player, range(3)))] == expected
+
+    monkeypatch.setitem(simulation_settings, 'policy_table', 'lazy')
+    assert [(pacman.fitness, pacman.lifespan) for pacman in map(only_dots, map(make_player, range(3)))] == expected
+
+
+def test_policy_table_is_for_genome_content(make_genome) -> None:
+    genome = make_genome(0)
+    table = PolicyTable(genome)
+
+    assert table.is_for(copy.deepcopy(genome))
+    genome.connections[0].weight += 1
+    assert not table.is_for(genome)
+
+
+def test_fingerprint_is_shared_by_genomes_that_choose_the_same(make_genome) -> None:
+    genome = make_genome(0)
+    scaled = copy.deepcopy(genome)
+    for connection in scaled.connections:
+        connection.weight *= 2
+    visions = list(vision_space(DOTS_CARDINAL_VALUES))
+
+    assert PolicyTable(genome).digest != PolicyTable(scaled).digest
+    assert PolicyTable(genome).fingerprint(visions) == PolicyTable(scaled).fingerprint(visions)
+    assert PolicyTable(genome).fingerprint(visions) != PolicyTable(make_genome(1)).fingerprint(visions)
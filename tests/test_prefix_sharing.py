@@ -0,0 +1,18 @@
+from pacman_ai_neat.prefix_sharing import PrefixSharingSimulator
+from pacman_ai_neat.simulator import only_dots
+
+
+def test_prefix_sharing_matches_only_dots(make_player) -> None:
+    seeds = [0, 1, 2, 3, 0, 0, 4]
+
+    expected = []
+    for seed in seeds:
+        pacman = only_dots(make_player(seed))
+        expected.append((pacman.fitness, pacman.score, pacman.lifespan))
+
+    players = PrefixSharingSimulator().evaluate([make_player(seed) for seed in seeds])
+    assert [(pacman.fitness, pacman.score, pacman.lifespan) for pacman in players] == expected
+
+    # Clones share every frame, so fewer frames are played than separate games would
+    assert players[0].sharing_ratio > 1
+    assert len({pacman.sharing_ratio for pacman in players}) == 1
@@ -0,0 +1,87 @@
+import random
+import sys
+from types import ModuleType
+
+import pytest
+
+from pacman_ai_neat import rng
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.rng import current_random, random_stream, seeded, seeded_random, stream_seed, using_random
+from pacman_ai_neat.settings import simulation_settings
+from pacman_ai_neat.simulator import dots_and_blinky
+
+
+@seeded
+def draw(pacman: Player) -> Player:
+    """Stands in for a simulator function, drawing PacMan's fitness from the random stream."""
+
+    pacman.fitness = current_random().random()
+    return pacman
+
+
+def test_stream_seeds_depend_on_key_and_random_seed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(simulation_settings, 'random_seed', 1)
+    seed = stream_seed('episode', 0, 0)
+
+    assert stream_seed('episode', 0, 0) == seed
+    assert stream_seed('episode', 0, 1) != seed
+    monkeypatch.setitem(simulation_settings, 'random_seed', 2)
+    assert stream_seed('episode', 0, 0) != seed
+
+
+def test_using_random_binds_the_random_for_the_block() -> None:
+    rng = random.Random(0)
+    outside = current_random()
+    with using_random(rng):
+        assert current_random() is rng
+        with random_stream('inner'):
+            assert current_random() is not rng
+        assert current_random() is rng
+    assert current_random() is outside
+
+
+def test_seeded_draws_depend_on_genome_and_generation(make_player, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(simulation_settings, 'random_seed', 1)
+
+    def fitness(seed: int, evaluation: int) -> float:
+        pacman = make_player(seed)
+        pacman.evaluation = evaluation
+        random.random()
+        return draw(pacman).fitness
+
+    assert fitness(0, 0) == fitness(0, 0)
+    assert fitness(0, 0) != fitness(1, 0)
+    assert fitness(0, 0) != fitness(0, 1)
+
+    # Inside a stream the simulation carries on drawing from it
+    with random_stream('episode', 0, 0) as rng:
+        expected = random.Random(stream_seed('episode', 0, 0)).random()
+        assert draw(make_player(0)).fitness == expected
+        assert current_random() is rng
+
+
+def test_pacman_app_draws_from_the_bound_random(make_player) -> None:
+    # The game only depends on the bound Random, whatever state the random module is in
+    def results(module_seed: int) -> tuple:
+        random.seed(module_seed)
+        with seeded_random(1):
+            pacman = dots_and_blinky(make_player(0))
+        return pacman.fitness, pacman.score, pacman.lifespan
+
+    assert results(0) == results(1)
+
+    # Nothing in pacman_app is left drawing from the random module
+    for name, module in list(sys.modules.items()):
+        if name.partition('.')[0] == 'pacman_app' and module is not None:
+            assert rng._uses_of_random(vars(module)) == []
+
+
+def test_unpatchable_uses_of_random_are_refused(monkeypatch: pytest.MonkeyPatch) -> None:
+    module = ModuleType('pacman_app.holder')
+    module.Holder = type('Holder', (), {'__module__': module.__name__, 'choice': random.choice})
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    monkeypatch.setattr(rng, '_installed_at', 0)
+
+    with pytest.raises(Exception, match='Holder'):
+        with using_random(random.Random(0)):
+            pass
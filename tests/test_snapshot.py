@@ -0,0 +1,70 @@
+from typing import Hashable
+
+import pytest
+
+from pacman_ai_neat.environment import Environment
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.rng import current_random, seeded_random
+from pacman_ai_neat.settings import simulation_settings
+from pacman_ai_neat.simulator import dots_and_blinky
+from pacman_ai_neat.snapshot import GameState
+from pacman_ai_neat.state import freeze_attributes
+
+
+def game(pacman: Player, environment: Environment) -> Hashable:
+    """Return everything about the game PacMan is playing in the Environment, as a hashable value."""
+
+    entities = GameState.entities(pacman, environment.pacdots, environment.fruit, environment.ghosts)
+    shared = {}
+    for i, entity in enumerate(entities):
+        shared.setdefault(id(entity), i)
+
+    return (
+        freeze_attributes(pacman, shared, pacman.transient_attributes),
+        frozenset(environment.pacdots.dots),
+        frozenset(environment.pacdots.power_dots),
+        freeze_attributes(environment.fruit, shared),
+        tuple(freeze_attributes(ghost, shared) for ghost in environment.ghosts),
+        current_random().getstate(),
+    )
+
+
+def results(pacman: Player) -> tuple:
+    return pacman.fitness, pacman.score, pacman.lifespan
+
+
+def test_game_state_restores_game(make_player) -> None:
+    pacman = make_player(0)
+    with seeded_random(1):
+        dots_and_blinky(pacman, frame_cap=10)
+        environment = pacman.paused_episode.environment
+        state = GameState(pacman, environment.pacdots, environment.fruit, environment.ghosts)
+        paused = game(pacman, environment)
+
+        dots_and_blinky(pacman)
+        assert game(pacman, environment) != paused
+
+        state.restore(pacman, environment.pacdots, environment.fruit, environment.ghosts)
+        assert game(pacman, environment) == paused
+
+
+def test_paused_episodes_carry_on_exactly(make_player, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(simulation_settings, 'random_seed', 3)
+
+    expected = []
+    for seed in range(2):
+        pacman = make_player(seed)
+        dots_and_blinky(pacman)
+        expected.append(results(pacman))
+
+    first, second = make_player(0), make_player(1)
+    dots_and_blinky(first, frame_cap=10)
+    dots_and_blinky(second, frame_cap=10)
+
+    # The second carries on in place, the first from the GameState saved when the second started
+    assert first.paused_episode.state is not None
+    assert second.paused_episode.state is None
+    dots_and_blinky(second)
+    dots_and_blinky(first)
+
+    assert [results(first), results(second)] == expected
@@ -0,0 +1,34 @@
+import pytest
+
+from pacman_ai_neat.player import Player
+from pacman_ai_neat.settings import simulation_settings
+from pacman_ai_neat.simulator import dots_and_blinky, only_dots
+from pacman_ai_neat.successive_halving import SuccessiveHalvingEvaluator
+
+
+@pytest.mark.parametrize('simulator', [only_dots, dots_and_blinky])
+def test_players_that_finish_score_as_a_full_simulation(make_player, monkeypatch: pytest.MonkeyPatch, simulator) -> None:
+    monkeypatch.setitem(simulation_settings, 'random_seed', 7)
+    seeds = range(8)
+
+    expected = []
+    for seed in seeds:
+        pacman = simulator(make_player(seed))
+        expected.append((pacman.fitness, pacman.score, pacman.lifespan))
+
+    # Note which Players are played to the end
+    finished = set()
+
+    def simulate(pacman: Player, frame_cap: int | None = None) -> Player:
+        simulator(pacman, frame_cap=frame_cap)
+        if pacman.paused_episode is None:
+            finished.add(id(pacman))
+        return pacman
+
+    players = SuccessiveHalvingEvaluator(simulate, [10, 40], 0.5).evaluate([make_player(seed) for seed in seeds])
+
+    assert len(finished) >= 4
+    for pacman, results in zip(players, expected):
+        if id(pacman) in finished:
+            assert (pacman.fitness, pacman.score, pacman.lifespan) == results
+        assert pacman.paused_episode is None
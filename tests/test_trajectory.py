@@ -0,0 +1,50 @@
+import random
+from pathlib import Path
+
+from pacman_app.map.direction import Direction
+
+from pacman_ai_neat.trajectory import DIRECTIONS, MoveLog, TrajectoryStore
+
+
+def random_log(seed: int, frames: int) -> tuple[MoveLog, list[Direction]]:
+    """Return a MoveLog of random moves (in runs, as PacMan makes them) along with the moves."""
+
+    rng = random.Random(seed)
+    move_log = MoveLog(rng.getrandbits(64))
+    moves = []
+    while len(moves) < frames:
+        moves.extend([rng.choice(DIRECTIONS)] * rng.randint(1, 300))
+    for move in moves[:frames]:
+        move_log.append(move)
+    return move_log, moves[:frames]
+
+
+def test_directions_fit_in_two_bits() -> None:
+    assert len(DIRECTIONS) == 4
+    assert set(DIRECTIONS) == set(Direction)
+
+
+def test_move_log_round_trip() -> None:
+    for seed, frames in ((0, 0), (1, 1), (2, 5000)):
+        move_log, moves = random_log(seed, frames)
+        decoded = MoveLog.decode(move_log.encode())
+
+        assert decoded.seed == move_log.seed
+        assert decoded.runs == move_log.runs
+        assert len(decoded) == frames
+        assert [decoded[frame] for frame in range(frames)] == moves
+
+
+def test_store_replaces_logs(tmp_path: Path) -> None:
+    store = TrajectoryStore(tmp_path / 'trajectories.sqlite')
+    first, _ = random_log(0, 100)
+    second, moves = random_log(1, 200)
+
+    assert store.get('a') is None
+    store.put('a', first)
+    store.put_many([('a', second), ('b', first)])
+
+    replaced = store.get('a')
+    assert replaced.seed == second.seed
+    assert [replaced[frame] for frame in range(200)] == moves
+    assert store.get('b').seed == first.seed
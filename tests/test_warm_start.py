@@ -0,0 +1,63 @@
+import pytest
+
+from pacman_ai_neat.settings import simulation_settings
+from pacman_ai_neat.simulator import only_dots
+from pacman_ai_neat.warm_start import StatePool
+
+
+class HarvestedEpisode:
+    """Stands in for a PausedEpisode offered to a StatePool."""
+
+    def __init__(self, remaining: int, score: int, lifespan: int) -> None:
+        self.remaining = remaining
+        self.score = score
+        self.lifespan = lifespan
+        self.saved = False
+
+    def save(self) -> None:
+        self.saved = True
+
+
+def test_pool_keeps_a_bounded_sample_of_each_group(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(simulation_settings, 'random_seed', 0)
+    pool = StatePool(size=20, max_remaining=10)
+    episodes = [HarvestedEpisode(5, 10 * i, i) for i in range(100)] + [HarvestedEpisode(11, 0, 0)]
+    for episode in episodes:
+        pool.add(episode)
+
+    assert len(pool) == pool.group_size == 2
+    assert set(pool.groups) == {5}
+    kept = pool.groups[5]
+    assert all(episode.saved for episode in kept)
+    assert sum(episode.saved for episode in episodes) < 20
+    assert pool.baseline(5) == (round(10 * 99 / 2), round(99 / 2))
+    assert pool.sample() in kept
+
+
+def test_pool_is_reproducible_with_a_random_seed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(simulation_settings, 'random_seed', 1)
+
+    def kept() -> list[int]:
+        pool = StatePool(size=10, max_remaining=10)
+        for i in range(100):
+            pool.add(HarvestedEpisode(i % 3, i, i))
+        return [episode.score for group in pool.groups.values() for episode in group]
+
+    assert kept() == kept()
+
+
+def test_warm_starts_carry_on_from_the_given_score_and_lifespan(make_player) -> None:
+    full = only_dots(make_player(0))
+    pacman = only_dots(make_player(0), frame_cap=100)
+    episode = pacman.paused_episode
+    paused_score, paused_lifespan = pacman.score, episode.lifespan
+
+    # Carried on by a clone from nothing it only scores what it eats after the pause
+    clone = make_player(0)
+    clone.initialise()
+    clone.prepare()
+    clone.paused_episode = episode.handed_to(clone, 0, 0)
+    only_dots(clone)
+
+    assert clone.score == full.score - paused_score
+    assert clone.lifespan == full.lifespan - paused_lifespan
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import pytest
+
+from pacman_ai_neat import win_finder
+from pacman_ai_neat.settings import win_finder_settings
+from pacman_ai_neat.win_finder import WinFinder
+
+
+@pytest.fixture
+def make_win_finder(make_genome, monkeypatch: pytest.MonkeyPatch):
+    """Return a function that makes a WinFinder for the LinearGenome of seed 0, forking at the divergence
+    or not."""
+
+    monkeypatch.setattr(win_finder.Genome, 'load', lambda path: make_genome(0))
+
+    def make(fork_at_divergence: bool) -> WinFinder:
+        monkeypatch.setitem(win_finder_settings, 'fork_at_divergence', fork_at_divergence)
+        return WinFinder(Path('genome.pickle'))
+
+    return make
+
+
+def test_forked_games_replay_identically(make_win_finder) -> None:
+    forked, unforked = make_win_finder(True), make_win_finder(False)
+    assert forked.divergence is not None
+
+    for seed in [5, 0, 5, 3]:
+        assert forked.play_seed(seed) == unforked.play_seed(seed)
+        assert (forked.pacman.score, forked.pacman.position.tile_pos) == (unforked.pacman.score, unforked.pacman.position.tile_pos)
+        assert forked.pacdots.dots == unforked.pacdots.dots
+        assert [ghost.position.tile_pos for ghost in forked.ghosts] == [ghost.position.tile_pos for ghost in unforked.ghosts]